@@ -0,0 +1,53 @@
+"""
+bench_backfill.py
+
+Backfill throughput in revisions per second: a synthetic workload is
+written as SHARDS bzip2-compressed stub dumps, then loaded with one worker
+and with one worker per shard.
+
+Usage:
+    python -m benchmarks.bench_backfill [N_REVISIONS] [SHARDS]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks.workload import generate_changes, write_xml_dump  # noqa: E402
+from src.backfill import backfill  # noqa: E402
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+
+
+def main(n, shards):
+    workdir = tempfile.mkdtemp(prefix="editwar-bench-")
+    changes = generate_changes(n, seed=0, silent_revert_share=0.3)
+
+    paths = []
+    for shard in range(shards):
+        path = os.path.join(workdir, f"stub-meta-history{shard}.xml.bz2")
+        write_xml_dump([c for c in changes if int(c["title"].split()[-1]) % shards == shard], path)
+        paths.append(path)
+    del changes
+
+    print(f"revisions: {n}, shards: {shards}")
+    for workers in sorted({1, shards}):
+        db = DuckDBClient(os.path.join(workdir, f"bench{workers}.duckdb"))
+        totals = backfill(paths, db=db, workers=workers)
+        db.close()
+        print(
+            f"  {workers:>2} worker(s): {totals['seconds']:8.2f}s "
+            f"{totals['revisions_per_second']:>10.0f} revisions/s "
+            f"({totals['inserted']} reverts)"
+        )
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 400_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else min(os.cpu_count() or 1, 4)
+    )
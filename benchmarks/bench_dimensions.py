@@ -0,0 +1,160 @@
+"""
+bench_dimensions.py
+
+Detector latency and database size with article and user names stored
+in every revert_events row (before) versus integer ids into the articles
+and users dimension tables (after).
+
+The same synthetic reverts are loaded into two scratch databases: one
+with the pre-dimension revert_events table, reproduced here, and one
+with the current schema, written through RevertWriter. The "before"
+queries are the current detector queries with the id columns swapped
+back for the name columns; the "after" timings are the detectors as
+shipped, names joined back included.
+
+Usage:
+    python -m benchmarks.bench_dimensions [N_EVENTS] [RUNS]
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pyarrow as pa  # noqa: E402
+
+import src.detection.edit_war_detector as edit_war_detector  # noqa: E402
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+from src.db.duckdb_init import SCHEMA  # noqa: E402
+from src.db.revert_writer import RevertWriter  # noqa: E402
+from src.detection.consolidation import _grouping_query, consolidate_reverts  # noqa: E402
+from src.detection.detector_config import DEFAULT_CONFIG  # noqa: E402
+from src.detection.edit_war_detector import SCAN_QUERY, detect_edit_wars, scan_edit_wars  # noqa: E402
+from src.detection.three_rr_detector import _count_query, detect_three_rr  # noqa: E402
+
+LEGACY_SCHEMA = """
+CREATE SEQUENCE IF NOT EXISTS revert_events_seq;
+CREATE TABLE IF NOT EXISTS revert_events (
+  article VARCHAR,
+  user VARCHAR,
+  revid BIGINT NOT NULL,
+  old_revid BIGINT,
+  timestamp TIMESTAMP,
+  is_vandalism BOOLEAN,
+  comment TEXT,
+  wiki VARCHAR NOT NULL DEFAULT '',
+  seq BIGINT DEFAULT nextval('revert_events_seq'),
+  PRIMARY KEY (wiki, revid)
+);
+"""
+
+EVENTS = """
+SELECT wiki, article_id, user_id, timestamp
+FROM revert_events
+WHERE is_vandalism = FALSE
+"""
+
+
+def _by_name(query: str) -> str:
+    return query.replace("article_id", "article").replace("user_id", '"user"')
+
+
+def _reverts(n, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    rows = {"wiki": [], "article": [], "user": [], "revid": [], "timestamp": [], "is_vandalism": [], "comment": []}
+    for i in range(n):
+        rows["wiki"].append("en.wikipedia.org")
+        rows["article"].append(f"List of episodes of a long-running series {rng.randrange(n // 20 + 1)}")
+        rows["user"].append(f"Contributor {rng.randrange(n // 10 + 1)}")
+        rows["revid"].append(i)
+        rows["timestamp"].append(base + timedelta(seconds=rng.uniform(0, 2 * 86400)))
+        rows["is_vandalism"].append(rng.random() < 0.1)
+        rows["comment"].append("rv")
+    return pa.table(rows)
+
+
+def _best_of(runs, fn):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _legacy_fused(db):
+    edit_war_detector.SCAN_QUERY = _by_name(SCAN_QUERY)
+    try:
+        scan_edit_wars(db)
+    finally:
+        edit_war_detector.SCAN_QUERY = SCAN_QUERY
+
+
+def main(n, runs):
+    workdir = tempfile.mkdtemp(prefix="editwar-bench-")
+    reverts = _reverts(n)
+
+    try:
+        before_path = os.path.join(workdir, "before.duckdb")
+        before = DuckDBClient(before_path)
+        before.execute(LEGACY_SCHEMA)
+        before.insert_df("revert_events", reverts)
+        before.execute("CHECKPOINT")
+
+        after_path = os.path.join(workdir, "after.duckdb")
+        after = DuckDBClient(after_path)
+        after.execute(SCHEMA)
+        RevertWriter(after).write_batch(reverts)
+        after.execute("CHECKPOINT")
+
+        grouping = _grouping_query(EVENTS) + " ORDER BY first_revert_time"
+        three_rr = _count_query(EVENTS, "timestamp", "timestamp") + " ORDER BY last_revert_time DESC"
+
+        timings = [
+            (
+                "fused pass",
+                _best_of(runs, lambda: _legacy_fused(before)),
+                _best_of(runs, lambda: detect_edit_wars(db=after, consolidated=False)),
+            ),
+            (
+                "consolidation",
+                _best_of(runs, lambda: before.execute(
+                    _by_name(grouping), DEFAULT_CONFIG.sql_params("consolidation_gap")
+                ).fetchall()),
+                _best_of(runs, lambda: consolidate_reverts(db=after)),
+            ),
+            (
+                "3RR (raw)",
+                _best_of(runs, lambda: before.execute(
+                    _by_name(three_rr), DEFAULT_CONFIG.sql_params("three_rr_window", "three_rr_limit")
+                ).fetchall()),
+                _best_of(runs, lambda: detect_three_rr(db=after)),
+            ),
+        ]
+
+        before.close()
+        after.close()
+
+        print(f"revert events: {n}, best of {runs}")
+        print(f"  {'':<16} {'names':>10} {'ids':>10}")
+        for stage, names, ids in timings:
+            print(f"  {stage:<16} {names * 1000:>7.1f} ms {ids * 1000:>7.1f} ms")
+        print(
+            f"  {'database size':<16} {os.path.getsize(before_path) / 2 ** 20:>7.1f} MB "
+            f"{os.path.getsize(after_path) / 2 ** 20:>7.1f} MB"
+        )
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    )
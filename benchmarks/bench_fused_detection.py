@@ -0,0 +1,92 @@
+"""
+bench_fused_detection.py
+
+Per-stage timings of the three-query detection path (consolidation,
+3RR and mutual reverts each scanning revert_events) versus the fused
+single-scan pass.
+
+Usage:
+    python -m benchmarks.bench_fused_detection [N_EVENTS] [RUNS]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import duckdb
+import pyarrow as pa
+
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertWriter
+from src.detection.consolidation import consolidate_reverts
+from src.detection.edit_war_detector import detect_edit_wars
+from src.detection.mutual_revert_detector import detect_mutual_reverts
+from src.detection.three_rr_detector import detect_three_rr
+
+
+def _populate(con, n, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    con.execute(SCHEMA)
+    rows = [
+        (
+            f"Article {rng.randrange(n // 20 + 1)}",
+            f"User{rng.randrange(n // 10 + 1)}",
+            i,
+            base + timedelta(seconds=rng.uniform(0, 2 * 86400)),
+            rng.random() < 0.1,
+        )
+        for i in range(n)
+    ]
+    RevertWriter(DuckDBClient(None, con=con)).write_batch(pa.table({
+        name: list(values)
+        for name, values in zip(("article", "user", "revid", "timestamp", "is_vandalism"), zip(*rows))
+    }))
+
+
+def _timed(fn, **kwargs):
+    start = time.perf_counter()
+    fn(**kwargs)
+    return time.perf_counter() - start
+
+
+def main(n, runs):
+    con = duckdb.connect()
+    _populate(con, n)
+    db = DuckDBClient(None, con=con)
+
+    separate = {"consolidate": 0.0, "three_rr": 0.0, "mutual": 0.0}
+    fused = {"scan": 0.0, "consolidate": 0.0, "three_rr": 0.0, "mutual": 0.0, "names": 0.0}
+    fused_total = 0.0
+
+    for _ in range(runs):
+        separate["consolidate"] += _timed(consolidate_reverts, db=db)
+        separate["three_rr"] += _timed(detect_three_rr, db=db)
+        separate["mutual"] += _timed(detect_mutual_reverts, db=db)
+
+        start = time.perf_counter()
+        timings = detect_edit_wars(db=db)["timings"]
+        fused_total += time.perf_counter() - start
+        for stage, seconds in timings.items():
+            fused[stage] += seconds
+
+    print(f"revert events: {n}, runs: {runs}")
+    print("three queries:")
+    for stage, seconds in separate.items():
+        print(f"  {stage:<12} {seconds / runs * 1000:8.1f} ms")
+    print(f"  {'total':<12} {sum(separate.values()) / runs * 1000:8.1f} ms")
+    print("fused pass:")
+    for stage, seconds in fused.items():
+        print(f"  {stage:<12} {seconds / runs * 1000:8.1f} ms")
+    print(f"  {'total':<12} {fused_total / runs * 1000:8.1f} ms")
+
+    con.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    )
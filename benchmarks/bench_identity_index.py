@@ -0,0 +1,87 @@
+"""
+bench_identity_index.py
+
+Throughput and memory of the sha1 identity-revert index at different
+numbers of active articles, plus the cost of reloading evicted articles
+from DuckDB.
+
+For each size, N_EVENTS synthetic changes spread over that many articles
+are observed a page at a time: first memory-only (observe throughput and
+tracemalloc peak of the index), then with an index holding a tenth of the
+articles and backed by a scratch database (reload query latency per page).
+
+Usage:
+    python -m benchmarks.bench_identity_index [N_EVENTS] [ARTICLES ...]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks.workload import generate_changes  # noqa: E402
+from src.config import RC_PAGE_LIMIT  # noqa: E402
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+from src.db.duckdb_init import SCHEMA  # noqa: E402
+from src.detection.identity_revert_index import IdentityRevertIndex  # noqa: E402
+
+
+def _pages(changes):
+    for i in range(0, len(changes), RC_PAGE_LIMIT):
+        yield changes[i:i + RC_PAGE_LIMIT]
+
+
+def main(n, sizes):
+    for n_articles in sizes:
+        changes = generate_changes(
+            n, seed=0, n_articles=n_articles, hot_article_skew=0.5, silent_revert_share=0.5
+        )
+
+        index = IdentityRevertIndex(max_articles=n_articles)
+        tracemalloc.start()
+        start = time.perf_counter()
+        found = 0
+        for page in _pages(changes):
+            found += sum(r is not None for r in index.observe_page(page))
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(
+            f"{n_articles:>8} articles ({len(index)} active): "
+            f"{n / seconds:>10.0f} changes/s, {found} identity reverts, "
+            f"peak {peak / 2 ** 20:.1f} MB ({peak / max(len(index), 1):.0f} B/article)"
+        )
+
+        workdir = tempfile.mkdtemp(prefix="editwar-bench-")
+        db = DuckDBClient(os.path.join(workdir, "bench.duckdb"))
+        db.execute(SCHEMA)
+
+        backed = IdentityRevertIndex(max_articles=max(n_articles // 10, 1))
+        latencies = []
+        for page in _pages(changes):
+            start = time.perf_counter()
+            backed.observe_page(page, db)
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+
+        print(
+            f"{'':>8} with DuckDB, 10% in memory: "
+            f"{n / sum(latencies):>10.0f} changes/s, "
+            f"page p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms"
+        )
+
+        db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        [int(s) for s in sys.argv[2:]] or [10_000, 50_000]
+    )
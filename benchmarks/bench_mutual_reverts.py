@@ -0,0 +1,86 @@
+"""
+bench_mutual_reverts.py
+
+Compares the sort-and-sweep mutual revert detector with the previous
+self-join query on a single hot article with thousands of reverts.
+
+Usage:
+    python -m benchmarks.bench_mutual_reverts [N ...]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import duckdb
+
+from src.db.duckdb_init import SCHEMA
+from src.detection.mutual_revert_detector import find_mutual_reverts
+
+# The pre-sweep implementation: pairs every revert with every other
+# revert on the same article within 24h.
+SELF_JOIN_QUERY = """
+WITH base AS (
+    SELECT article_id, user_id, timestamp FROM revert_events WHERE is_vandalism = FALSE
+),
+pairs AS (
+    SELECT a.article_id, a.user_id AS user_a, b.user_id AS user_b, a.timestamp AS ts_a, b.timestamp AS ts_b
+    FROM base a
+    JOIN base b
+      ON a.article_id = b.article_id
+     AND a.user_id < b.user_id
+     AND ABS(EPOCH(a.timestamp) - EPOCH(b.timestamp)) <= 24 * 3600
+)
+SELECT article_id, user_a, user_b, COUNT(*), COUNT(*), MAX(GREATEST(ts_a, ts_b))
+FROM pairs
+GROUP BY article_id, user_a, user_b
+HAVING COUNT(*) >= 2
+"""
+
+SWEEP_QUERY = """
+SELECT article_id, user_id, timestamp
+FROM revert_events
+WHERE is_vandalism = FALSE
+ORDER BY article_id, timestamp
+"""
+
+
+def _load(con, n, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+
+    # One hot article and eight users, by id
+    con.execute("DELETE FROM revert_events")
+    con.executemany(
+        "INSERT INTO revert_events (article_id, user_id, revid, timestamp, is_vandalism) "
+        "VALUES (1, ?, ?, ?, FALSE)",
+        [
+            (rng.randrange(8), i, base + timedelta(seconds=rng.uniform(0, 48 * 3600)))
+            for i in range(n)
+        ]
+    )
+
+
+def _time(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main(sizes):
+    con = duckdb.connect()
+    con.execute(SCHEMA)
+
+    print(f"{'reverts':>8} {'self-join s':>12} {'sweep s':>9} {'sweep us/revert':>16}")
+    for n in sizes:
+        _load(con, n)
+        self_join = _time(lambda: con.execute(SELF_JOIN_QUERY).fetchall())
+        sweep = _time(lambda: find_mutual_reverts(con.execute(SWEEP_QUERY).fetchall()))
+        print(f"{n:>8} {self_join:>12.3f} {sweep:>9.3f} {sweep / n * 1e6:>16.1f}")
+
+    con.close()
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1000, 2000, 4000, 8000, 16000])
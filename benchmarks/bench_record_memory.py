@@ -0,0 +1,109 @@
+"""
+bench_record_memory.py
+
+Bytes per event of holding and writing a batch of classified changes,
+before and after slotted records and the Arrow hand-off.
+
+- before: classify_change() dicts, then the revert rows rebuilt as dicts
+  and a pandas DataFrame registered with DuckDB (the pre-RecordBatch
+  write_reverts path, reproduced here)
+- after: classify_record() ClassifiedChange records, collected by a
+  RevertBatchBuilder into one Arrow RecordBatch
+
+For each, tracemalloc reports the memory retained by the classified batch
+and the peak while handing the reverts to DuckDB, divided by the number of
+events; the insert itself is timed.
+
+Usage:
+    python -m benchmarks.bench_record_memory [N_EVENTS]
+"""
+
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.workload import generate_changes  # noqa: E402
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+from src.db.duckdb_init import SCHEMA  # noqa: E402
+from src.db.revert_writer import RevertBatchBuilder  # noqa: E402
+from src.detection.revert_detector import classify_change, classify_record  # noqa: E402
+
+
+def _before(changes, db):
+    classified = [classify_change(c) for c in changes]
+    held = tracemalloc.get_traced_memory()[0]
+
+    revert_rows = [
+        {
+            "wiki": c.get("wiki") or "",
+            "article": c["article"],
+            "user": c["user"],
+            "revid": c["revid"],
+            "old_revid": c["old_revid"],
+            "timestamp": c["timestamp"],
+            "is_vandalism": c["is_vandalism_revert"],
+            "comment": c["comment"],
+        }
+        for c in classified
+        if c.get("is_revert") and c.get("revid") is not None
+    ]
+    df = pd.DataFrame(revert_rows)
+    start = time.perf_counter()
+    db.insert_df("revert_events", df, ignore_duplicates=True)
+    return held, time.perf_counter() - start
+
+
+def _after(changes, db):
+    classified = [classify_record(c) for c in changes]
+    held = tracemalloc.get_traced_memory()[0]
+
+    builder = RevertBatchBuilder()
+    builder.extend(classified)
+    batch = builder.build()
+    start = time.perf_counter()
+    db.insert_df("revert_events", batch, ignore_duplicates=True)
+    return held, time.perf_counter() - start
+
+
+def _measure(run, changes, workdir, name):
+    db = DuckDBClient(os.path.join(workdir, f"{name}.duckdb"))
+    db.execute(SCHEMA)
+
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    held, seconds = run(changes, db)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0]
+    db.close()
+
+    n = len(changes)
+    print(
+        f"{name:>7}: held {(held - base) / n:>6.0f} B/event, "
+        f"peak {(peak - base) / n:>6.0f} B/event, "
+        f"insert {seconds * 1000:>7.1f} ms ({count} reverts)"
+    )
+
+
+def main(n):
+    changes = generate_changes(n, seed=0)
+    workdir = tempfile.mkdtemp(prefix="editwar-bench-")
+    try:
+        _measure(_before, changes, workdir, "before")
+        _measure(_after, changes, workdir, "after")
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,167 @@
+"""
+bench_revert_detector.py
+
+Microbenchmark of revert classification: the previous per-keyword
+substring loops (one change at a time) against the compiled matcher
+behind classify_changes(), and the columnar classify_table().
+
+Usage:
+    python -m benchmarks.bench_revert_detector [N]
+"""
+
+import logging
+import random
+import sys
+import time
+
+import pyarrow as pa
+
+from src.detection.revert_detector import (
+    REVERT_SUMMARY_KEYWORDS,
+    REVERT_TAG_KEYWORDS,
+    VANDALISM_KEYWORDS,
+    MATCHER,
+    RECENT_CHANGE_SCHEMA,
+    classify_changes,
+    classify_table,
+)
+
+legacy_logger = logging.getLogger("revert_detector")
+
+SUMMARIES = [
+    "Reverted edits by [[Special:Contributions/203.0.113.7|203.0.113.7]] to last version by Example",
+    "Undid revision 1234567 by [[Special:Contributions/Example|Example]] ([[User talk:Example|talk]])",
+    "rvv",
+    "copyedit",
+    "added citation to a peer-reviewed survey of the literature",
+    "/* Early life */ expanded section with sources",
+    "Restored revision 1234 by Example: unsourced",
+    "",
+    "fix typo",
+    "Reverted 1 edit by Example (talk): test edit",
+]
+
+TAGS = [
+    [],
+    ["visualeditor"],
+    ["mw-undo"],
+    ["mw-rollback", "mw-reverted"],
+    ["mobile edit", "mobile web edit"],
+]
+
+
+def _legacy_contains(text, keywords):
+    if not text:
+        return False
+    text = text.lower()
+    return any(k in text for k in keywords)
+
+
+def _legacy_is_revert(change):
+    tags = change.get("tags", []) or []
+    comment = change.get("comment", "") or ""
+
+    for tag in tags:
+        if _legacy_contains(tag.lower(), REVERT_TAG_KEYWORDS):
+            legacy_logger.debug("Revert detected via tag: %s", tag)
+            return True
+
+    if _legacy_contains(comment, REVERT_SUMMARY_KEYWORDS):
+        legacy_logger.debug("Revert detected via summary: %s", comment)
+        return True
+
+    return False
+
+
+def _legacy_is_vandalism_revert(change):
+    comment = change.get("comment", "") or ""
+    tags = change.get("tags", []) or []
+
+    if _legacy_contains(comment, VANDALISM_KEYWORDS):
+        legacy_logger.debug("Vandalism revert detected via summary: %s", comment)
+        return True
+
+    for tag in tags:
+        if "rollback" in tag.lower() and "vandal" in comment.lower():
+            return True
+
+    return False
+
+
+def _legacy_classify(change):
+    """The pre-matcher classify_change()."""
+    revert = _legacy_is_revert(change)
+    vandalism = revert and _legacy_is_vandalism_revert(change)
+
+    legacy_logger.debug("Classified change | revert=%s vandalism=%s", revert, vandalism)
+
+    return {
+        "article": change.get("title"),
+        "user": change.get("user"),
+        "revid": change.get("revid"),
+        "old_revid": change.get("old_revid"),
+        "timestamp": change.get("timestamp"),
+        "comment": change.get("comment"),
+        "tags": change.get("tags", []),
+        "is_revert": revert,
+        "is_vandalism_revert": vandalism
+    }
+
+
+def make_changes(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "title": f"Article {rng.randrange(1000)}",
+            "user": f"User{rng.randrange(500)}",
+            "revid": i,
+            "old_revid": i - 1,
+            "timestamp": "2025-01-01T00:00:00Z",
+            "comment": rng.choice(SUMMARIES),
+            "tags": rng.choice(TAGS),
+        }
+        for i in range(n)
+    ]
+
+
+def main(n):
+    changes = make_changes(n)
+    comments = [c["comment"] for c in changes]
+
+    start = time.perf_counter()
+    for comment in comments:
+        _legacy_contains(comment, REVERT_SUMMARY_KEYWORDS)
+        _legacy_contains(comment, VANDALISM_KEYWORDS)
+    legacy_match_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    MATCHER.match_many(comments)
+    match_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    legacy = [_legacy_classify(c) for c in changes]
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = classify_changes(changes)
+    batch_s = time.perf_counter() - start
+
+    table = pa.Table.from_pylist(changes, schema=RECENT_CHANGE_SCHEMA)
+    start = time.perf_counter()
+    columnar = classify_table(table)
+    columnar_s = time.perf_counter() - start
+
+    differing = sum(a["is_revert"] != b["is_revert"] for a, b in zip(legacy, batch))
+
+    print(f"changes:            {n}")
+    print(f"summary keywords, per-set substring loops: {legacy_match_s:.3f}s")
+    print(f"summary keywords, KeywordMatcher.match_many: {match_s:.3f}s")
+    print(f"per-item (legacy):  {legacy_s:.3f}s  {n / legacy_s:>10.0f} changes/s")
+    print(f"classify_changes:   {batch_s:.3f}s  {n / batch_s:>10.0f} changes/s")
+    print(f"classify_table:     {columnar_s:.3f}s  {n / columnar_s:>10.0f} changes/s")
+    assert columnar["is_revert"].to_pylist() == [c["is_revert"] for c in batch]
+    print(f"revert verdicts changed by word-boundary matching: {differing}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,84 @@
+"""
+bench_sharded_detection.py
+
+Cycle time of the single-process fused detection pass versus the sharded
+pass (sharded_detector.py) with 1, 2, 4, ... workers, on a synthetic
+revert_events table. The worker pool is warmed up first, as it is in the
+daemon, so pool start-up is not counted.
+
+Usage:
+    python -m benchmarks.bench_sharded_detection [N_EVENTS] [RUNS]
+"""
+
+import os
+import sys
+import time
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import duckdb  # noqa: E402
+
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+from src.db.duckdb_init import SCHEMA  # noqa: E402
+from src.detection.edit_war_detector import detect_edit_wars  # noqa: E402
+from src.detection.sharded_detector import ShardedDetector  # noqa: E402
+
+
+def _populate(con, n):
+    con.execute(SCHEMA)
+    con.execute(
+        f"""
+        INSERT INTO articles (article_id, name)
+        SELECT i, 'Article ' || i FROM range({n // 20 + 1}) t(i);
+        INSERT INTO users (user_id, name)
+        SELECT i, 'User' || i FROM range({n // 10 + 1}) t(i);
+        INSERT INTO revert_events (article_id, user_id, revid, timestamp, is_vandalism)
+        SELECT
+            CAST(floor(random() * {n // 20 + 1}) AS INTEGER),
+            CAST(floor(random() * {n // 10 + 1}) AS INTEGER),
+            i,
+            TIMESTAMP '2025-01-01' + to_seconds(CAST(random() * 2 * 86400 AS BIGINT)),
+            random() < 0.1
+        FROM range({n}) t(i)
+        """
+    )
+
+
+def _best_of(runs, fn):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(n, runs):
+    con = duckdb.connect()
+    con.execute("SELECT setseed(0.5)")
+    _populate(con, n)
+    db = DuckDBClient(None, con=con)
+
+    cpus = os.cpu_count() or 1
+    print(f"revert events: {n}, runs: {runs}, cpus: {cpus}")
+    print(f"  {'single pass':<22} {_best_of(runs, lambda: detect_edit_wars(db=db)) * 1000:8.1f} ms")
+
+    workers = 1
+    while workers <= max(cpus, 1):
+        detector = ShardedDetector(shards=4 * workers, workers=workers)
+        try:
+            detector.detect(db=db)
+            seconds = _best_of(runs, lambda: detector.detect(db=db))
+        finally:
+            detector.close()
+        print(f"  {f'sharded, {workers} worker(s)':<22} {seconds * 1000:8.1f} ms")
+        workers *= 2
+
+    con.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    )
@@ -0,0 +1,124 @@
+"""
+bench_shared_connection.py
+
+Per-run overhead of opening the database once per stage (writer,
+consolidation, 3RR, mutual reverts) versus one shared session for the
+whole run.
+
+Usage:
+    python -m benchmarks.bench_shared_connection [N_EVENTS] [RUNS]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Stages opening their own connection use DUCKDB_PATH, so point it at a
+# scratch database before src.config is imported.
+_tmpdir = tempfile.mkdtemp()
+os.environ["DUCKDB_PATH"] = os.path.join(_tmpdir, "bench.duckdb")
+
+import pyarrow as pa  # noqa: E402
+
+from src.config import DUCKDB_PATH  # noqa: E402
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+from src.db.duckdb_init import SCHEMA  # noqa: E402
+from src.db.revert_writer import RevertWriter  # noqa: E402
+from src.detection.consolidation import consolidate_reverts  # noqa: E402
+from src.detection.mutual_revert_detector import detect_mutual_reverts  # noqa: E402
+from src.detection.three_rr_detector import detect_three_rr  # noqa: E402
+
+
+def _populate(n, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    db = DuckDBClient(DUCKDB_PATH)
+    db.execute(SCHEMA)
+    rows = [
+        (
+            f"Article {rng.randrange(n // 20 + 1)}",
+            f"User{rng.randrange(n // 10 + 1)}",
+            i,
+            base + timedelta(seconds=rng.uniform(0, 7 * 86400)),
+            rng.random() < 0.1,
+        )
+        for i in range(n)
+    ]
+    RevertWriter(db).write_batch(pa.table({
+        name: list(values)
+        for name, values in zip(("article", "user", "revid", "timestamp", "is_vandalism"), zip(*rows))
+    }))
+    db.close()
+
+
+def _batch(run, size=50):
+    return [
+        {
+            "article": "Bench",
+            "user": "BenchUser",
+            "revid": 10_000_000 + run * size + i,
+            "old_revid": 0,
+            "timestamp": "2025-01-08T00:00:00Z",
+            "comment": "rv",
+            "is_revert": True,
+            "is_vandalism_revert": False,
+        }
+        for i in range(size)
+    ]
+
+
+def run_separate(run):
+    writer = RevertWriter()
+    writer.write_reverts(_batch(run))
+    writer.close()
+    consolidate_reverts()
+    detect_three_rr()
+    detect_mutual_reverts()
+
+
+def run_shared(run):
+    db = DuckDBClient(DUCKDB_PATH)
+    writer = RevertWriter(db)
+    writer.write_reverts(_batch(run))
+    consolidate_reverts(db=db)
+    detect_three_rr(db=db)
+    detect_mutual_reverts(db=db)
+    db.close()
+
+
+def _open_close():
+    db = DuckDBClient(DUCKDB_PATH)
+    db.execute("SELECT COUNT(*) FROM revert_events").fetchone()
+    db.close()
+
+
+def main(n, runs):
+    _populate(n)
+
+    timings = {}
+    for name, fn in (("separate", run_separate), ("shared", run_shared)):
+        start = time.perf_counter()
+        for i in range(runs):
+            fn(i if name == "separate" else runs + i)
+        timings[name] = (time.perf_counter() - start) / runs
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        _open_close()
+    open_close = (time.perf_counter() - start) / runs
+
+    print(f"revert events:               {n}")
+    print(f"open + first query + close:  {open_close * 1000:8.1f} ms")
+    print(f"run, connection per stage:   {timings['separate'] * 1000:8.1f} ms")
+    print(f"run, one shared session:     {timings['shared'] * 1000:8.1f} ms")
+    print(f"saved per run:               {(timings['separate'] - timings['shared']) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    )
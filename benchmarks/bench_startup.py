@@ -0,0 +1,134 @@
+"""
+bench_startup.py
+
+Cold-start cost of the command-line entry points, from `python -X importtime`.
+
+- before: the modules src.main used to import at load time (python-dotenv,
+  pandas, aiohttp, the SSE client, the wiki editor and publisher, the
+  sharded detector, ...), imported eagerly as the old entry point did
+- after: the src.cli subcommands, which import only what they run, and
+  src.main itself
+
+Each invocation runs in a fresh interpreter. For each, the best wall time
+of RUNS runs is recorded with the total import time (the sum of the
+top-level entries of the -X importtime log) and the slowest top-level
+imports. Records have run_suite.py's shape (stage "startup: <case>",
+0 events), and run_suite.py adds them to its results. Run on its own,
+this benchmark writes them to a results file of the same shape, which
+can be compared against a --baseline.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N] [--out FILE] [--baseline FILE]
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+EAGER_IMPORTS = (
+    "import dotenv, pandas, requests, src.main, src.api.async_fetcher, src.api.event_stream, "
+    "src.api.wiki_editor, src.reporter.publisher, src.detection.sharded_detector, "
+    "src.detection.streaming_engine"
+)
+
+IMPORT_LINE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \| (\S.*)$")
+
+CASES = [
+    ("before: eager imports", ["-c", EAGER_IMPORTS]),
+    ("after: import src.main", ["-c", "import src.main"]),
+    ("after: cli --help", ["-m", "src.cli", "--help"]),
+    ("after: cli init-db", ["-m", "src.cli", "init-db"]),
+    ("after: cli detect", ["-m", "src.cli", "detect"]),
+]
+
+
+def _run(args, env):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True
+    )
+    wall = time.perf_counter() - start
+
+    # Top-level imports only (nested ones are indented under their parent)
+    top = [
+        (int(m.group(1)), m.group(2))
+        for m in map(IMPORT_LINE.match, result.stderr.splitlines())
+        if m
+    ]
+    return wall, sum(us for us, _ in top), sorted(top, reverse=True)[:3]
+
+
+def measure(runs: int = 5) -> List[Dict]:
+    """Best-of-`runs` startup cost of each case, as run_suite.py records."""
+
+    workdir = tempfile.mkdtemp(prefix="editwar-bench-")
+    env = dict(os.environ, LOG_LEVEL="WARNING", DUCKDB_PATH=os.path.join(workdir, "bench.duckdb"))
+    records = []
+
+    try:
+        for name, args in CASES:
+            wall, imports, slowest = min((_run(args, env) for _ in range(runs)), key=lambda r: r[0])
+            records.append({
+                "stage": f"startup: {name}",
+                "events": 0,
+                "items": 1,
+                "seconds": round(wall, 6),
+                "import_seconds": round(imports / 1e6, 6),
+                "slowest_imports_ms": {module: round(us / 1000, 1) for us, module in slowest},
+            })
+    finally:
+        shutil.rmtree(workdir)
+
+    return records
+
+
+def print_record(record: Dict):
+    print(
+        f"{record['stage']:<32} wall {record['seconds'] * 1000:>6.0f} ms, "
+        f"imports {record['import_seconds'] * 1000:>6.0f} ms"
+    )
+    print("    slowest: " + ", ".join(f"{m} {ms:.0f} ms" for m, ms in record["slowest_imports_ms"].items()))
+
+
+def main():
+    # Imported here: run_suite.py imports this module for measure()
+    from benchmarks.run_suite import compare, suite_meta
+
+    parser = argparse.ArgumentParser(description="EditWarCatcherBot startup benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="runs per case; the best is kept")
+    parser.add_argument("--out", default="bench_startup.json")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    args = parser.parse_args()
+
+    records = measure(args.runs)
+    for record in records:
+        print_record(record)
+
+    report = {"meta": suite_meta(startup_runs=args.runs), "results": records}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f))
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
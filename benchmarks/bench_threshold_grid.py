@@ -0,0 +1,95 @@
+"""
+bench_threshold_grid.py
+
+What-if evaluation of a grid of detector thresholds (3RR windows of
+12/24/48 hours x limits of 3/4 by default):
+
+- before: one detect_edit_wars() run per config, i.e. one scan each
+- after: evaluate_grid(), every config from a single scan
+
+Results are checked to be identical per config. The synthetic reverts
+give each article a handful of regular editors, unlike
+bench_fused_detection's uniform ones, so that every config reports
+incidents to compare.
+
+Usage:
+    python -m benchmarks.bench_threshold_grid [N_EVENTS] [RUNS]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import duckdb  # noqa: E402
+import pyarrow as pa  # noqa: E402
+
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+from src.db.duckdb_init import SCHEMA  # noqa: E402
+from src.db.revert_writer import RevertWriter  # noqa: E402
+from src.detection.detector_config import threshold_grid  # noqa: E402
+from src.detection.edit_war_detector import detect_edit_wars, evaluate_grid  # noqa: E402
+
+GRID = threshold_grid(three_rr_window_hours=(12, 24, 48), three_rr_limit=(3, 4))
+
+
+def _populate(db, n, seed=0):
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    db.execute(SCHEMA)
+    # Each article is reverted by a handful of its regular editors
+    articles = [rng.randrange(n // 20 + 1) for _ in range(n)]
+    RevertWriter(db).write_batch(pa.table({
+        "article": [f"Article {a}" for a in articles],
+        "user": [f"User{(3 * a + rng.randrange(10)) % (n // 20 + 1)}" for a in articles],
+        "revid": list(range(n)),
+        "timestamp": [base + timedelta(seconds=rng.uniform(0, 7 * 86400)) for _ in range(n)],
+        "is_vandalism": [rng.random() < 0.1 for _ in range(n)],
+    }))
+
+
+def _best_of(runs, fn):
+    best, result = float("inf"), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _incidents(result):
+    return result["three_rr"], result["mutual"]
+
+
+def main(n, runs):
+    db = DuckDBClient(None, con=duckdb.connect())
+    _populate(db, n)
+
+    before, separate = _best_of(runs, lambda: {
+        config: detect_edit_wars(db=db, consolidated=False, config=config) for config in GRID
+    })
+    after, grid = _best_of(runs, lambda: evaluate_grid(GRID, db=db))
+
+    for config in GRID:
+        assert _incidents(separate[config]) == _incidents(grid[config]), config
+
+    print(f"revert events: {n}, configs: {len(GRID)}, best of {runs}")
+    print(f"  one pass per config  {before * 1000:8.1f} ms")
+    print(f"  evaluate_grid        {after * 1000:8.1f} ms")
+    for config in GRID:
+        print(
+            f"    {config.three_rr_window_hours:>2}h / {config.three_rr_limit}: "
+            f"{len(grid[config]['three_rr'])} 3RR, {len(grid[config]['mutual'])} mutual"
+        )
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    )
@@ -0,0 +1,304 @@
+"""
+run_suite.py
+
+End-to-end benchmark suite over synthetic workloads (see workload.py).
+
+For each workload size the pipeline stages run in order on a scratch
+database:
+
+    classify_change -> RevertWriter.write_reverts -> consolidate_reverts
+    -> detect_three_rr -> detect_mutual_reverts -> format_full_report
+
+and each stage's wall time, throughput, call latency (p50/p95/max) and
+peak RSS are recorded. Every size runs in its own process so peak RSS is
+not carried over between sizes. The cold-start cost of the entry points
+is recorded too, as 0-event "startup: ..." stages (see bench_startup.py).
+Results are written to a JSON file; pass --baseline to flag stages that
+got slower than a previous run.
+
+Usage:
+    python -m benchmarks.run_suite [--sizes 1e3 1e4 ...] [--out FILE]
+                                   [--baseline FILE] [--seed N]
+                                   [--startup-runs N]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# Per-batch INFO logging would dominate the timings
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from benchmarks.bench_startup import measure as measure_startup, print_record  # noqa: E402
+from benchmarks.workload import iter_changes  # noqa: E402
+from src.config import RC_PAGE_LIMIT  # noqa: E402
+from src.db.duckdb_client import DuckDBClient  # noqa: E402
+from src.db.duckdb_init import SCHEMA  # noqa: E402
+from src.db.revert_writer import RevertWriter  # noqa: E402
+from src.detection.consolidation import consolidate_reverts  # noqa: E402
+from src.detection.mutual_revert_detector import detect_mutual_reverts  # noqa: E402
+from src.detection.revert_detector import classify_change  # noqa: E402
+from src.detection.three_rr_detector import detect_three_rr  # noqa: E402
+from src.reporter.report_formatter import format_full_report  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+# Stages whose per-call latency is sampled rather than timed on every call
+LATENCY_SAMPLE_EVERY = 100
+
+# A stage is reported as a regression when it is this much slower than baseline
+REGRESSION_THRESHOLD = 1.2
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except OSError:
+        # ru_maxrss is the lifetime peak (KiB on Linux), the best we have
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _PeakRSS:
+    """Samples resident memory in the background while a stage runs."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = _rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, _rss_bytes())
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _stage(name: str, items: int, fn: Callable[[], List[float]]) -> Dict:
+    """Run one stage; `fn` returns the per-call latencies it measured (seconds)."""
+
+    with _PeakRSS() as rss:
+        start = time.perf_counter()
+        latencies = fn()
+        seconds = time.perf_counter() - start
+
+    latencies = sorted(latencies or [seconds])
+    return {
+        "stage": name,
+        "items": items,
+        "seconds": round(seconds, 6),
+        "throughput_per_s": round(items / seconds, 1) if seconds else None,
+        "latency_ms": {
+            "p50": round(_percentile(latencies, 0.50) * 1000, 4),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 4),
+            "max": round(latencies[-1] * 1000, 4),
+        },
+        "peak_rss_mb": round(rss.peak / 2 ** 20, 1),
+    }
+
+
+def run_size(n: int, seed: int) -> List[Dict]:
+    """Run every stage on an `n`-event workload; returns one record per stage."""
+
+    workdir = tempfile.mkdtemp(prefix="editwar-bench-")
+    db = DuckDBClient(os.path.join(workdir, "bench.duckdb"))
+    db.execute(SCHEMA)
+
+    reverts = []
+    results = []
+
+    def classify():
+        latencies = []
+        for i, change in enumerate(iter_changes(n, seed=seed)):
+            if i % LATENCY_SAMPLE_EVERY:
+                classified = classify_change(change)
+            else:
+                start = time.perf_counter()
+                classified = classify_change(change)
+                latencies.append(time.perf_counter() - start)
+            if classified["is_revert"]:
+                reverts.append(classified)
+        return latencies
+
+    # Generating the workload is part of this stage's time; it is also
+    # timed on its own below so it can be subtracted
+    results.append(_stage("classify_change", n, classify))
+
+    def write():
+        writer = RevertWriter(db)
+        latencies = []
+        for i in range(0, len(reverts), RC_PAGE_LIMIT):
+            start = time.perf_counter()
+            writer.write_reverts(reverts[i:i + RC_PAGE_LIMIT])
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    results.append(_stage("write_reverts", len(reverts), write))
+    revert_count = len(reverts)
+    reverts.clear()
+
+    cases = {}
+
+    def single(key, fn):
+        def run():
+            cases[key] = fn()
+            return []
+        return run
+
+    results.append(_stage(
+        "consolidate_reverts", revert_count, single("consolidated", lambda: consolidate_reverts(db=db))
+    ))
+    results.append(_stage(
+        "detect_three_rr", revert_count, single("three_rr", lambda: detect_three_rr(db=db))
+    ))
+    results.append(_stage(
+        "detect_mutual_reverts", revert_count, single("mutual", lambda: detect_mutual_reverts(db=db))
+    ))
+    results.append(_stage(
+        "format_full_report",
+        len(cases["three_rr"]) + len(cases["mutual"]),
+        single("report", lambda: format_full_report(cases["three_rr"], cases["mutual"]))
+    ))
+
+    def generate():
+        for _ in iter_changes(n, seed=seed):
+            pass
+        return []
+
+    results.append(_stage("generate_workload", n, generate))
+
+    db.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    for record in results:
+        record["events"] = n
+    return results
+
+
+def _run_size_in_child(n: int, seed: int, queue):
+    queue.put(run_size(n, seed))
+
+
+def suite_meta(**extra) -> Dict:
+    """The "meta" block of a results file."""
+
+    return {
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        **extra,
+    }
+
+
+def run_suite(sizes: List[int], seed: int = 0, startup_runs: int = 3) -> Dict:
+    """Run every size in its own process, then the startup cases, and collect the records."""
+
+    ctx = multiprocessing.get_context("spawn")
+    records = []
+
+    for n in sizes:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_size_in_child, args=(n, seed, queue))
+        proc.start()
+        size_records = queue.get()
+        proc.join()
+        records.extend(size_records)
+
+        for r in size_records:
+            print(
+                f"{n:>10} {r['stage']:<22} {r['seconds']:>10.3f}s "
+                f"{r['throughput_per_s'] or 0:>14.0f}/s "
+                f"p95 {r['latency_ms']['p95']:>10.3f}ms "
+                f"rss {r['peak_rss_mb']:>8.1f}MB"
+            )
+
+    if startup_runs:
+        startup = measure_startup(startup_runs)
+        records.extend(startup)
+        for r in startup:
+            print_record(r)
+
+    return {
+        "meta": suite_meta(seed=seed, startup_runs=startup_runs),
+        "results": records,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[str]:
+    """Stages at least `threshold` times slower than in `baseline`."""
+
+    previous = {(r["events"], r["stage"]): r["seconds"] for r in baseline["results"]}
+    regressions = []
+
+    for r in report["results"]:
+        before = previous.get((r["events"], r["stage"]))
+        if before and r["seconds"] >= before * threshold:
+            regressions.append(
+                f"{r['stage']} @ {r['events']} events: "
+                f"{before:.3f}s -> {r['seconds']:.3f}s ({r['seconds'] / before:.2f}x)"
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EditWarCatcherBot benchmark suite")
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=lambda s: int(float(s)),
+        default=DEFAULT_SIZES,
+        help="workload sizes in events (e.g. 1e3 1e5 1e7)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument(
+        "--startup-runs", type=int, default=3, help="runs per startup case (0 to skip them)"
+    )
+    args = parser.parse_args()
+
+    report = run_suite(args.sizes, seed=args.seed, startup_runs=args.startup_runs)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f))
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
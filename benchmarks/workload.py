@@ -0,0 +1,212 @@
+"""
+workload.py
+
+Seeded generator of synthetic recentchanges payloads for benchmarks.
+
+Changes have the shape returned by the MediaWiki recentchanges API (and
+expected by classify_change), with tunable:
+
+- edit rate (mean edits per second; arrivals are Poisson)
+- revert ratio (share of edits that revert the previous edit)
+- vandalism share (share of reverts that are vandalism reverts)
+- hot-article skew (Zipf exponent of article popularity)
+- silent revert share (share of content reverts with no summary or tags,
+  only recognisable by content hash)
+
+Reverts undo the article's previous editor; content reverts are made by
+the editor before them where there is one, so hot articles develop
+back-and-forth revert chains that the 3RR and mutual revert detectors
+pick up. Every change carries a sha1; a revert restores the sha1 the
+article had before the reverted edit.
+
+The same seed always produces the same workload. write_xml_dump() writes
+a workload as an XML dump for the backfill.
+"""
+
+import bisect
+import bz2
+import gzip
+import hashlib
+import itertools
+import random
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List
+from xml.sax.saxutils import escape
+
+from src.api.fetcher import MW_TIMESTAMP_FORMAT
+
+EDIT_SUMMARIES = [
+    "copyedit",
+    "fix typo",
+    "/* History */ expanded section with sources",
+    "added citation to a peer-reviewed survey of the literature",
+    "Updated infobox",
+    "",
+]
+
+REVERT_SUMMARIES = [
+    "Undid revision {old} by [[Special:Contributions/{target}|{target}]]",
+    "Reverted edits by [[Special:Contributions/{target}|{target}]] to last version",
+    "rv: unsourced",
+    "Restored revision {old} by {target}: per talk page",
+]
+
+VANDALISM_SUMMARIES = [
+    "rvv",
+    "Reverted vandalism by [[Special:Contributions/{target}|{target}]]",
+    "Reverted edits by {target} (talk): vandalism",
+]
+
+EDIT_TAGS = [[], ["visualeditor"], ["mobile edit", "mobile web edit"]]
+
+# Content of a page before its first edit
+_EMPTY_SHA1 = hashlib.sha1(b"").hexdigest()
+
+
+def _zipf_cum_weights(n: int, exponent: float) -> List[float]:
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+def iter_changes(
+    n: int,
+    seed: int = 0,
+    edits_per_second: float = 2.0,
+    revert_ratio: float = 0.1,
+    vandalism_share: float = 0.3,
+    hot_article_skew: float = 1.1,
+    silent_revert_share: float = 0.0,
+    n_articles: int = 50_000,
+    n_users: int = 20_000,
+    start: datetime = datetime(2025, 1, 1)
+) -> Iterator[Dict]:
+    """
+    Yield `n` synthetic recent changes in time order.
+
+    Args:
+        n (int): Number of changes
+        seed (int): Random seed
+        edits_per_second (float): Mean edit rate
+        revert_ratio (float): Share of changes that are reverts
+        vandalism_share (float): Share of reverts that revert vandalism
+        hot_article_skew (float): Zipf exponent of article popularity
+                                  (0 = uniform)
+        silent_revert_share (float): Share of content reverts made
+                                     without a summary or tags
+        n_articles (int): Distinct articles
+        n_users (int): Distinct users
+        start (datetime): Time of the first change (UTC)
+
+    Yields:
+        Dict: recentchanges-shaped change
+    """
+
+    rng = random.Random(seed)
+    article_weights = _zipf_cum_weights(n_articles, hot_article_skew)
+    total_weight = article_weights[-1]
+
+    # article -> (last revid, last editor, editor before that,
+    #             content sha1, sha1 before the last edit)
+    last_edit = {}
+    elapsed = 0.0
+
+    for i in range(1, n + 1):
+        elapsed += rng.expovariate(edits_per_second)
+        article = bisect.bisect_left(article_weights, rng.random() * total_weight)
+        title = f"Article {article}"
+        previous = last_edit.get(article)
+
+        comment = rng.choice(EDIT_SUMMARIES)
+        tags = rng.choice(EDIT_TAGS)
+        user = f"User{rng.randrange(n_users)}"
+        sha1 = hashlib.sha1(f"{article}:{i}".encode()).hexdigest()
+
+        if previous is not None and rng.random() < revert_ratio:
+            old_revid, target, earlier, _, sha1 = previous
+            if rng.random() < vandalism_share:
+                template = rng.choice(VANDALISM_SUMMARIES)
+                tags = ["mw-rollback"] if rng.random() < 0.5 else []
+            else:
+                template = rng.choice(REVERT_SUMMARIES)
+                tags = ["mw-undo"] if template.startswith("Undid") else []
+                # Edit wars: whoever was reverted tends to revert back
+                if earlier is not None and earlier != target:
+                    user = earlier
+            comment = template.format(old=old_revid, target=target)
+            if silent_revert_share and not tags and rng.random() < silent_revert_share:
+                comment = ""
+
+        last_edit[article] = (
+            i, user, previous[1] if previous else None, sha1, previous[3] if previous else _EMPTY_SHA1
+        )
+
+        yield {
+            "type": "edit",
+            "ns": 0,
+            "title": title,
+            "user": user,
+            "rcid": i,
+            "revid": i,
+            "old_revid": previous[0] if previous else 0,
+            "timestamp": (start + timedelta(seconds=elapsed)).strftime(MW_TIMESTAMP_FORMAT),
+            "comment": comment,
+            "tags": tags,
+            "sha1": sha1,
+        }
+
+
+def generate_changes(n: int, seed: int = 0, **kwargs) -> List[Dict]:
+    """List form of iter_changes()."""
+    return list(iter_changes(n, seed=seed, **kwargs))
+
+
+def _base36(value: int) -> str:
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    out = ""
+    while value:
+        value, rem = divmod(value, 36)
+        out = digits[rem] + out
+    return out.rjust(31, "0")
+
+
+def write_xml_dump(changes: List[Dict], path: str, base: str = "https://en.wikipedia.org/wiki/Main_Page"):
+    """
+    Write changes as a stub-meta-history XML dump (.bz2/.gz by extension).
+
+    Revisions are grouped by page, oldest first, as in real dumps.
+    """
+
+    pages = {}
+    for c in changes:
+        pages.setdefault(c["title"], []).append(c)
+
+    if path.endswith(".bz2"):
+        f = bz2.open(path, "wt", encoding="utf-8")
+    elif path.endswith(".gz"):
+        f = gzip.open(path, "wt", encoding="utf-8")
+    else:
+        f = open(path, "w", encoding="utf-8")
+
+    with f:
+        f.write(
+            '<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.11/" version="0.11">\n'
+            f"  <siteinfo>\n    <base>{escape(base)}</base>\n  </siteinfo>\n"
+        )
+        for page_id, (title, revisions) in enumerate(pages.items(), start=1):
+            f.write(f"  <page>\n    <title>{escape(title)}</title>\n    <ns>0</ns>\n    <id>{page_id}</id>\n")
+            for c in sorted(revisions, key=lambda c: c["revid"]):
+                sha1 = _base36(int(c["sha1"], 16))
+                f.write(f"    <revision>\n      <id>{c['revid']}</id>\n")
+                if c["old_revid"]:
+                    f.write(f"      <parentid>{c['old_revid']}</parentid>\n")
+                f.write(
+                    f"      <timestamp>{c['timestamp']}</timestamp>\n"
+                    f"      <contributor>\n        <username>{escape(c['user'])}</username>\n"
+                    f"        <id>1</id>\n      </contributor>\n"
+                    f"      <comment>{escape(c['comment'])}</comment>\n"
+                    f"      <model>wikitext</model>\n      <format>text/x-wiki</format>\n"
+                    f'      <text bytes="100" sha1="{sha1}" location="tt:{c["revid"]}" id="{c["revid"]}" />\n'
+                    f"      <sha1>{sha1}</sha1>\n"
+                    f"    </revision>\n"
+                )
+            f.write("  </page>\n")
+        f.write("</mediawiki>\n")
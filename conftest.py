@@ -0,0 +1,20 @@
+import pyarrow as pa
+
+from src.db.duckdb_client import DuckDBClient
+from src.db.revert_writer import RevertWriter
+
+COLUMNS = ("article", "user", "revid", "timestamp", "is_vandalism")
+
+
+def insert_reverts(con, rows, wiki=None):
+    """Write (article, user, revid, timestamp, is_vandalism) revert rows through the writer.
+
+    Args:
+        con: DuckDB connection holding the schema.
+        rows: Revert tuples in COLUMNS order.
+        wiki: Wiki id (API host, e.g. en.wikipedia.org) for every row; omitted when None.
+    """
+    columns = {name: list(values) for name, values in zip(COLUMNS, zip(*rows))}
+    if wiki is not None:
+        columns["wiki"] = [wiki] * len(rows)
+    RevertWriter(DuckDBClient(None, con=con)).write_batch(pa.table(columns))
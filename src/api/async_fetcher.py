@@ -0,0 +1,236 @@
+"""
+async_fetcher.py
+
+Concurrent recent-changes fetching across several wikis.
+
+All wikis are polled at once over one shared aiohttp session whose
+connector keeps connections alive and caps concurrency per host.
+Each change is tagged with the wiki it came from.
+
+Changes are streamed page by page as they arrive from any wiki
+(WikiPoller.iter_pages()), like fetcher.iter_recent_changes() does for a
+single wiki. The caller can persist each page and advance that wiki's
+cursor before the next one is fetched.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+
+from src.api.fetcher import HEADERS, _drop_consumed, _paged_rc_params, wiki_id
+from src.config import HTTP_MAX_CONNECTIONS, HTTP_PER_HOST_LIMIT
+from src.utils.logger import get_logger
+from src.utils.metrics import METRICS
+
+logger = get_logger("async_fetcher")
+
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+
+def create_session(
+    max_connections: int = HTTP_MAX_CONNECTIONS,
+    per_host_limit: int = HTTP_PER_HOST_LIMIT
+) -> aiohttp.ClientSession:
+    """
+    Create the shared keep-alive session pool.
+
+    Must be called from inside a running event loop.
+    """
+
+    connector = aiohttp.TCPConnector(
+        limit=max_connections,
+        limit_per_host=per_host_limit,
+        keepalive_timeout=60
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers=HEADERS,
+        timeout=REQUEST_TIMEOUT
+    )
+
+
+async def iter_wiki_changes(
+    session: aiohttp.ClientSession,
+    api_url: str,
+    limit: int = 500,
+    namespace: Optional[int] = 0,
+    start: Optional[datetime] = None,
+    after_rcid: Optional[int] = None
+) -> AsyncIterator[List[Dict]]:
+    """
+    Stream one wiki's recent changes since `start` page by page, following rccontinue.
+
+    Yields:
+        List[Dict]: One page of recent change records, each tagged with
+                    its "wiki".
+
+    Stops early (after logging) on request or parse errors, so callers that
+    persist a cursor per page can simply resume on the next run.
+    """
+
+    wiki = wiki_id(api_url)
+    params = _paged_rc_params(limit, namespace, start, None)
+    total = 0
+
+    try:
+        while True:
+            async with session.get(api_url, params=params) as response:
+                response.raise_for_status()
+                body = await response.read()
+            METRICS.inc("api_requests", wiki=wiki)
+            METRICS.inc("api_response_bytes", len(body), wiki=wiki)
+            data = json.loads(body)
+
+            if "query" not in data or "recentchanges" not in data["query"]:
+                logger.error(f"Unexpected API response structure from {wiki}: {data}")
+                break
+
+            changes = _drop_consumed(data["query"]["recentchanges"], params, after_rcid)
+            for c in changes:
+                c["wiki"] = wiki
+
+            total += len(changes)
+            if changes:
+                yield changes
+
+            if "continue" not in data:
+                break
+
+            params.update(data["continue"])
+
+    except asyncio.TimeoutError:
+        logger.error(f"Request to {wiki} timed out")
+
+    except aiohttp.ClientError as e:
+        logger.error(f"Request to {wiki} failed: {e}")
+
+    except ValueError as e:
+        logger.error(f"Failed to parse JSON response from {wiki}: {e}")
+
+    logger.info(f"Fetched {total} recent changes from {wiki}")
+
+
+async def _pump_pages(
+    session: aiohttp.ClientSession,
+    api_urls: List[str],
+    cursors: Dict[str, Tuple[Optional[int], Optional[datetime]]],
+    limit: int,
+    namespace: Optional[int],
+    queue: asyncio.Queue
+):
+    """Fetch every wiki concurrently into `queue` as (api_url, page), then None."""
+
+    async def pump(url: str):
+        after_rcid, start = cursors.get(url, (None, None))
+        async for page in iter_wiki_changes(session, url, limit, namespace, start, after_rcid):
+            await queue.put((url, page))
+
+    try:
+        await asyncio.gather(*[pump(url) for url in api_urls])
+    finally:
+        await queue.put(None)
+
+
+class WikiPoller:
+    """
+    Polls several wikis repeatedly over one long-lived event loop and
+    keep-alive session (for the daemon, which would otherwise reconnect
+    on every cycle).
+    """
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        per_host_limit: int = HTTP_PER_HOST_LIMIT
+    ):
+        self.loop = asyncio.new_event_loop()
+        self.session = self.loop.run_until_complete(
+            self._open(max_connections, per_host_limit)
+        )
+
+    @staticmethod
+    async def _open(max_connections: int, per_host_limit: int) -> aiohttp.ClientSession:
+        return create_session(max_connections, per_host_limit)
+
+    def iter_pages(
+        self,
+        api_urls: List[str],
+        cursors: Optional[Dict[str, Tuple[Optional[int], Optional[datetime]]]] = None,
+        limit: int = 500,
+        namespace: Optional[int] = 0
+    ) -> Iterator[Tuple[str, List[Dict]]]:
+        """
+        Poll several wikis concurrently, streaming their pages as they arrive.
+
+        Fetching runs while the caller waits for the next page. At most one
+        page per wiki is held back, so memory stays bounded however far
+        behind a wiki is. A wiki's pages come in order, so the caller can
+        persist that wiki's cursor after each one.
+
+        Args:
+            api_urls (List[str]): API endpoints to poll.
+            cursors (Dict): Per-URL (after_rcid, start) bounds.
+            limit (int): Page size per request.
+            namespace (int | None): Namespace to filter (None = all).
+
+        Yields:
+            Tuple[str, List[Dict]]: (api_url, page of recent changes)
+        """
+
+        queue = asyncio.Queue(maxsize=len(api_urls))
+        pumping = self.loop.create_task(
+            _pump_pages(self.session, api_urls, cursors or {}, limit, namespace, queue)
+        )
+
+        try:
+            while True:
+                item = self.loop.run_until_complete(queue.get())
+                if item is None:
+                    break
+                yield item
+            self.loop.run_until_complete(pumping)
+        finally:
+            if not pumping.done():
+                pumping.cancel()
+                self.loop.run_until_complete(asyncio.gather(pumping, return_exceptions=True))
+
+    def close(self):
+        self.loop.run_until_complete(self.session.close())
+        self.loop.close()
+
+
+def iter_all_wikis(
+    api_urls: List[str],
+    cursors: Optional[Dict[str, Tuple[Optional[int], Optional[datetime]]]] = None,
+    limit: int = 500,
+    namespace: Optional[int] = 0
+) -> Iterator[Tuple[str, List[Dict]]]:
+    """WikiPoller.iter_pages() on a poller opened (and closed) for this call."""
+
+    poller = WikiPoller()
+    try:
+        yield from poller.iter_pages(api_urls, cursors=cursors, limit=limit, namespace=namespace)
+    finally:
+        poller.close()
+
+
+def fetch_all_wikis(
+    api_urls: List[str],
+    cursors: Optional[Dict[str, Tuple[Optional[int], Optional[datetime]]]] = None,
+    limit: int = 500,
+    namespace: Optional[int] = 0
+) -> Dict[str, List[Dict]]:
+    """
+    Poll several wikis concurrently and collect all their changes.
+
+    Returns:
+        Dict[str, List[Dict]]: Changes per API URL.
+    """
+
+    changes = {url: [] for url in api_urls}
+    for url, page in iter_all_wikis(api_urls, cursors=cursors, limit=limit, namespace=namespace):
+        changes[url].extend(page)
+    return changes
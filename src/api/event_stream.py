@@ -0,0 +1,222 @@
+"""
+event_stream.py
+
+Streaming ingestion of recent changes from a Server-Sent-Events feed
+(Wikimedia EventStreams `recentchange`).
+
+This module:
+- Parses the SSE wire format
+- Reconnects with Last-Event-ID so no events are lost on disconnect
+- Filters events the same way as the polling fetcher (namespace, !bot),
+  keeping the configured wikis only (EVENTSTREAM_WIKIS)
+- Maps events onto the list=recentchanges record shape, tagged with their
+  "wiki" in the pollers' form (the API host, see fetcher.wiki_id())
+
+No detection logic here.
+No DB access here.
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Collection, Dict, Iterator, Optional, Tuple
+
+import requests
+
+from src.api.fetcher import HEADERS, MW_TIMESTAMP_FORMAT
+from src.config import EVENTSTREAM_READ_TIMEOUT, EVENTSTREAM_URL, EVENTSTREAM_WIKIS
+from src.utils.logger import get_logger
+
+logger = get_logger("event_stream")
+
+# Only these recentchange types carry a revision that can be a revert
+EDIT_TYPES = ("edit", "new")
+
+
+def iter_sse_events(
+    url: str = EVENTSTREAM_URL,
+    last_event_id: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    retry_seconds: float = 3.0,
+    max_reconnects: Optional[int] = None,
+    stop: Optional[threading.Event] = None
+) -> Iterator[Tuple[Optional[str], Dict]]:
+    """
+    Consume an SSE feed, reconnecting on disconnect.
+
+    Args:
+        url (str): SSE endpoint.
+        last_event_id (str | None): Resume after this event id.
+        session (requests.Session | None): Session to reuse connections with.
+        retry_seconds (float): Delay before reconnecting; the server may
+                               override it with a `retry:` field.
+        max_reconnects (int | None): Give up after this many reconnects.
+                                     None means reconnect forever.
+        stop (threading.Event | None): End the feed once set; checked
+                                       between lines, so a quiet stream
+                                       notices within EVENTSTREAM_READ_TIMEOUT.
+
+    Yields:
+        (event_id, payload): Event id (or None) and decoded JSON data.
+    """
+
+    http = session or requests.Session()
+    reconnects = 0
+
+    def stopped():
+        return stop is not None and stop.is_set()
+
+    try:
+        while not stopped():
+            headers = dict(HEADERS, Accept="text/event-stream")
+            if last_event_id:
+                headers["Last-Event-ID"] = last_event_id
+
+            try:
+                logger.info("Connecting to event stream %s", url)
+                with http.get(url, headers=headers, stream=True, timeout=(15, EVENTSTREAM_READ_TIMEOUT)) as response:
+                    response.raise_for_status()
+
+                    event_id = None
+                    data_lines = []
+
+                    for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                        if stopped():
+                            break
+                        if line is None:
+                            continue
+
+                        # Blank line dispatches the buffered event
+                        if line == "":
+                            if data_lines:
+                                if event_id is not None:
+                                    last_event_id = event_id
+                                try:
+                                    payload = json.loads("\n".join(data_lines))
+                                except ValueError as e:
+                                    logger.error(f"Failed to parse event data: {e}")
+                                else:
+                                    yield last_event_id, payload
+                            event_id = None
+                            data_lines = []
+                            continue
+
+                        if line.startswith(":"):
+                            continue  # comment / heartbeat
+
+                        field, _, value = line.partition(":")
+                        if value.startswith(" "):
+                            value = value[1:]
+
+                        if field == "data":
+                            data_lines.append(value)
+                        elif field == "id":
+                            event_id = value
+                        elif field == "retry" and value.isdigit():
+                            retry_seconds = int(value) / 1000
+
+                if not stopped():
+                    logger.warning("Event stream closed by server")
+
+            except requests.exceptions.RequestException as e:
+                if not stopped():
+                    logger.error(f"Event stream connection failed: {e}")
+
+            if stopped():
+                logger.info("Event stream stopped")
+                return
+
+            if max_reconnects is not None and reconnects >= max_reconnects:
+                logger.info("Giving up on event stream after %d reconnects", reconnects)
+                return
+
+            reconnects += 1
+            if stop is not None:
+                stop.wait(retry_seconds)
+            else:
+                time.sleep(retry_seconds)
+
+    finally:
+        if session is None:
+            http.close()
+
+
+def to_recent_change(
+    event: Dict,
+    namespace: Optional[int] = 0,
+    wikis: Optional[Collection[str]] = EVENTSTREAM_WIKIS
+) -> Optional[Dict]:
+    """
+    Filter a recentchange event and map it onto a list=recentchanges record.
+
+    Args:
+        event (Dict): Decoded EventStreams recentchange event.
+        namespace (int | None): Namespace to keep (None = all).
+        wikis (Collection[str] | None): Wikis to keep, by host (e.g.
+                                        "en.wikipedia.org") or database
+                                        name (e.g. "enwiki"); empty or
+                                        None = all.
+
+    Returns:
+        Dict | None: Recent change record, or None if the event is filtered out.
+    """
+
+    if event.get("type") not in EDIT_TYPES:
+        return None
+    if event.get("bot"):
+        return None
+    if namespace is not None and event.get("namespace") != namespace:
+        return None
+    if wikis and event.get("server_name") not in wikis and event.get("wiki") not in wikis:
+        return None
+
+    revision = event.get("revision") or {}
+    timestamp = datetime.fromtimestamp(event.get("timestamp", 0), tz=timezone.utc)
+
+    return {
+        # The host, as fetcher.wiki_id() identifies the polled wikis
+        "wiki": event.get("server_name"),
+        "type": event.get("type"),
+        "ns": event.get("namespace"),
+        "title": event.get("title"),
+        "rcid": event.get("id"),
+        "revid": revision.get("new"),
+        "old_revid": revision.get("old") or 0,
+        "user": event.get("user"),
+        "timestamp": timestamp.strftime(MW_TIMESTAMP_FORMAT),
+        "comment": event.get("comment", ""),
+        "tags": event.get("tags", []),
+    }
+
+
+def stream_recent_changes(
+    url: str = EVENTSTREAM_URL,
+    namespace: Optional[int] = 0,
+    wikis: Optional[Collection[str]] = EVENTSTREAM_WIKIS,
+    last_event_id: Optional[str] = None,
+    session: Optional[requests.Session] = None,
+    retry_seconds: float = 3.0,
+    max_reconnects: Optional[int] = None,
+    stop: Optional[threading.Event] = None
+) -> Iterator[Tuple[Optional[str], Dict]]:
+    """
+    Stream filtered recent changes from an SSE feed.
+
+    Yields:
+        (event_id, change): Stream position and recent change record.
+    """
+
+    events = iter_sse_events(
+        url,
+        last_event_id=last_event_id,
+        session=session,
+        retry_seconds=retry_seconds,
+        max_reconnects=max_reconnects,
+        stop=stop
+    )
+
+    for event_id, event in events:
+        change = to_recent_change(event, namespace=namespace, wikis=wikis)
+        if change is not None:
+            yield event_id, change
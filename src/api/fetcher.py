@@ -1,6 +1,9 @@
 import requests
-from typing import List, Dict, Optional
+from datetime import datetime
+from urllib.parse import urlsplit
+from typing import List, Dict, Iterator, Optional, Union
 from src.utils.logger import get_logger
+from src.utils.metrics import METRICS
 from src.config import WIKI_API_URL
 from src.config import BOT_CONTACT
 
@@ -11,7 +14,74 @@ HEADERS = {
     "User-Agent": f"EditWarCatcherBot/0.1 (contact: {BOT_CONTACT})"
 }
 
-DEFAULT_RC_PROPS = "title|ids|timestamp|user|comment|tags|flags"
+DEFAULT_RC_PROPS = "title|ids|timestamp|user|comment|tags|flags|sha1"
+
+MW_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def _format_mw_timestamp(ts: Union[datetime, str]) -> str:
+    """Format a timestamp the way the MediaWiki API returns and accepts it."""
+    if isinstance(ts, datetime):
+        return ts.strftime(MW_TIMESTAMP_FORMAT)
+    return ts
+
+
+def wiki_id(api_url: str) -> str:
+    """Identify a wiki by its API host, e.g. 'en.wikipedia.org'."""
+    return urlsplit(api_url).netloc
+
+
+def _rc_params(limit: int, namespace: Optional[int]) -> Dict:
+    """Base query parameters for list=recentchanges."""
+
+    params = {
+        "action": "query",
+        "format": "json",
+        "list": "recentchanges",
+        "rclimit": limit,
+        "rcprop": DEFAULT_RC_PROPS,
+        "rcshow": "!bot",  # exclude bot edits initially
+    }
+
+    if namespace is not None:
+        params["rcnamespace"] = namespace
+
+    return params
+
+
+def _paged_rc_params(
+    limit: int,
+    namespace: Optional[int],
+    start: Optional[Union[datetime, str]],
+    end: Optional[Union[datetime, str]]
+) -> Dict:
+    """Query parameters for an oldest-first, bounded recentchanges walk."""
+
+    params = _rc_params(limit, namespace)
+    params["rcdir"] = "newer"
+
+    if start is not None:
+        params["rcstart"] = _format_mw_timestamp(start)
+    if end is not None:
+        params["rcend"] = _format_mw_timestamp(end)
+
+    return params
+
+
+def _drop_consumed(changes: List[Dict], params: Dict, after_rcid: Optional[int]) -> List[Dict]:
+    """
+    rcstart is inclusive: drop the changes at the start timestamp that
+    a previous run already consumed (rcid <= after_rcid).
+    """
+
+    start_ts = params.get("rcstart")
+    if after_rcid is None or start_ts is None:
+        return changes
+
+    return [
+        c for c in changes
+        if not (c.get("timestamp") == start_ts and c.get("rcid", 0) <= after_rcid)
+    ]
 
 
 def fetch_recent_changes(
@@ -30,17 +100,7 @@ def fetch_recent_changes(
         List[Dict]: List of recent change records.
     """
 
-    params = {
-        "action": "query",
-        "format": "json",
-        "list": "recentchanges",
-        "rclimit": limit,
-        "rcprop": DEFAULT_RC_PROPS,
-        "rcshow": "!bot",  # exclude bot edits initially
-    }
-
-    if namespace is not None:
-        params["rcnamespace"] = namespace
+    params = _rc_params(limit, namespace)
 
     try:
         logger.info("Fetching recent changes from Wikipedia API")
@@ -78,3 +138,98 @@ def fetch_recent_changes(
     except ValueError as e:
         logger.error(f"Failed to parse JSON response: {e}")
         return []
+
+
+def iter_recent_changes(
+    limit: int = 500,
+    namespace: Optional[int] = 0,
+    start: Optional[Union[datetime, str]] = None,
+    end: Optional[Union[datetime, str]] = None,
+    after_rcid: Optional[int] = None,
+    api_url: Optional[str] = None,
+    session: Optional[requests.Session] = None
+) -> Iterator[List[Dict]]:
+    """
+    Stream recent changes page by page, oldest first, following rccontinue.
+
+    Args:
+        limit (int): Page size (max 500 for bots).
+        namespace (int | None): Namespace to filter (0 = articles).
+                                 None means all namespaces.
+        start (datetime | str | None): Oldest timestamp to fetch (rcstart).
+        end (datetime | str | None): Newest timestamp to fetch (rcend).
+        after_rcid (int | None): rcid of the last change already consumed
+                                 at `start`; changes at that timestamp up to
+                                 and including it are skipped.
+        api_url (str | None): API endpoint, defaults to WIKI_API_URL.
+        session (requests.Session | None): Session to reuse connections with.
+
+    Yields:
+        List[Dict]: One page of recent change records, each tagged with
+                    its "wiki".
+
+    Stops early (after logging) on request or parse errors, so callers that
+    persist a cursor per page can simply resume on the next run.
+    """
+
+    api_url = api_url or WIKI_API_URL
+    wiki = wiki_id(api_url)
+    http = session or requests.Session()
+
+    params = _paged_rc_params(limit, namespace, start, end)
+
+    pages = 0
+    total = 0
+
+    try:
+        while True:
+            response = http.get(
+                api_url,
+                params=params,
+                headers=HEADERS,
+                timeout=15
+            )
+            response.raise_for_status()
+            if METRICS.enabled:
+                METRICS.inc("api_requests", wiki=wiki)
+                METRICS.inc("api_response_bytes", len(response.content), wiki=wiki)
+
+            data = response.json()
+
+            if "query" not in data or "recentchanges" not in data["query"]:
+                logger.error(f"Unexpected API response structure: {data}")
+                return
+
+            changes = _drop_consumed(data["query"]["recentchanges"], params, after_rcid)
+
+            for c in changes:
+                c["wiki"] = wiki
+
+            pages += 1
+            total += len(changes)
+
+            if changes:
+                yield changes
+
+            if "continue" not in data:
+                break
+
+            params.update(data["continue"])
+
+        logger.info(f"Fetched {total} recent changes in {pages} pages")
+
+    except requests.exceptions.Timeout:
+        logger.error("Request to Wikipedia API timed out")
+
+    except requests.exceptions.HTTPError as e:
+        logger.error(f"HTTP error while fetching recent changes: {e}")
+
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Request failed: {e}")
+
+    except ValueError as e:
+        logger.error(f"Failed to parse JSON response: {e}")
+
+    finally:
+        if session is None:
+            http.close()
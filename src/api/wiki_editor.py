@@ -0,0 +1,151 @@
+"""
+wiki_editor.py
+
+Minimal MediaWiki edit client (action=edit) over a keep-alive requests
+session, logged in with a bot password.
+
+Edits are sent with maxlag, so the bot backs off whenever the wiki's
+replicas lag. Throttling responses (maxlag, ratelimited, HTTP 429/503)
+raise Throttled with the wait the server asked for (Retry-After); other
+API errors raise EditError.
+"""
+
+from typing import Dict, Optional
+
+import requests
+
+from src.api.fetcher import HEADERS
+from src.config import BOT_PASSWORD, BOT_USERNAME, PUBLISH_MAXLAG, WIKI_API_URL
+from src.utils.logger import get_logger
+
+logger = get_logger("wiki_editor")
+
+# Wait used when a throttling response carries no Retry-After
+DEFAULT_RETRY_AFTER = 5.0
+
+
+class EditError(Exception):
+    """The wiki rejected an edit."""
+
+    def __init__(self, code: str, info: str = ""):
+        super().__init__(f"{code}: {info}" if info else code)
+        self.code = code
+
+
+class Throttled(EditError):
+    """The wiki asked us to slow down; retry after `retry_after` seconds."""
+
+    def __init__(self, code: str, retry_after: float, info: str = ""):
+        super().__init__(code, info)
+        self.retry_after = retry_after
+
+
+def _retry_after(response: requests.Response) -> float:
+    try:
+        return float(response.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+    except ValueError:
+        return DEFAULT_RETRY_AFTER
+
+
+class WikiEditor:
+    def __init__(
+        self,
+        api_url: str = WIKI_API_URL,
+        username: Optional[str] = BOT_USERNAME,
+        password: Optional[str] = BOT_PASSWORD,
+        session: Optional[requests.Session] = None,
+        maxlag: int = PUBLISH_MAXLAG
+    ):
+        self.api_url = api_url
+        self.username = username
+        self.password = password
+        self.maxlag = maxlag
+        self.session = session or requests.Session()
+        self.session.headers.update(HEADERS)
+        self._csrf_token = None
+
+    def _call(self, method: str, **params) -> Dict:
+        params["format"] = "json"
+        if method == "GET":
+            response = self.session.get(self.api_url, params=params, timeout=30)
+        else:
+            response = self.session.post(self.api_url, data=params, timeout=30)
+
+        if response.status_code in (429, 503):
+            raise Throttled(f"http{response.status_code}", _retry_after(response))
+        response.raise_for_status()
+
+        data = response.json()
+        error = data.get("error")
+        if error:
+            code = error.get("code", "unknown")
+            if code in ("maxlag", "ratelimited"):
+                raise Throttled(code, _retry_after(response), error.get("info", ""))
+            raise EditError(code, error.get("info", ""))
+        return data
+
+    def login(self):
+        """Log in with the bot password (skipped when no username is configured)."""
+
+        if self.username:
+            token = self._call("GET", action="query", meta="tokens", type="login")
+            result = self._call(
+                "POST",
+                action="login",
+                lgname=self.username,
+                lgpassword=self.password,
+                lgtoken=token["query"]["tokens"]["logintoken"]
+            )["login"]
+            if result.get("result") != "Success":
+                raise EditError("loginfailed", result.get("reason", ""))
+            logger.info("Logged in to %s as %s", self.api_url, self.username)
+
+        self._csrf_token = self._call("GET", action="query", meta="tokens")["query"]["tokens"]["csrftoken"]
+
+    def edit(self, title: str, text: str, summary: str) -> Dict:
+        """
+        Replace the content of a page.
+
+        Args:
+            title (str): Page title
+            text (str): New WikiText
+            summary (str): Edit summary
+
+        Returns:
+            Dict: The API's edit result (result, newrevid / nochange, ...)
+
+        Raises:
+            Throttled: The wiki asked to retry later
+            EditError: The edit was rejected
+        """
+
+        if self._csrf_token is None:
+            self.login()
+
+        params = {
+            "action": "edit",
+            "title": title,
+            "text": text,
+            "summary": summary,
+            "bot": 1,
+            "maxlag": self.maxlag,
+        }
+        if self.username:
+            params["assert"] = "user"
+
+        try:
+            result = self._call("POST", token=self._csrf_token, **params)
+        except EditError as e:
+            if isinstance(e, Throttled) or e.code not in ("badtoken", "assertuserfailed"):
+                raise
+            # Session expired: log in again once
+            self.login()
+            result = self._call("POST", token=self._csrf_token, **params)
+
+        edit = result["edit"]
+        if edit.get("result") != "Success":
+            raise EditError("editfailed", str(edit))
+        return edit
+
+    def close(self):
+        self.session.close()
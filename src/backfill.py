@@ -0,0 +1,241 @@
+"""
+backfill.py
+
+Historical backfill of revert_events from MediaWiki XML dumps.
+
+Each dump shard (e.g. the enwiki-*-stub-meta-history*.xml.gz files) is
+handled by its own worker process: it streams the shard with
+dump_reader, classifies revisions in batches of BACKFILL_BATCH_SIZE with
+the same classify_table() used for live ingestion, also flags identity
+reverts by content hash (dumps keep a page's revisions together, so a
+small in-memory index suffices), and spills the reverts to a Parquet file.
+The parent, the only DuckDB writer, bulk-loads each spill file as its
+shard finishes, interning article and user names in SQL on the way;
+rows already stored are skipped, so re-running a backfill is safe.
+Once every shard is loaded, consolidated groups are brought up to date.
+
+Dumps carry no change tags and no bot flag, so tag-only reverts are
+missed and bot edits are included, unlike the live fetch.
+
+Usage:
+    python -m src.backfill DUMP [DUMP ...] [--workers N] [--wiki ID]
+                                           [--namespace NS ...]
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import islice
+from typing import Dict, List, Optional, Set
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.api.dump_reader import iter_dump_revisions
+from src.config import BACKFILL_BATCH_SIZE, BACKFILL_WORKERS, DUCKDB_PATH
+from src.db.dimensions import encoded_select, intern_from_sql
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import revert_table
+from src.detection.consolidation import update_consolidated_reverts
+from src.detection.identity_revert_index import IdentityRevertIndex, mark_identity_reverts
+from src.detection.revert_detector import RECENT_CHANGE_SCHEMA, classify_table
+from src.utils.logger import get_logger
+
+logger = get_logger("backfill")
+
+# Pages are contiguous in a dump, so only the current one needs indexing
+_SHARD_INDEX_ARTICLES = 16
+
+REVERT_COLUMNS = ["wiki", "article", "user", "revid", "old_revid", "timestamp", "is_vandalism", "comment"]
+
+# Stored as is; article and user become ids
+_STORED_COLUMNS = [c for c in REVERT_COLUMNS if c not in ("article", "user")]
+
+
+def classify_dump(
+    path: str,
+    out_path: str,
+    wiki: Optional[str] = None,
+    namespaces: Optional[Set[int]] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE
+) -> Dict:
+    """
+    Classify every revision of one dump shard and write its reverts to Parquet.
+
+    Args:
+        path (str): Dump shard
+        out_path (str): Parquet file for the reverts
+        wiki (str | None): Wiki id; taken from the dump if omitted
+        namespaces (Set[int] | None): Only classify these namespaces
+        batch_size (int): Revisions classified at a time
+
+    Returns:
+        Dict: path, revisions, reverts and seconds
+    """
+
+    start = time.perf_counter()
+    revisions = iter_dump_revisions(path, wiki=wiki, namespaces=namespaces)
+    index = IdentityRevertIndex(max_articles=_SHARD_INDEX_ARTICLES)
+
+    revision_count = 0
+    revert_count = 0
+    writer = None
+
+    try:
+        while True:
+            batch = list(islice(revisions, batch_size))
+            if not batch:
+                break
+            revision_count += len(batch)
+
+            classified = classify_table(pa.Table.from_pylist(batch, schema=RECENT_CHANGE_SCHEMA))
+            classified = mark_identity_reverts(classified, index.observe_page(batch))
+            reverts = revert_table(classified)
+
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, reverts.schema)
+            writer.write_table(reverts)
+            revert_count += reverts.num_rows
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {
+        "path": path,
+        "revisions": revision_count,
+        "reverts": revert_count,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def _load_spill(db: DuckDBClient, out_path: str) -> int:
+    source = "SELECT * FROM read_parquet(?)"
+    intern_from_sql(db, source, [out_path])
+
+    columns = ", ".join(f'"{c}"' for c in ["article_id", "user_id"] + _STORED_COLUMNS)
+    return db.execute(
+        f"""
+        INSERT INTO revert_events ({columns})
+        {encoded_select(source, _STORED_COLUMNS)}
+        ON CONFLICT DO NOTHING
+        """,
+        [out_path]
+    ).fetchone()[0]
+
+
+def backfill(
+    paths: List[str],
+    db: Optional[DuckDBClient] = None,
+    workers: int = BACKFILL_WORKERS,
+    wiki: Optional[str] = None,
+    namespaces: Optional[Set[int]] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE
+) -> Dict:
+    """
+    Load the reverts of one or more dump shards into revert_events.
+
+    Args:
+        paths (List[str]): Dump shards
+        db (DuckDBClient | None): Target database; DUCKDB_PATH if omitted
+        workers (int): Parser processes; 0 = one per CPU (never more than shards)
+        wiki (str | None): Wiki id; taken from each dump if omitted
+        namespaces (Set[int] | None): Only backfill these namespaces
+        batch_size (int): Revisions classified at a time per worker
+
+    Returns:
+        Dict: revisions, reverts (found), inserted (new rows), seconds and
+              revisions_per_second
+    """
+
+    workers = min(workers or os.cpu_count() or 1, len(paths)) or 1
+    spill_dir = tempfile.mkdtemp(prefix="editwar-backfill-")
+    start = time.perf_counter()
+    totals = {"revisions": 0, "reverts": 0, "inserted": 0}
+
+    logger.info("Backfilling %d dump file(s) with %d worker(s)", len(paths), workers)
+
+    try:
+        with borrow_client(db, DUCKDB_PATH) as db:
+            db.execute(SCHEMA)
+
+            # Spawned workers never inherit the parent's DuckDB connection
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                futures = {
+                    pool.submit(
+                        classify_dump,
+                        path,
+                        os.path.join(spill_dir, f"{i}.parquet"),
+                        wiki,
+                        namespaces,
+                        batch_size
+                    ): os.path.join(spill_dir, f"{i}.parquet")
+                    for i, path in enumerate(paths)
+                }
+
+                for future in as_completed(futures):
+                    shard = future.result()
+                    inserted = _load_spill(db, futures[future]) if shard["reverts"] else 0
+                    totals["revisions"] += shard["revisions"]
+                    totals["reverts"] += shard["reverts"]
+                    totals["inserted"] += inserted
+                    logger.info(
+                        "%s: %d revisions (%.0f/s), %d reverts, %d new",
+                        shard["path"],
+                        shard["revisions"],
+                        shard["revisions"] / shard["seconds"] if shard["seconds"] else 0,
+                        shard["reverts"],
+                        inserted
+                    )
+
+            if totals["inserted"]:
+                update_consolidated_reverts(db)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+
+    seconds = time.perf_counter() - start
+    totals["seconds"] = seconds
+    totals["revisions_per_second"] = totals["revisions"] / seconds if seconds else 0.0
+
+    logger.info(
+        "Backfill done: %d revisions in %.1fs (%.0f revisions/s), %d reverts, %d new",
+        totals["revisions"],
+        seconds,
+        totals["revisions_per_second"],
+        totals["reverts"],
+        totals["inserted"]
+    )
+    return totals
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill revert events from XML dumps")
+    parser.add_argument("dumps", nargs="+", help="dump shards (.xml, .xml.bz2, .xml.gz)")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=BACKFILL_WORKERS,
+        help="parser processes (0 = one per CPU)"
+    )
+    parser.add_argument("--wiki", help="wiki id, e.g. en.wikipedia.org (default: from the dump)")
+    parser.add_argument(
+        "--namespace",
+        type=int,
+        action="append",
+        help="only backfill this namespace (repeatable; default: all)"
+    )
+    args = parser.parse_args()
+
+    backfill(
+        args.dumps,
+        workers=args.workers,
+        wiki=args.wiki,
+        namespaces=set(args.namespace) if args.namespace else None
+    )
@@ -0,0 +1,191 @@
+"""
+cli.py
+
+Command-line interface for EditWarCatcherBot.
+
+Subcommands:
+- init-db: create (or migrate) the DuckDB schema
+- fetch:   ingest recent changes and persist their reverts, no detection
+- detect:  run detection over the stored reverts and print the counts
+- report:  detect and format (or publish) the report, without fetching
+- run:     the full cycle; --stream / --daemon as for src.main
+- what-if: compare detection thresholds over the stored reverts, all
+           evaluated from one scan
+
+Only typer and the standard library are imported up front. Each command
+imports what it needs (duckdb, pyarrow, requests, the detectors) when it
+runs, so `--help`, `init-db` and cron-style one-shot runs don't pay for
+the modules of the others. Configuration is read on first use of
+src.config, so --db can still set DUCKDB_PATH.
+
+Usage:
+    python -m src.cli [--db PATH] COMMAND [OPTIONS]
+"""
+
+import os
+from contextlib import contextmanager
+from typing import List, Optional
+
+import typer
+
+app = typer.Typer(
+    help="EditWarCatcherBot: detect edit wars from Wikipedia recent changes.",
+    no_args_is_help=True,
+    add_completion=False
+)
+
+
+@app.callback()
+def main(
+    db: Optional[str] = typer.Option(
+        None, "--db", help="DuckDB database file (default: DUCKDB_PATH)"
+    )
+):
+    if db:
+        os.environ["DUCKDB_PATH"] = db
+
+
+@contextmanager
+def _session():
+    """One DuckDB session and one metrics run for a command."""
+
+    from src.config import DUCKDB_PATH
+    from src.db.duckdb_client import DuckDBClient
+    from src.main import shutdown
+    from src.utils.metrics import METRICS
+
+    METRICS.reset()
+    db = DuckDBClient(DUCKDB_PATH)
+    try:
+        yield db
+    finally:
+        METRICS.export()
+        shutdown()
+        db.close()
+
+
+@app.command("init-db")
+def init_db():
+    """Create the database schema, migrating an older one in place."""
+
+    from src.config import DUCKDB_PATH
+    from src.db.duckdb_init import init_db as create_schema
+
+    create_schema(DUCKDB_PATH)
+    typer.echo(f"Initialized {DUCKDB_PATH}")
+
+
+@app.command()
+def fetch():
+    """Fetch recent changes since the stored cursors and persist their reverts."""
+
+    from src.main import ingest
+
+    with _session() as db:
+        fetched = ingest(db)
+    typer.echo(f"Fetched {fetched} recent changes")
+
+
+@app.command()
+def detect():
+    """Detect 3RR violations and mutual revert edit wars in the stored reverts."""
+
+    from src.main import detect as detect_cases
+
+    with _session() as db:
+        three_rr_cases, mutual_cases = detect_cases(db)
+    typer.echo(f"{len(three_rr_cases)} 3RR incidents, {len(mutual_cases)} mutual revert edit wars")
+
+
+@app.command()
+def report():
+    """Detect and write the report (REPORT_PATH, stdout or PUBLISH_TARGET)."""
+
+    from src.main import detect as detect_cases, publish_report
+
+    with _session() as db:
+        publish_report(*detect_cases(db), db=db)
+
+
+@app.command("what-if")
+def what_if(
+    window: List[float] = typer.Option([24.0], "--window", help="3RR window in hours (repeatable)"),
+    limit: List[int] = typer.Option([3], "--limit", help="3RR revert limit (repeatable)"),
+    mutual_window: List[float] = typer.Option(
+        [24.0], "--mutual-window", help="mutual revert window in hours (repeatable)"
+    ),
+    min_reverts: List[int] = typer.Option(
+        [2], "--min-reverts", help="reverts each user of a mutual pair needs (repeatable)"
+    ),
+    consolidation: List[float] = typer.Option(
+        [5.0], "--consolidation-minutes", help="consolidation window in minutes (repeatable)"
+    ),
+    wiki: Optional[str] = typer.Option(None, "--wiki", help="only this wiki's reverts, e.g. en.wikipedia.org"),
+    lookback: Optional[float] = typer.Option(
+        None, "--lookback-hours", help="reverts to consider (default: DETECTION_LOOKBACK_HOURS)"
+    )
+):
+    """Count the incidents each combination of thresholds would report."""
+
+    from datetime import datetime, timedelta
+
+    from src.config import DETECTION_LOOKBACK_HOURS
+    from src.detection.detector_config import threshold_grid
+    from src.detection.edit_war_detector import evaluate_grid
+
+    configs = threshold_grid(
+        three_rr_window_hours=window,
+        three_rr_limit=limit,
+        mutual_window_hours=mutual_window,
+        min_reverts_each=min_reverts,
+        consolidation_window_minutes=consolidation
+    )
+    since = datetime.utcnow() - timedelta(hours=DETECTION_LOOKBACK_HOURS if lookback is None else lookback)
+
+    with _session() as db:
+        results = evaluate_grid(configs, db=db, since=since, wiki=wiki)
+
+    typer.echo("3RR window  limit  mutual window  min reverts  consolidation  3RR cases  mutual cases")
+    for config, result in results.items():
+        typer.echo(
+            f"{config.three_rr_window_hours:>9g}h  {config.three_rr_limit:>5}  "
+            f"{config.mutual_window_hours:>12g}h  {config.min_reverts_each:>11}  "
+            f"{config.consolidation_window_minutes:>11g}m  "
+            f"{len(result['three_rr']):>9}  {len(result['mutual']):>12}"
+        )
+
+
+@app.command()
+def run(
+    stream: bool = typer.Option(
+        False, "--stream", help="ingest continuously from the EventStreams feed instead of polling"
+    ),
+    daemon: bool = typer.Option(
+        False,
+        "--daemon",
+        help="keep running: poll every --interval seconds (or, with --stream, "
+             "detect after every ingested batch) until SIGTERM"
+    ),
+    interval: Optional[float] = typer.Option(
+        None, "--interval", help="seconds between polling cycles in daemon mode (default: DAEMON_INTERVAL_SECONDS)"
+    )
+):
+    """Fetch, detect and report (one cycle, a stream, or as a daemon)."""
+
+    if daemon:
+        from src.config import DAEMON_INTERVAL_SECONDS
+        from src.daemon import run_daemon
+
+        run_daemon(interval=DAEMON_INTERVAL_SECONDS if interval is None else interval, stream=stream)
+    elif stream:
+        from src.main import run_stream
+
+        run_stream()
+    else:
+        from src.main import run
+
+        run()
+
+
+if __name__ == "__main__":
+    app()
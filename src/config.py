@@ -1,12 +1,124 @@
-from dotenv import load_dotenv
 import os
+from urllib.parse import urlsplit
 
-load_dotenv()
+
+def _find_dotenv():
+    """Nearest .env above this package, searched like dotenv.find_dotenv() does."""
+
+    path = os.path.dirname(os.path.abspath(__file__))
+    while True:
+        candidate = os.path.join(path, ".env")
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+# python-dotenv is only imported when there is a .env file to load
+_DOTENV_PATH = _find_dotenv()
+if _DOTENV_PATH:
+    from dotenv import load_dotenv
+    load_dotenv(_DOTENV_PATH)
 
 WIKI_API_URL = os.getenv("WIKI_API_URL")
+# Comma-separated list of API endpoints to watch; defaults to WIKI_API_URL
+WIKI_API_URLS = [
+    url.strip()
+    for url in os.getenv("WIKI_API_URLS", WIKI_API_URL or "").split(",")
+    if url.strip()
+]
 BOT_USERNAME = os.getenv("BOT_USERNAME")
 BOT_PASSWORD = os.getenv("BOT_PASSWORD")
 BOT_CONTACT = os.getenv("BOT_CONTACT")
 
 DUCKDB_PATH = os.getenv("DUCKDB_PATH", "editwar.duckdb")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+# Recent changes ingestion
+RC_PAGE_LIMIT = int(os.getenv("RC_PAGE_LIMIT", "500"))
+RC_BOOTSTRAP_HOURS = int(os.getenv("RC_BOOTSTRAP_HOURS", "24"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "2"))
+
+# EventStreams (SSE) ingestion
+EVENTSTREAM_URL = os.getenv("EVENTSTREAM_URL", "https://stream.wikimedia.org/v2/stream/recentchange")
+# Comma-separated wikis to keep from the feed, as API hosts (e.g.
+# en.wikipedia.org, the id the pollers store reverts under) or database
+# names (e.g. enwiki); defaults to the hosts of WIKI_API_URLS, and every
+# wiki is kept if neither is set
+EVENTSTREAM_WIKIS = [
+    wiki.strip()
+    for wiki in os.getenv("EVENTSTREAM_WIKIS", os.getenv("EVENTSTREAM_WIKI", "")).split(",")
+    if wiki.strip()
+] or [urlsplit(url).netloc for url in WIKI_API_URLS]
+# Seconds a quiet stream may block on the socket before it reconnects
+# (and notices a shutdown request)
+EVENTSTREAM_READ_TIMEOUT = float(os.getenv("EVENTSTREAM_READ_TIMEOUT", "15"))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "50"))
+STREAM_FLUSH_SECONDS = float(os.getenv("STREAM_FLUSH_SECONDS", "10"))
+
+# Revert classification: opt in to matching keywords at the start of a
+# word only (so "rv" no longer matches "survey"). Off by default, as it
+# changes which edits count as reverts; reverts already stored are not
+# reclassified
+KEYWORD_WORD_BOUNDARY = os.getenv("KEYWORD_WORD_BOUNDARY", "false").lower() in ("1", "true", "yes")
+
+# Revert storage: detectors only scan the recent look-back; older days are
+# rolled from the hot revert_events table into daily Parquet archive files
+DETECTION_LOOKBACK_HOURS = int(os.getenv("DETECTION_LOOKBACK_HOURS", "48"))
+HOT_RETENTION_DAYS = int(os.getenv("HOT_RETENTION_DAYS", "7"))
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+
+# Streaming mode: in-memory sliding-window detection; the engine keeps state
+# for at most this many (article, user) keys / articles / user pairs each
+STREAM_ENGINE_MAX_KEYS = int(os.getenv("STREAM_ENGINE_MAX_KEYS", "100000"))
+
+# Run metrics: written at the end of each run when enabled
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_TEXTFILE = os.getenv("METRICS_TEXTFILE", "editwar.prom")
+METRICS_SUMMARY_PATH = os.getenv("METRICS_SUMMARY_PATH", "editwar_run.json")
+
+# Daemon mode: seconds between the starts of consecutive polling cycles
+DAEMON_INTERVAL_SECONDS = float(os.getenv("DAEMON_INTERVAL_SECONDS", "60"))
+# and between its archive runs (0 = never; cron `python -m src.db.retention`)
+DAEMON_RETENTION_SECONDS = float(os.getenv("DAEMON_RETENTION_SECONDS", "86400"))
+
+# Identity revert index: recent revision hashes kept per article, and the
+# number of articles kept in memory (least recently edited are dropped first)
+IDENTITY_INDEX_DEPTH = int(os.getenv("IDENTITY_INDEX_DEPTH", "10"))
+IDENTITY_INDEX_MAX_ARTICLES = int(os.getenv("IDENTITY_INDEX_MAX_ARTICLES", "50000"))
+
+# Article and user names whose ids are cached in memory per database
+# connection when writing revert events (least recently used are dropped first)
+NAME_CACHE_SIZE = int(os.getenv("NAME_CACHE_SIZE", "100000"))
+
+# Backfill from XML dumps: parser processes (0 = one per CPU) and revisions
+# classified per batch
+BACKFILL_WORKERS = int(os.getenv("BACKFILL_WORKERS", "0"))
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "50000"))
+
+# Reports: UTF-8 bytes per report page (MediaWiki's default page size limit
+# is 2 MiB), and where to write them (stdout if unset)
+REPORT_PAGE_MAX_BYTES = int(os.getenv("REPORT_PAGE_MAX_BYTES", "2000000"))
+REPORT_PATH = os.getenv("REPORT_PATH")
+
+# Publishing reports on-wiki: page to publish to (reports are only printed
+# or written to REPORT_PATH if unset; later pages go to <page>/2, <page>/3,
+# ...), edit throttle (token bucket), maxlag and retry limits. The target
+# is global: one report covering every watched wiki goes to this page on
+# the WIKI_API_URL wiki, with each case linked on its own wiki
+PUBLISH_TARGET = os.getenv("PUBLISH_TARGET")
+PUBLISH_SUMMARY = os.getenv("PUBLISH_SUMMARY", "Updating edit war report")
+PUBLISH_EDITS_PER_MINUTE = float(os.getenv("PUBLISH_EDITS_PER_MINUTE", "6"))
+PUBLISH_BURST = int(os.getenv("PUBLISH_BURST", "1"))
+PUBLISH_MAXLAG = int(os.getenv("PUBLISH_MAXLAG", "5"))
+PUBLISH_MAX_ATTEMPTS = int(os.getenv("PUBLISH_MAX_ATTEMPTS", "5"))
+PUBLISH_DRAIN_SECONDS = float(os.getenv("PUBLISH_DRAIN_SECONDS", "120"))
+
+# Sharded detection: split the look-back window into this many shards by
+# article hash and run the detectors on them in a process pool (0 or 1 =
+# single pass in-process); DETECTION_WORKERS = 0 means one per CPU
+DETECTION_SHARDS = int(os.getenv("DETECTION_SHARDS", "0"))
+DETECTION_WORKERS = int(os.getenv("DETECTION_WORKERS", "0"))
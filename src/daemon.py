@@ -0,0 +1,174 @@
+"""
+daemon.py
+
+Long-running mode for EditWarCatcherBot.
+
+Instead of one process per run (re-importing pandas/duckdb/requests,
+reconnecting and re-warming caches every time), the daemon keeps one
+DuckDB session, one HTTP keep-alive session (or multi-wiki poller) and the
+compiled detectors for its whole lifetime, and only does each cycle's
+incremental work.
+
+Two triggers:
+- interval: poll the recentchanges API every DAEMON_INTERVAL_SECONDS
+  (measured start to start); a cycle that overruns delays the next one
+  instead of overlapping it, and missed ticks are skipped, not queued
+- ingest batch (--stream): follow the EventStreams feed and run detection
+  after every persisted batch that added reverts
+
+Either way, revert events past the hot retention window are archived
+(see retention.py) after the first cycle and then at most every
+DAEMON_RETENTION_SECONDS (daily by default), between cycles.
+
+SIGTERM (and SIGINT) stop the daemon cleanly: an in-flight cycle finishes,
+the stream's pending batch is flushed, and connections are closed.
+
+Usage:
+    python -m src.cli run --daemon [--interval SECONDS] [--stream]
+    python -m src.main --daemon [--interval SECONDS] [--stream]
+"""
+
+import signal
+import threading
+import time
+from typing import Optional
+
+from src.config import (
+    ARCHIVE_DIR,
+    DAEMON_INTERVAL_SECONDS,
+    DAEMON_RETENTION_SECONDS,
+    DUCKDB_PATH,
+    EVENTSTREAM_URL,
+    HOT_RETENTION_DAYS,
+    WIKI_API_URLS,
+)
+from src.db.duckdb_client import DuckDBClient
+from src.db.retention import archive_old_reverts
+from src.main import detect, publish_report, run_cycle, run_stream, shutdown
+from src.utils.logger import get_logger
+from src.utils.metrics import METRICS
+
+logger = get_logger("daemon")
+
+
+class Daemon:
+    def __init__(
+        self,
+        interval: float = DAEMON_INTERVAL_SECONDS,
+        retention_interval: float = DAEMON_RETENTION_SECONDS
+    ):
+        self.interval = interval
+        self.retention_interval = retention_interval
+        self.next_retention: Optional[float] = None
+        self.stop_event = threading.Event()
+        self.cycles = 0
+
+    def _on_signal(self, signum, frame):
+        logger.info("Received signal %d, shutting down after the current cycle", signum)
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+
+    def archive_if_due(self, db: DuckDBClient):
+        """Run the retention job if it has not run for retention_interval."""
+
+        if self.retention_interval <= 0:
+            return
+        now = time.monotonic()
+        if self.next_retention is not None and now < self.next_retention:
+            return
+        self.next_retention = now + self.retention_interval
+
+        try:
+            archive_old_reverts(db, retention_days=HOT_RETENTION_DAYS, archive_dir=ARCHIVE_DIR)
+        except Exception:
+            # Old days stay in the hot table until the next run
+            logger.exception("Archiving old revert events failed")
+
+    def run(self, max_cycles: Optional[int] = None):
+        """Poll on the configured interval until stopped."""
+
+        db = DuckDBClient(DUCKDB_PATH)
+
+        # Imported here, as in main.py: the stream trigger needs neither, and
+        # only the connections of the configured polling mode are opened
+        http = poller = None
+        if len(WIKI_API_URLS) > 1:
+            from src.api.async_fetcher import WikiPoller
+            poller = WikiPoller()
+        else:
+            import requests
+            http = requests.Session()
+
+        logger.info("EditWarCatcherBot daemon started (every %.0fs)", self.interval)
+        next_start = time.monotonic()
+
+        try:
+            while not self.stop_event.is_set():
+                try:
+                    run_cycle(db, http=http, poller=poller)
+                except Exception:
+                    # Keep serving; the cursor makes the next cycle retry
+                    logger.exception("Cycle failed")
+                self.cycles += 1
+                self.archive_if_due(db)
+
+                if max_cycles is not None and self.cycles >= max_cycles:
+                    break
+
+                # Fixed-rate schedule; skip ticks a slow cycle ran over
+                now = time.monotonic()
+                next_start += self.interval
+                if self.interval <= 0:
+                    next_start = now
+                elif next_start < now:
+                    skipped = int((now - next_start) // self.interval) + 1
+                    logger.warning("Cycle overran the interval, skipping %d tick(s)", skipped)
+                    next_start += skipped * self.interval
+
+                self.stop_event.wait(next_start - now)
+
+        finally:
+            if poller is not None:
+                poller.close()
+            if http is not None:
+                http.close()
+            shutdown()
+            db.close()
+            logger.info("EditWarCatcherBot daemon stopped after %d cycles", self.cycles)
+
+    def run_on_ingest(self, url: str = EVENTSTREAM_URL, max_reconnects: Optional[int] = None):
+        """Follow the stream and detect after every batch that added reverts."""
+
+        db = DuckDBClient(DUCKDB_PATH)
+
+        def on_flush(db: DuckDBClient, written: int):
+            if not written or self.stop_event.is_set():
+                return
+            METRICS.reset()
+            try:
+                publish_report(*detect(db), db)
+            finally:
+                METRICS.export()
+            self.cycles += 1
+            self.archive_if_due(db)
+
+        try:
+            # The stream checks stop_event between reads and flushes once
+            run_stream(url=url, max_reconnects=max_reconnects, db=db, on_flush=on_flush, stop=self.stop_event)
+        finally:
+            shutdown()
+            db.close()
+            logger.info("EditWarCatcherBot daemon stopped after %d cycles", self.cycles)
+
+
+def run_daemon(interval: float = DAEMON_INTERVAL_SECONDS, stream: bool = False):
+    daemon = Daemon(interval)
+    daemon.install_signal_handlers()
+
+    if stream:
+        daemon.run_on_ingest()
+    else:
+        daemon.run()
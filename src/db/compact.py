@@ -0,0 +1,261 @@
+"""
+compact.py
+
+One-off deduplication / compaction of revert_events.
+
+Databases created before revert_events was keyed by (wiki, revid) may
+hold the same revert many times over (one copy per overlapping fetch
+window) and lack the key that makes writes idempotent. This command
+rebuilds the table with the current schema, keeping one row per
+(wiki, revid), and checkpoints so the freed space is reclaimed.
+
+It also migrates tables from before the article and user dimensions:
+their names are interned and only the ids are kept (init_db() does this
+automatically, as it splits articles from before they were keyed by
+wiki, see rekey_articles()).
+
+Rows are renumbered (revert_events.seq), so the state of incremental
+detectors is reset and rebuilt on their next run (reset_derived_state(),
+which init_db() also applies to detector tables from before they were
+keyed by wiki).
+
+Usage:
+    python -m src.db.compact
+"""
+
+from src.db.dimensions import encoded_select, intern_from_sql
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import (
+    CONSOLIDATED_SCHEMA,
+    CONSOLIDATED_THREE_RR_SCHEMA,
+    DETECTOR_STATE_SCHEMA,
+    NAMED_VIEW_SCHEMA,
+    THREE_RR_SCHEMA,
+    articles_ddl,
+    revert_events_ddl,
+)
+from src.config import DUCKDB_PATH
+from src.utils.logger import get_logger
+
+logger = get_logger("compact")
+
+_COLUMNS = ["revid", "old_revid", "timestamp", "is_vandalism", "comment", "wiki"]
+
+
+def _columns(db: DuckDBClient, table: str) -> set:
+    return {
+        r[0] for r in db.execute(
+            """
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = ?
+              AND table_schema = current_schema()
+            """,
+            [table]
+        ).fetchall()
+    }
+
+
+def needs_compaction(db: DuckDBClient) -> bool:
+    """Whether revert_events exists and still stores article and user names."""
+    return "article" in _columns(db, "revert_events")
+
+
+# Tables derived from revert_events by the incremental detectors
+DERIVED_TABLES = ("three_rr_incidents", "consolidated_reverts", "consolidated_three_rr_incidents")
+
+
+def derived_state_outdated(db: DuckDBClient) -> bool:
+    """Whether a derived table exists without the wiki column of its key."""
+
+    tables = dict(db.execute(
+        """
+        SELECT table_name, bool_or(column_name = 'wiki')
+        FROM information_schema.columns
+        WHERE table_schema = current_schema()
+        GROUP BY table_name
+        """
+    ).fetchall())
+    return any(tables.get(table) is False for table in DERIVED_TABLES)
+
+
+def reset_derived_state(db: DuckDBClient, transaction: bool = True):
+    """
+    Drop the incremental detectors' tables and high-water marks; they are
+    rebuilt from revert_events on the detectors' next run.
+
+    Args:
+        db (DuckDBClient): Open database
+        transaction (bool): Run in a transaction of its own
+    """
+
+    if transaction:
+        db.execute("BEGIN TRANSACTION")
+    try:
+        for table in DERIVED_TABLES:
+            db.execute(f"DROP TABLE IF EXISTS {table}")
+        db.execute(DETECTOR_STATE_SCHEMA)
+        db.execute(THREE_RR_SCHEMA)
+        db.execute(CONSOLIDATED_SCHEMA)
+        db.execute(CONSOLIDATED_THREE_RR_SCHEMA)
+        db.execute("DELETE FROM detector_state")
+        if transaction:
+            db.execute("COMMIT")
+    except Exception:
+        if transaction:
+            db.execute("ROLLBACK")
+        raise
+    logger.info("Reset incremental detector state")
+
+
+def articles_keyed_by_name(db: DuckDBClient) -> bool:
+    """Whether the articles table exists without its wiki column."""
+    columns = _columns(db, "articles")
+    return bool(columns) and "wiki" not in columns
+
+
+def rekey_articles(db: DuckDBClient) -> int:
+    """
+    Key articles by (wiki, name) instead of name alone.
+
+    An article id used on several wikis keeps its id on the first of them
+    (by wiki id) and gets a new id on each other one; revert_events is
+    repointed accordingly. Articles no revert refers to keep their id,
+    under wiki "". The detectors' state is reset, since split articles no
+    longer match it.
+
+    Args:
+        db (DuckDBClient): Open database
+
+    Returns:
+        int: Number of articles added by the split
+    """
+
+    db.execute("BEGIN TRANSACTION")
+    try:
+        db.execute(
+            """
+            CREATE OR REPLACE TEMP TABLE article_wikis AS
+            SELECT
+                wiki,
+                article_id,
+                CASE
+                    WHEN ROW_NUMBER() OVER (PARTITION BY article_id ORDER BY wiki) = 1 THEN article_id
+                    ELSE nextval('articles_seq')
+                END AS new_article_id
+            FROM (
+                SELECT DISTINCT wiki, article_id
+                FROM revert_events
+                WHERE article_id IS NOT NULL
+            )
+            """
+        )
+        db.execute("DROP TABLE IF EXISTS articles_rekeyed")
+        db.execute(articles_ddl("articles_rekeyed"))
+        db.execute(
+            """
+            INSERT INTO articles_rekeyed (article_id, wiki, name)
+            SELECT w.new_article_id, w.wiki, a.name
+            FROM article_wikis w
+            JOIN articles a USING (article_id)
+            UNION ALL
+            SELECT a.article_id, '', a.name
+            FROM articles a
+            WHERE NOT EXISTS (SELECT 1 FROM article_wikis w WHERE w.article_id = a.article_id)
+            """
+        )
+        added = db.execute(
+            "SELECT COUNT(*) FROM article_wikis WHERE new_article_id <> article_id"
+        ).fetchone()[0]
+        db.execute(
+            """
+            UPDATE revert_events e
+            SET article_id = w.new_article_id
+            FROM article_wikis w
+            WHERE e.wiki = w.wiki
+              AND e.article_id = w.article_id
+              AND w.new_article_id <> w.article_id
+            """
+        )
+        db.execute("DROP VIEW IF EXISTS revert_events_named")
+        db.execute("DROP TABLE articles")
+        db.execute("ALTER TABLE articles_rekeyed RENAME TO articles")
+        db.execute(NAMED_VIEW_SCHEMA)
+        db.execute("DROP TABLE article_wikis")
+        reset_derived_state(db, transaction=False)
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+    logger.info("Keyed articles by wiki (%d articles split off)", added)
+    return added
+
+
+def compact_revert_events(db: DuckDBClient) -> int:
+    """
+    Rebuild revert_events without duplicates, with its primary key and
+    with article and user ids.
+
+    Args:
+        db (DuckDBClient): Open database
+
+    Returns:
+        int: Number of duplicate rows removed
+    """
+
+    before = db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0]
+    legacy = needs_compaction(db)
+
+    db.execute("BEGIN TRANSACTION")
+    try:
+        # Legacy tables predate the wiki column
+        db.execute("ALTER TABLE revert_events ADD COLUMN IF NOT EXISTS wiki VARCHAR DEFAULT ''")
+        db.execute("DROP TABLE IF EXISTS revert_events_compacted")
+        db.execute(revert_events_ddl("revert_events_compacted"))
+
+        rows = """
+        SELECT * REPLACE (COALESCE(wiki, '') AS wiki)
+        FROM revert_events
+        WHERE revid IS NOT NULL
+        QUALIFY ROW_NUMBER() OVER (
+            PARTITION BY COALESCE(wiki, ''), revid
+            ORDER BY timestamp
+        ) = 1
+        """
+        if legacy:
+            intern_from_sql(db, rows)
+            rows = encoded_select(rows, _COLUMNS)
+
+        columns = ", ".join(["article_id", "user_id"] + _COLUMNS)
+        db.execute(
+            f"""
+            INSERT INTO revert_events_compacted ({columns})
+            SELECT {columns}
+            FROM ({rows})
+            ORDER BY timestamp
+            """
+        )
+        db.execute("DROP TABLE revert_events")
+        db.execute("ALTER TABLE revert_events_compacted RENAME TO revert_events")
+        db.execute(NAMED_VIEW_SCHEMA)
+
+        # Derived state refers to the old row numbering (and, in legacy
+        # databases, to names)
+        reset_derived_state(db, transaction=False)
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+    db.execute("CHECKPOINT")
+
+    after = db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0]
+    logger.info("Compacted revert_events: %d rows -> %d rows", before, after)
+    return before - after
+
+
+if __name__ == "__main__":
+    db = DuckDBClient(DUCKDB_PATH)
+    compact_revert_events(db)
+    db.close()
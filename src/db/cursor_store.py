@@ -0,0 +1,84 @@
+"""
+cursor_store.py
+
+Durable ingestion cursor for recent changes.
+
+Stores the last consumed (rcid, timestamp) per source so that every
+run pulls exactly the edits made since the previous one.
+"""
+
+from datetime import datetime
+from typing import Optional, Tuple
+
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import CURSOR_SCHEMA, STREAM_CURSOR_SCHEMA
+from src.config import DUCKDB_PATH
+from src.utils.logger import get_logger
+
+logger = get_logger("cursor_store")
+
+
+class CursorStore:
+    def __init__(self, db: Optional[DuckDBClient] = None):
+        # An injected client is shared with the caller, who closes it
+        self.owns_db = db is None
+        self.db = db or DuckDBClient(DUCKDB_PATH)
+        self.db.execute(CURSOR_SCHEMA)
+        self.db.execute(STREAM_CURSOR_SCHEMA)
+
+    def get(self, source: str) -> Optional[Tuple[int, datetime]]:
+        """
+        Load the cursor for a source.
+
+        Returns:
+            (last_rcid, last_timestamp), or None if the source was never read
+        """
+
+        row = self.db.execute(
+            "SELECT last_rcid, last_timestamp FROM ingest_cursor WHERE source = ?",
+            [source]
+        ).fetchone()
+
+        return (row[0], row[1]) if row else None
+
+    def set(self, source: str, rcid: int, timestamp: str) -> None:
+        """
+        Advance the cursor for a source.
+
+        Args:
+            source (str): Source identifier (API URL)
+            rcid (int): rcid of the last consumed change
+            timestamp (str): ISO 8601 timestamp of the last consumed change
+        """
+
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO ingest_cursor
+            VALUES (?, ?, CAST(? AS TIMESTAMP), now())
+            """,
+            [source, rcid, timestamp]
+        )
+        logger.debug("Cursor for %s advanced to rcid=%s (%s)", source, rcid, timestamp)
+
+    def get_event_id(self, stream: str) -> Optional[str]:
+        """Load the last consumed event id for a stream, if any."""
+
+        row = self.db.execute(
+            "SELECT last_event_id FROM stream_cursor WHERE stream = ?",
+            [stream]
+        ).fetchone()
+
+        return row[0] if row else None
+
+    def set_event_id(self, stream: str, event_id: str) -> None:
+        """Advance the stream cursor to an event id."""
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO stream_cursor VALUES (?, ?, now())",
+            [stream, event_id]
+        )
+        logger.debug("Stream cursor for %s advanced to %s", stream, event_id)
+
+    def close(self):
+        if self.owns_db:
+            self.db.close()
@@ -0,0 +1,312 @@
+"""
+dimensions.py
+
+Integer-keyed article and user dimensions for revert_events.
+
+revert_events stores article_id and user_id rather than the names, so
+detectors partition, sort and join on integers, and each name is stored
+once, in the articles or users table. Names are joined back only for the
+rows a detector returns (lookup_names()), or through the
+revert_events_named view.
+
+Articles are keyed by (wiki, name), so the same title on two wikis is two
+articles; users are keyed by name alone, as accounts are global.
+
+Writers intern names through a NameInterner: an in-process LRU of
+key -> id per database client, so DuckDB is only asked about names not
+seen recently, and unknown names are inserted and their ids read back in
+one round trip per batch. Ids are never reassigned, so a cached id stays
+valid for the lifetime of the client. Bulk loads intern straight in SQL
+instead (intern_from_sql()).
+"""
+
+import weakref
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.config import NAME_CACHE_SIZE
+from src.db.duckdb_client import DuckDBClient
+from src.utils.logger import get_logger
+
+logger = get_logger("dimensions")
+
+# (table, id column, name column in revert rows, key columns)
+ARTICLES = ("articles", "article_id", "article", ("wiki", "name"))
+USERS = ("users", "user_id", "user", ("name",))
+DIMENSIONS = (ARTICLES, USERS)
+
+
+def _key_match(left: str, right: str, keys: Sequence[str]) -> str:
+    return " AND ".join(f"{left}.{k} = {right}.{k}" for k in keys)
+
+
+class NameInterner:
+    """
+    LRU cache of name -> id in front of one dimension table (of
+    (wiki, name) -> id for articles).
+
+    Args:
+        table (str): "articles" or "users"
+        max_names (int): Names kept in memory
+    """
+
+    def __init__(self, table: str, max_names: int = NAME_CACHE_SIZE):
+        self.table = table
+        self.id_column, self.keys = {t: (c, k) for t, c, _, k in DIMENSIONS}[table]
+        self.max_names = max_names
+        self._ids: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _fetch(self, db: DuckDBClient, keys: List[Hashable]) -> Dict[Hashable, int]:
+        """Ids of `keys`, inserting the ones the table does not have yet."""
+
+        if len(self.keys) == 1:
+            columns = {"name": pa.array(keys, pa.string())}
+        else:
+            columns = {k: pa.array(values, pa.string()) for k, values in zip(self.keys, zip(*keys))}
+        names = ", ".join(self.keys)
+
+        db.con.register("intern_names", pa.table(columns))
+        try:
+            db.execute(
+                f"""
+                INSERT INTO {self.table} ({names})
+                SELECT {names}
+                FROM intern_names n
+                WHERE NOT EXISTS (SELECT 1 FROM {self.table} d WHERE {_key_match("d", "n", self.keys)})
+                ON CONFLICT DO NOTHING
+                """
+            )
+            rows = db.execute(
+                f"""
+                SELECT {", ".join(f"d.{k}" for k in self.keys)}, d.{self.id_column}
+                FROM {self.table} d
+                JOIN intern_names n ON {_key_match("d", "n", self.keys)}
+                """
+            ).fetchall()
+        finally:
+            db.con.unregister("intern_names")
+
+        if len(self.keys) == 1:
+            return dict(rows)
+        return {row[:-1]: row[-1] for row in rows}
+
+    def intern(
+        self,
+        db: DuckDBClient,
+        names: Sequence[Optional[str]],
+        wikis: Optional[Sequence[str]] = None
+    ) -> List[Optional[int]]:
+        """
+        Ids of `names` (None for None), assigning ids to new names.
+
+        Args:
+            db (DuckDBClient): Database the ids belong to
+            names (Sequence[Optional[str]]): Names to look up
+            wikis (Sequence[str] | None): Wiki of each name, for articles
+                                          ("" for all if omitted)
+
+        Returns:
+            List[Optional[int]]: One id per name
+        """
+
+        if len(self.keys) > 1:
+            wikis = wikis if wikis is not None else [""] * len(names)
+            keys = [None if name is None else (wiki or "", name) for wiki, name in zip(wikis, names)]
+        else:
+            keys = names
+
+        ids = self._ids
+        missing = []
+        for key in keys:
+            if key is None:
+                continue
+            if key in ids:
+                ids.move_to_end(key)
+                self.hits += 1
+            else:
+                missing.append(key)
+
+        if missing:
+            missing = list(dict.fromkeys(missing))
+            self.misses += len(missing)
+            ids.update(self._fetch(db, missing))
+
+        result = [None if key is None else ids[key] for key in keys]
+
+        while len(ids) > self.max_names:
+            ids.popitem(last=False)
+        return result
+
+
+class Dimensions:
+    """The article and user interners of one database client."""
+
+    __slots__ = ("articles", "users", "__weakref__")
+
+    def __init__(self, max_names: int = NAME_CACHE_SIZE):
+        self.articles = NameInterner("articles", max_names)
+        self.users = NameInterner("users", max_names)
+
+    @staticmethod
+    def _dictionary(column) -> pa.DictionaryArray:
+        if isinstance(column, pa.ChunkedArray):
+            column = column.combine_chunks()
+        return pc.dictionary_encode(column.cast(pa.string()))
+
+    def _encode_column(self, interner: NameInterner, db: DuckDBClient, column) -> pa.Array:
+        # Intern each distinct name once, then spread the ids over the rows
+        encoded = self._dictionary(column)
+        ids = pa.array(interner.intern(db, encoded.dictionary.to_pylist()), pa.int32())
+        return pc.take(ids, encoded.indices)
+
+    def _encode_articles(self, db: DuckDBClient, names, wikis) -> pa.Array:
+        # Number each distinct (wiki, name) pair by its two dictionary
+        # indices, intern each pair once and spread the ids over the rows
+        names = self._dictionary(names)
+        wikis = self._dictionary(pc.fill_null(wikis, ""))
+        width = len(names.dictionary)
+        codes = pc.add(pc.multiply(wikis.indices.cast(pa.int64()), width), names.indices.cast(pa.int64()))
+        distinct = pc.unique(codes)
+
+        wiki_names = wikis.dictionary.to_pylist()
+        article_names = names.dictionary.to_pylist()
+        pairs = [
+            (None, None) if code is None else (wiki_names[code // width], article_names[code % width])
+            for code in distinct.to_pylist()
+        ]
+        ids = pa.array(
+            self.articles.intern(db, [name for _, name in pairs], [wiki for wiki, _ in pairs]),
+            pa.int32()
+        )
+        return pc.take(ids, pc.index_in(codes, value_set=distinct))
+
+    def encode(self, db: DuckDBClient, batch: Union[pa.RecordBatch, pa.Table]) -> pa.Table:
+        """
+        Replace the article and user name columns of revert rows with ids.
+
+        Args:
+            db (DuckDBClient): Database the ids belong to
+            batch (pa.RecordBatch | pa.Table): Rows with "article" and "user"
+                                               (and "wiki", which keys the
+                                               articles; "" if absent)
+
+        Returns:
+            pa.Table: The same rows with "article_id" and "user_id" instead
+        """
+
+        columns = dict(zip(batch.column_names, batch.columns))
+        if "article" in columns:
+            names = columns.pop("article")
+            wikis = columns.get("wiki", pa.nulls(len(names), pa.string()))
+            columns["article_id"] = self._encode_articles(db, names, wikis)
+        if "user" in columns:
+            columns["user_id"] = self._encode_column(self.users, db, columns.pop("user"))
+        return pa.table(columns)
+
+
+_dimensions = weakref.WeakKeyDictionary()
+
+
+def dimensions_for(db: DuckDBClient) -> Dimensions:
+    """The interners of `db`, created on first use and dropped with the client."""
+
+    dimensions = _dimensions.get(db)
+    if dimensions is None:
+        dimensions = _dimensions[db] = Dimensions()
+    return dimensions
+
+
+def intern_from_sql(db: DuckDBClient, source: str, params: Optional[list] = None):
+    """
+    Add the article and user names of a query's rows to the dimensions.
+
+    For bulk loads: everything happens inside DuckDB and the in-process
+    caches are bypassed.
+
+    Args:
+        db (DuckDBClient): Open client
+        source (str): Query with "wiki", "article" and "user" columns
+        params (list | None): Parameters of `source`
+    """
+
+    db.execute(
+        f"""
+        INSERT INTO articles (wiki, name)
+        SELECT DISTINCT COALESCE(s.wiki, ''), s.article
+        FROM ({source}) s
+        WHERE s.article IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM articles d WHERE d.wiki = COALESCE(s.wiki, '') AND d.name = s.article
+          )
+        ON CONFLICT DO NOTHING
+        """,
+        params
+    )
+    db.execute(
+        f"""
+        INSERT INTO users (name)
+        SELECT DISTINCT s."user"
+        FROM ({source}) s
+        WHERE s."user" IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM users d WHERE d.name = s."user")
+        ON CONFLICT DO NOTHING
+        """,
+        params
+    )
+
+
+def encoded_select(source: str, columns: Iterable[str]) -> str:
+    """
+    Query over `source` (with "wiki", "article" and "user" columns)
+    selecting article_id, user_id and `columns`; run intern_from_sql()
+    first.
+    """
+
+    selected = ", ".join(f's."{c}"' for c in columns)
+    return f"""
+    SELECT a.article_id, u.user_id, {selected}
+    FROM ({source}) s
+    LEFT JOIN articles a ON a.wiki = COALESCE(s.wiki, '') AND a.name = s.article
+    LEFT JOIN users u ON u.name = s."user"
+    """
+
+
+def lookup_names(db: DuckDBClient, table: str, ids: Iterable[Optional[int]]) -> Dict[int, str]:
+    """
+    Names of the given ids in one dimension table.
+
+    Args:
+        db (DuckDBClient): Open client
+        table (str): "articles" or "users"
+        ids (Iterable[Optional[int]]): Ids to resolve (None is skipped)
+
+    Returns:
+        Dict[int, str]: id -> name
+    """
+
+    id_column = {t: c for t, c, _, _ in DIMENSIONS}[table]
+    wanted = {i for i in ids if i is not None}
+    if not wanted:
+        return {}
+
+    db.con.register("lookup_ids", pa.table({"id": pa.array(sorted(wanted), pa.int32())}))
+    try:
+        rows = db.execute(
+            f"""
+            SELECT d.{id_column}, d.name
+            FROM {table} d
+            JOIN lookup_ids l ON d.{id_column} = l.id
+            """
+        ).fetchall()
+    finally:
+        db.con.unregister("lookup_ids")
+
+    return dict(rows)
@@ -1,22 +1,70 @@
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
 import duckdb
+import pyarrow as pa
 from src.utils.logger import get_logger
 
 logger = get_logger("duckdb")
 
 class DuckDBClient:
-    def __init__(self, db_path):
+    def __init__(self, db_path, con=None):
         self.db_path = db_path
-        self.con = duckdb.connect(db_path)
+        self.con = con if con is not None else duckdb.connect(db_path)
 
     def execute(self, query, params=None):
         logger.debug(f"Executing query: {query}")
         return self.con.execute(query) if params is None else self.con.execute(query, params)
 
-    def insert_df(self, table_name, df):
-        if df.empty:
-            return
+    def cursor(self):
+        """
+        A client on a new cursor of this connection.
+
+        Cursors share the database instance (and its warm buffer cache) but
+        each has its own transaction state, so give every thread its own.
+        """
+        return DuckDBClient(self.db_path, con=self.con.cursor())
+
+    def insert_df(self, table_name, df, ignore_duplicates=False):
+        """
+        Bulk insert a pandas DataFrame or Arrow table/RecordBatch, matching
+        columns by name. Arrow data is scanned in place, without a copy.
+
+        With ignore_duplicates, rows whose key already exists (in the table
+        or earlier in the same frame) are skipped.
+
+        Returns the number of rows inserted.
+        """
+        if len(df) == 0:
+            return 0
+        names = df.column_names if isinstance(df, (pa.Table, pa.RecordBatch)) else df.columns
+        columns = ", ".join(f'"{c}"' for c in names)
+        conflict = " ON CONFLICT DO NOTHING" if ignore_duplicates else ""
         self.con.register("df_temp", df)
-        self.con.execute(f"INSERT INTO {table_name} SELECT * FROM df_temp")
+        try:
+            row = self.con.execute(
+                f"INSERT INTO {table_name} ({columns}) SELECT {columns} FROM df_temp{conflict}"
+            ).fetchone()
+        finally:
+            self.con.unregister("df_temp")
+        return row[0]
 
     def close(self):
         self.con.close()
+
+
+@contextmanager
+def borrow_client(db: Optional[DuckDBClient], db_path: str) -> Iterator[DuckDBClient]:
+    """
+    Use the caller's client if one is injected, else open one for db_path
+    and close it afterwards. Injected clients are never closed here.
+    """
+    if db is not None:
+        yield db
+        return
+
+    db = DuckDBClient(db_path)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,21 +1,203 @@
+from typing import Optional
+
 from src.db.duckdb_client import DuckDBClient
 from src.config import DUCKDB_PATH
 
-SCHEMA = """
-CREATE TABLE IF NOT EXISTS revert_events (
-  article VARCHAR,
-  user VARCHAR,
-  revid BIGINT,
+
+def articles_ddl(table: str = "articles") -> str:
+    """DDL for the articles dimension; the same title on two wikis is two articles."""
+    return f"""
+CREATE SEQUENCE IF NOT EXISTS articles_seq;
+CREATE TABLE IF NOT EXISTS {table} (
+  article_id INTEGER PRIMARY KEY DEFAULT nextval('articles_seq'),
+  wiki VARCHAR NOT NULL DEFAULT '',
+  name VARCHAR NOT NULL,
+  UNIQUE (wiki, name)
+);
+"""
+
+
+# Article and user names, each stored once and referenced by integer id
+# (see dimensions.py)
+DIMENSION_SCHEMA = articles_ddl() + """
+CREATE SEQUENCE IF NOT EXISTS users_seq;
+CREATE TABLE IF NOT EXISTS users (
+  user_id INTEGER PRIMARY KEY DEFAULT nextval('users_seq'),
+  name VARCHAR NOT NULL UNIQUE
+);
+"""
+
+
+def revert_events_ddl(table: str = "revert_events") -> str:
+    """
+    DDL for a revert events table (and the dimensions it refers to).
+
+    A revision is a revert event at most once per wiki, so (wiki, revid)
+    is the key that makes overlapping fetch windows idempotent. `seq`
+    numbers rows in insertion order for incremental detectors. Articles
+    and users are stored as ids into the articles and users tables.
+    """
+    return DIMENSION_SCHEMA + f"""
+CREATE SEQUENCE IF NOT EXISTS revert_events_seq;
+CREATE TABLE IF NOT EXISTS {table} (
+  article_id INTEGER,
+  user_id INTEGER,
+  revid BIGINT NOT NULL,
   old_revid BIGINT,
   timestamp TIMESTAMP,
   is_vandalism BOOLEAN,
-  comment TEXT
+  comment TEXT,
+  wiki VARCHAR NOT NULL DEFAULT '',
+  seq BIGINT DEFAULT nextval('revert_events_seq'),
+  PRIMARY KEY (wiki, revid)
+);
+"""
+
+# revert_events with article and user names joined back, for reading
+NAMED_VIEW_SCHEMA = """
+CREATE OR REPLACE VIEW revert_events_named AS
+SELECT e.*, a.name AS article, u.name AS "user"
+FROM revert_events e
+LEFT JOIN articles a USING (article_id)
+LEFT JOIN users u USING (user_id);
+"""
+
+SCHEMA = revert_events_ddl() + NAMED_VIEW_SCHEMA
+
+# Last recent change consumed per source (API URL), so each run
+# resumes exactly where the previous one stopped.
+CURSOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_cursor (
+  source VARCHAR PRIMARY KEY,
+  last_rcid BIGINT,
+  last_timestamp TIMESTAMP,
+  updated_at TIMESTAMP
+);
+"""
+
+# Last Server-Sent-Events id consumed per stream URL (Last-Event-ID).
+STREAM_CURSOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS stream_cursor (
+  stream VARCHAR PRIMARY KEY,
+  last_event_id VARCHAR,
+  updated_at TIMESTAMP
+);
+"""
+
+# High-water marks (last revert_events.seq processed) of incremental detectors
+DETECTOR_STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS detector_state (
+  detector VARCHAR PRIMARY KEY,
+  high_water BIGINT,
+  updated_at TIMESTAMP
+);
+"""
+
+# Persisted 3RR result set, maintained incrementally. Like every detector
+# key, pairs are per wiki: article ids alone do not tell wikis apart
+THREE_RR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS three_rr_incidents (
+  wiki VARCHAR NOT NULL DEFAULT '',
+  article_id INTEGER,
+  user_id INTEGER,
+  last_revert_time TIMESTAMP,
+  revert_count BIGINT,
+  PRIMARY KEY (wiki, article_id, user_id)
+);
+"""
+
+# The same over consolidated revert actions (see consolidation.py), as
+# detect() reports them
+CONSOLIDATED_THREE_RR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS consolidated_three_rr_incidents (
+  wiki VARCHAR NOT NULL DEFAULT '',
+  article_id INTEGER,
+  user_id INTEGER,
+  last_revert_time TIMESTAMP,
+  revert_count BIGINT,
+  PRIMARY KEY (wiki, article_id, user_id)
+);
+"""
+
+# Persisted consolidated revert actions (see consolidation.py), maintained
+# incrementally; a group is keyed by its first revert
+CONSOLIDATED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS consolidated_reverts (
+  wiki VARCHAR NOT NULL DEFAULT '',
+  article_id INTEGER,
+  user_id INTEGER,
+  first_revert_time TIMESTAMP,
+  last_revert_time TIMESTAMP,
+  raw_revert_count BIGINT,
+  PRIMARY KEY (wiki, article_id, user_id, first_revert_time)
+);
+"""
+
+# Content hashes of recent revisions, backing the in-memory identity
+# revert index (see identity_revert_index.py)
+REVISION_HASH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revision_hashes (
+  wiki VARCHAR NOT NULL DEFAULT '',
+  article VARCHAR,
+  revid BIGINT NOT NULL,
+  sha1 BLOB,
+  timestamp TIMESTAMP,
+  PRIMARY KEY (wiki, revid)
+);
+"""
+
+# Reports waiting to be published on-wiki, one row per target page (newer
+# content for the same page replaces the pending one), and the content last
+# published to each page
+PUBLISH_QUEUE_SCHEMA = """
+CREATE SEQUENCE IF NOT EXISTS publish_queue_seq;
+CREATE TABLE IF NOT EXISTS publish_queue (
+  target VARCHAR PRIMARY KEY,
+  text TEXT,
+  summary VARCHAR,
+  sha1 VARCHAR,
+  version BIGINT,
+  enqueued_at TIMESTAMP,
+  attempts INTEGER DEFAULT 0,
+  not_before TIMESTAMP,
+  last_error VARCHAR
+);
+CREATE TABLE IF NOT EXISTS publish_state (
+  target VARCHAR PRIMARY KEY,
+  sha1 VARCHAR,
+  revid BIGINT,
+  published_at TIMESTAMP
 );
 """
 
-def init_db():
-    db = DuckDBClient(DUCKDB_PATH)
+def init_db(path: Optional[str] = None):
+    db = DuckDBClient(path or DUCKDB_PATH)
+    # Databases from before the article/user dimensions are rebuilt first,
+    # articles from before they were keyed by wiki are split per wiki, and
+    # detector state from before it was keyed by wiki is rebuilt from scratch
+    from src.db.compact import (
+        articles_keyed_by_name,
+        compact_revert_events,
+        derived_state_outdated,
+        needs_compaction,
+        rekey_articles,
+        reset_derived_state,
+    )
+    if needs_compaction(db):
+        compact_revert_events(db)
+    elif articles_keyed_by_name(db):
+        rekey_articles(db)
+    elif derived_state_outdated(db):
+        reset_derived_state(db)
     db.execute(SCHEMA)
+    db.execute(CURSOR_SCHEMA)
+    db.execute(STREAM_CURSOR_SCHEMA)
+    db.execute(DETECTOR_STATE_SCHEMA)
+    db.execute(THREE_RR_SCHEMA)
+    db.execute(CONSOLIDATED_SCHEMA)
+    db.execute(CONSOLIDATED_THREE_RR_SCHEMA)
+    db.execute(REVISION_HASH_SCHEMA)
+    db.execute(PUBLISH_QUEUE_SCHEMA)
     db.close()
 
 if __name__ == "__main__":
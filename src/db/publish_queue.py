@@ -0,0 +1,176 @@
+"""
+publish_queue.py
+
+Durable queue of report pages waiting to be saved on-wiki.
+
+There is at most one pending entry per target page: enqueueing newer
+content for a page that is still waiting replaces it, so however many
+reports pile up (e.g. while the wiki is lagged) each page is saved once,
+with the latest content. Content identical to what was last published to
+the page is not queued at all.
+
+Entries carry a version; completing an entry only removes it if it was
+not replaced meanwhile. Because queue and publish state live in DuckDB, a
+restart resumes with exactly the saves that had not been confirmed (a
+save confirmed by the wiki but not yet recorded is retried, which the
+wiki turns into a no-op "nochange" edit).
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from src.config import DUCKDB_PATH
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import PUBLISH_QUEUE_SCHEMA
+from src.utils.logger import get_logger
+
+logger = get_logger("publish_queue")
+
+
+def content_sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class PublishQueue:
+    def __init__(self, db: Optional[DuckDBClient] = None):
+        # An injected client is shared with the caller, who closes it
+        self.owns_db = db is None
+        self.db = db or DuckDBClient(DUCKDB_PATH)
+        self.db.execute(PUBLISH_QUEUE_SCHEMA)
+
+    def enqueue(self, target: str, text: str, summary: str) -> bool:
+        """
+        Queue `text` for `target`, replacing any pending content for it.
+
+        Returns:
+            bool: False if the page already has exactly this content
+        """
+
+        sha1 = content_sha1(text)
+        published = self.db.execute(
+            "SELECT sha1 FROM publish_state WHERE target = ?", [target]
+        ).fetchone()
+
+        if published and published[0] == sha1:
+            # Drop a stale pending update, the page is already current
+            self.db.execute("DELETE FROM publish_queue WHERE target = ?", [target])
+            logger.info("%s is already up to date", target)
+            return False
+
+        replaced = self.db.execute(
+            "SELECT COUNT(*) FROM publish_queue WHERE target = ?", [target]
+        ).fetchone()[0]
+
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO publish_queue
+                (target, text, summary, sha1, version, enqueued_at, attempts, not_before, last_error)
+            VALUES (?, ?, ?, ?, nextval('publish_queue_seq'), now(), 0, NULL, NULL)
+            """,
+            [target, text, summary, sha1]
+        )
+
+        if replaced:
+            logger.info("Coalesced pending update of %s", target)
+        return True
+
+    def discard(self, target: str):
+        """Drop the pending entry for `target`, if any."""
+        self.db.execute("DELETE FROM publish_queue WHERE target = ?", [target])
+
+    def subpages(self, target: str) -> List[Dict]:
+        """
+        Subpages of `target` that were published or are pending.
+
+        Returns:
+            List[Dict]: {"target", "published"} per subpage
+        """
+
+        rows = self.db.execute(
+            """
+            SELECT target, bool_or(published)
+            FROM (
+                SELECT target, TRUE AS published FROM publish_state
+                UNION ALL
+                SELECT target, FALSE FROM publish_queue
+            )
+            WHERE starts_with(target, ?)
+            GROUP BY target
+            ORDER BY target
+            """,
+            [target + "/"]
+        ).fetchall()
+        return [{"target": row[0], "published": row[1]} for row in rows]
+
+    def next_due(self, now: Optional[datetime] = None, max_attempts: Optional[int] = None) -> Optional[Dict]:
+        """The oldest entry that may be attempted at `now`, or None."""
+
+        row = self.db.execute(
+            """
+            SELECT target, text, summary, sha1, version, attempts
+            FROM publish_queue
+            WHERE (not_before IS NULL OR not_before <= ?)
+              AND (? IS NULL OR attempts < ?)
+            ORDER BY enqueued_at, target
+            LIMIT 1
+            """,
+            [now or datetime.utcnow(), max_attempts, max_attempts]
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return dict(zip(("target", "text", "summary", "sha1", "version", "attempts"), row))
+
+    def next_retry_time(self, max_attempts: Optional[int] = None) -> Optional[datetime]:
+        """When the earliest deferred entry becomes due."""
+        return self.db.execute(
+            "SELECT MIN(not_before) FROM publish_queue WHERE (? IS NULL OR attempts < ?)",
+            [max_attempts, max_attempts]
+        ).fetchone()[0]
+
+    def complete(self, entry: Dict, revid: Optional[int]):
+        """Record a successful save; the entry is dropped unless it was replaced meanwhile."""
+
+        self.db.execute("BEGIN TRANSACTION")
+        try:
+            self.db.execute(
+                "INSERT OR REPLACE INTO publish_state VALUES (?, ?, ?, now())",
+                [entry["target"], entry["sha1"], revid]
+            )
+            self.db.execute(
+                "DELETE FROM publish_queue WHERE target = ? AND version = ?",
+                [entry["target"], entry["version"]]
+            )
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+
+    def defer(self, entry: Dict, seconds: float, error: str, count_attempt: bool = True):
+        """Put an entry back for `seconds`."""
+
+        self.db.execute(
+            """
+            UPDATE publish_queue
+            SET not_before = ?,
+                attempts = attempts + ?,
+                last_error = ?
+            WHERE target = ? AND version = ?
+            """,
+            [
+                datetime.utcnow() + timedelta(seconds=seconds),
+                1 if count_attempt else 0,
+                error,
+                entry["target"],
+                entry["version"],
+            ]
+        )
+
+    def pending(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM publish_queue").fetchone()[0]
+
+    def close(self):
+        if self.owns_db:
+            self.db.close()
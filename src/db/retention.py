@@ -0,0 +1,170 @@
+"""
+retention.py
+
+Day-partitioned retention for revert events.
+
+Detectors only look back DETECTION_LOOKBACK_HOURS, so revert_events is
+kept as a small hot table holding the last HOT_RETENTION_DAYS days. This
+job rolls every older day into one Parquet file per day under a
+hive-style layout:
+
+    ARCHIVE_DIR/day=YYYY-MM-DD/data.parquet
+
+Late events for an already archived day are merged into (and
+deduplicated with) that day's file. Each day is written to a temporary
+file, atomically renamed into place and only then deleted from the hot
+table, so an interrupted run is simply redone by the next one.
+
+Archived rows keep the article and user names rather than their ids
+(Parquet dictionary-encodes repeated strings by itself), so the archive
+can be read without the articles and users tables.
+
+The revert_events_all view unions the hot table with the archive for
+queries over full history; filters on `day` (or timestamp) only read
+the matching files.
+
+Usage:
+    python -m src.db.retention
+"""
+
+import glob
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from src.config import ARCHIVE_DIR, DUCKDB_PATH, HOT_RETENTION_DAYS
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.db.duckdb_init import CONSOLIDATED_SCHEMA, NAMED_VIEW_SCHEMA, REVISION_HASH_SCHEMA
+from src.utils.logger import get_logger
+
+logger = get_logger("retention")
+
+ARCHIVED_COLUMNS = 'article, "user", revid, old_revid, timestamp, is_vandalism, comment, wiki'
+
+
+def _sql_path(path: str) -> str:
+    """Quote a filesystem path as a SQL string literal."""
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _day_file(archive_dir: str, day: date) -> str:
+    return os.path.join(archive_dir, f"day={day.isoformat()}", "data.parquet")
+
+
+def create_archive_view(db: DuckDBClient, archive_dir: str = ARCHIVE_DIR) -> None:
+    """(Re)create revert_events_all over the hot table and the archive."""
+
+    archive_dir = os.path.abspath(archive_dir)
+    archived = ""
+
+    if glob.glob(os.path.join(archive_dir, "day=*", "data.parquet")):
+        archived = f"""
+        UNION ALL BY NAME
+        SELECT {ARCHIVED_COLUMNS}, day
+        FROM read_parquet(
+            {_sql_path(os.path.join(archive_dir, "day=*", "data.parquet"))},
+            hive_partitioning = true
+        )
+        """
+
+    db.execute(NAMED_VIEW_SCHEMA)
+    db.execute(
+        f"""
+        CREATE OR REPLACE VIEW revert_events_all AS
+        SELECT {ARCHIVED_COLUMNS}, CAST(timestamp AS DATE) AS day
+        FROM revert_events_named
+        {archived}
+        """
+    )
+
+
+def archive_old_reverts(
+    db: Optional[DuckDBClient] = None,
+    retention_days: int = HOT_RETENTION_DAYS,
+    archive_dir: str = ARCHIVE_DIR,
+    now: Optional[datetime] = None
+) -> int:
+    """
+    Move revert events older than the retention window into daily archive files.
+
+    Args:
+        db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                  is opened for this call if omitted.
+        retention_days (int): Whole days to keep in the hot table, besides today.
+        archive_dir (str): Root of the day-partitioned Parquet archive.
+        now (datetime | None): Reference time (UTC), defaults to utcnow().
+
+    Returns:
+        int: Number of revert events moved out of the hot table
+    """
+
+    cutoff = (now or datetime.utcnow()).date() - timedelta(days=retention_days)
+    moved = 0
+
+    with borrow_client(db, DUCKDB_PATH) as db:
+        db.execute(NAMED_VIEW_SCHEMA)
+        days = db.execute(
+            """
+            SELECT DISTINCT CAST(timestamp AS DATE) AS day
+            FROM revert_events
+            WHERE timestamp < ?
+            ORDER BY day
+            """,
+            [cutoff]
+        ).fetchall()
+
+        for (day,) in days:
+            target = _day_file(archive_dir, day)
+            tmp = target + ".tmp"
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+
+            sources = f"""
+            SELECT {ARCHIVED_COLUMNS}
+            FROM revert_events_named
+            WHERE timestamp >= $day AND timestamp < $next_day
+            """
+            if os.path.exists(target):
+                sources += f"""
+            UNION ALL BY NAME
+            SELECT {ARCHIVED_COLUMNS} FROM read_parquet({_sql_path(target)})
+            """
+
+            db.execute(
+                f"""
+                COPY (
+                    SELECT * FROM ({sources})
+                    QUALIFY ROW_NUMBER() OVER (PARTITION BY wiki, revid ORDER BY timestamp) = 1
+                    ORDER BY timestamp
+                ) TO {_sql_path(tmp)} (FORMAT parquet)
+                """,
+                {"day": day, "next_day": day + timedelta(days=1)}
+            )
+            os.replace(tmp, target)
+
+            deleted = db.execute(
+                "DELETE FROM revert_events WHERE timestamp >= ? AND timestamp < ?",
+                [day, day + timedelta(days=1)]
+            ).fetchone()[0]
+            moved += deleted
+            logger.info("Archived %d revert events of %s to %s", deleted, day, target)
+
+        # Consolidated groups that ended before the cutoff can no longer be
+        # extended from the hot table
+        db.execute(CONSOLIDATED_SCHEMA)
+        db.execute("DELETE FROM consolidated_reverts WHERE last_revert_time < ?", [cutoff])
+
+        # Identity reverts are only looked for among recent revisions
+        db.execute(REVISION_HASH_SCHEMA)
+        db.execute("DELETE FROM revision_hashes WHERE timestamp < ?", [cutoff])
+
+        create_archive_view(db, archive_dir)
+
+        if moved:
+            db.execute("CHECKPOINT")
+
+    logger.info("Archived %d revert events older than %s", moved, cutoff)
+    return moved
+
+
+if __name__ == "__main__":
+    archive_old_reverts()
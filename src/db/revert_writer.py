@@ -4,68 +4,201 @@ revert_writer.py
 Responsible for writing detected revert events into DuckDB.
 
 This module:
-- Accepts classified changes from revert_detector
+- Accepts classified changes from revert_detector, either as dicts
+  (classify_change), ClassifiedChange records (classify_record) or as a
+  columnar Arrow table (classify_table)
 - Filters only revert edits
+- Collects them column by column into an Arrow RecordBatch, which DuckDB
+  scans directly (no intermediate row dicts or pandas DataFrame)
+- Interns article and user names into integer ids (see dimensions.py)
 - Writes them to DuckDB in a safe, batched manner
+- Skips events already stored (keyed by wiki + revid), so overlapping
+  fetch windows never insert the same revert twice
 
 No detection logic here.
 No API calls here.
 """
 
-from typing import List, Dict, Any
-import pandas as pd
+from typing import Iterable, List, Dict, Any, Optional, Union
+import pyarrow as pa
+import pyarrow.compute as pc
 
+from src.db.dimensions import dimensions_for
 from src.db.duckdb_client import DuckDBClient
+from src.detection.revert_detector import ClassifiedChange
 from src.config import DUCKDB_PATH
 from src.utils.logger import get_logger
 
 logger = get_logger("revert_writer")
 
 
-class RevertWriter:
+def revert_table(classified: pa.Table) -> pa.Table:
+    """
+    The revert rows of a columnar classification, as revert_events columns.
+
+    Args:
+        classified (pa.Table): Output from classify_table()
+
+    Returns:
+        pa.Table: One row per revert with a revid
+    """
+
+    reverts = classified.filter(
+        pc.and_(
+            pc.fill_null(classified["is_revert"], False),
+            pc.is_valid(classified["revid"])
+        )
+    )
+
+    return pa.table({
+        "wiki": pc.fill_null(reverts["wiki"], ""),
+        "article": reverts["article"],
+        "user": reverts["user"],
+        "revid": reverts["revid"],
+        "old_revid": reverts["old_revid"],
+        "timestamp": reverts["timestamp"],
+        "is_vandalism": reverts["is_vandalism_revert"],
+        "comment": reverts["comment"],
+    })
+
+
+class RevertBatchBuilder:
+    """
+    Accumulates classified reverts as revert_events columns.
+
+    Only reverts with a revid are kept; each field is appended straight
+    to its column list, and build() turns the columns into one Arrow
+    RecordBatch.
+    """
+
+    __slots__ = (
+        "wiki", "article", "user", "revid", "old_revid",
+        "timestamp", "is_vandalism", "comment"
+    )
+
     def __init__(self):
-        self.db = DuckDBClient(DUCKDB_PATH)
+        self.clear()
+
+    def __len__(self) -> int:
+        return len(self.revid)
+
+    def clear(self):
+        for name in self.__slots__:
+            setattr(self, name, [])
+
+    def append(self, classified: Union[ClassifiedChange, Dict[str, Any]]) -> bool:
+        """
+        Add one classified change if it is a revert.
+
+        Args:
+            classified (ClassifiedChange | Dict): classify_record() or
+                                                  classify_change() output
+
+        Returns:
+            bool: Whether the change was kept
+        """
+
+        get = classified.get
+        revid = get("revid")
+        if not get("is_revert") or revid is None:
+            return False
+
+        self.wiki.append(get("wiki") or "")
+        self.article.append(get("article"))
+        self.user.append(get("user"))
+        self.revid.append(revid)
+        self.old_revid.append(get("old_revid"))
+        self.timestamp.append(get("timestamp"))
+        self.is_vandalism.append(get("is_vandalism_revert"))
+        self.comment.append(get("comment"))
+        return True
+
+    def extend(self, classified_changes: Iterable[Union[ClassifiedChange, Dict[str, Any]]]) -> int:
+        """Add many classified changes; returns how many were reverts."""
+        return sum(self.append(c) for c in classified_changes)
+
+    def build(self) -> pa.RecordBatch:
+        """The collected reverts as a RecordBatch with revert_events columns."""
+
+        return pa.record_batch({
+            "wiki": pa.array(self.wiki, pa.string()),
+            "article": pa.array(self.article, pa.string()),
+            "user": pa.array(self.user, pa.string()),
+            "revid": pa.array(self.revid, pa.int64()),
+            "old_revid": pa.array(self.old_revid, pa.int64()),
+            # API strings or datetimes; DuckDB casts either to TIMESTAMP
+            "timestamp": pa.array(self.timestamp),
+            "is_vandalism": pa.array(self.is_vandalism, pa.bool_()),
+            "comment": pa.array(self.comment, pa.string()),
+        })
+
+
+class RevertWriter:
+    def __init__(self, db: Optional[DuckDBClient] = None):
+        # An injected client is shared with the caller, who closes it
+        self.owns_db = db is None
+        self.db = db or DuckDBClient(DUCKDB_PATH)
 
     def write_reverts(self, classified_changes: List[Dict[str, Any]]) -> int:
         """
         Persist revert events into DuckDB.
 
         Args:
-            classified_changes (List[Dict]): Output from classify_change()
+            classified_changes (List[Dict | ClassifiedChange]): Output from
+                classify_change() or classify_record()
+
+        Returns:
+            int: Number of new revert rows written
+        """
+
+        builder = RevertBatchBuilder()
+        builder.extend(classified_changes)
+        return self.write_batch(builder.build())
+
+    def write_batch(self, batch: Union[pa.RecordBatch, pa.Table]) -> int:
+        """
+        Persist revert rows that are already in revert_events columns.
+
+        Article and user names are replaced by their ids on the way in.
+
+        Args:
+            batch (pa.RecordBatch | pa.Table): e.g. RevertBatchBuilder.build()
 
         Returns:
-            int: Number of revert rows written
+            int: Number of new revert rows written
         """
 
-        # Keep only reverts
-        revert_rows = [
-            {
-                "article": c["article"],
-                "user": c["user"],
-                "revid": c["revid"],
-                "old_revid": c["old_revid"],
-                "timestamp": c["timestamp"],
-                "is_vandalism": c["is_vandalism_revert"],
-                "comment": c["comment"],
-            }
-            for c in classified_changes
-            if c.get("is_revert")
-        ]
-
-        if not revert_rows:
+        if batch.num_rows == 0:
             logger.info("No reverts to write")
             return 0
 
-        df = pd.DataFrame(revert_rows)
-
         try:
-            self.db.insert_df("revert_events", df)
-            logger.info("Inserted %d revert events into DuckDB", len(df))
-            return len(df)
+            encoded = dimensions_for(self.db).encode(self.db, batch)
+            inserted = self.db.insert_df("revert_events", encoded, ignore_duplicates=True)
+            logger.info(
+                "Inserted %d revert events into DuckDB (%d already stored)",
+                inserted,
+                batch.num_rows - inserted
+            )
+            return inserted
 
         except Exception as e:
             logger.error("Failed to write revert events: %s", e)
             raise
 
+    def write_revert_table(self, classified: pa.Table) -> int:
+        """
+        Persist revert events from a columnar classification.
+
+        Args:
+            classified (pa.Table): Output from classify_table()
+
+        Returns:
+            int: Number of new revert rows written
+        """
+
+        return self.write_batch(revert_table(classified))
+
     def close(self):
-        self.db.close()
+        if self.owns_db:
+            self.db.close()
@@ -9,51 +9,71 @@ Rule implemented:
 - On the SAME article
 - Within a SHORT time window
 → count as ONE revert for 3RR purposes
+
+The groups are persisted in consolidated_reverts and maintained
+incrementally: only (article, user) pairs that gained revert events since
+the previous update (high-water mark on revert_events.seq) are regrouped,
+and only from the first group the new events can extend or merge into.
+The pipeline's 3RR count reads them from there (detect_three_rr(
+incremental=True, consolidated=True)), which also brings them up to date,
+so writers do not have to.
+
+Groups are keyed by wiki, article and user ids (see dimensions.py), so
+same-named articles on two wikis are never grouped together; names are
+only joined back onto the rows consolidate_reverts() returns.
+
+The window is bound as a query parameter ($consolidation_gap), taken from
+a DetectorConfig (see detector_config.py); consolidated_reverts is
+maintained with the default one.
 """
 
-from typing import List, Dict
-from datetime import timedelta
-import duckdb
+from typing import List, Dict, Optional
+from datetime import datetime, timedelta
 
 from src.config import DUCKDB_PATH
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.db.duckdb_init import CONSOLIDATED_SCHEMA, DETECTOR_STATE_SCHEMA
+from src.detection.detector_config import DEFAULT_CONFIG, DetectorConfig, check_persisted
 from src.utils.logger import get_logger
 
 logger = get_logger("consolidation")
 
 # Wikipedia commonly treats rapid consecutive reverts as one action
-CONSOLIDATION_WINDOW_MINUTES = 5
+CONSOLIDATION_WINDOW_MINUTES = DEFAULT_CONFIG.consolidation_window_minutes
 
+DETECTOR_NAME = "consolidation"
 
-def consolidate_reverts() -> List[Dict]:
+
+def _grouping_query(events: str) -> str:
     """
-    Consolidate revert events stored in DuckDB.
+    Group (wiki, article_id, user_id, timestamp) rows selected by `events`
+    into consolidated actions.
 
     Returns:
-        List[Dict]: Consolidated revert events
+        str: Query yielding (wiki, article_id, user_id, first_revert_time,
+             last_revert_time, raw_revert_count), with a $consolidation_gap
+             parameter
     """
 
-    con = duckdb.connect(DUCKDB_PATH)
-
-    query = f"""
+    return f"""
     WITH ordered AS (
         SELECT
-            article,
-            "user",
+            wiki,
+            article_id,
+            user_id,
             timestamp,
-            is_vandalism,
             LAG(timestamp) OVER (
-                PARTITION BY article, "user"
+                PARTITION BY wiki, article_id, user_id
                 ORDER BY timestamp
             ) AS prev_timestamp
-        FROM revert_events
-        WHERE is_vandalism = FALSE
+        FROM ({events})
     ),
     grouped AS (
         SELECT
             *,
             CASE
                 WHEN prev_timestamp IS NULL THEN 1
-                WHEN timestamp - prev_timestamp > INTERVAL '{CONSOLIDATION_WINDOW_MINUTES} minutes' THEN 1
+                WHEN timestamp - prev_timestamp > $consolidation_gap THEN 1
                 ELSE 0
             END AS new_group
         FROM ordered
@@ -62,25 +82,195 @@ def consolidate_reverts() -> List[Dict]:
         SELECT
             *,
             SUM(new_group) OVER (
-                PARTITION BY article, "user"
+                PARTITION BY wiki, article_id, user_id
                 ORDER BY timestamp
                 ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW
             ) AS group_id
         FROM grouped
     )
     SELECT
-        article,
-        "user",
+        wiki,
+        article_id,
+        user_id,
         MIN(timestamp) AS first_revert_time,
+        MAX(timestamp) AS last_revert_time,
         COUNT(*) AS raw_revert_count
     FROM grouped_reverts
-    GROUP BY article, "user", group_id
-    ORDER BY first_revert_time;
+    GROUP BY wiki, article_id, user_id, group_id
+    """
+
+
+# Touched pairs and the time to regroup each from (see
+# update_consolidated_reverts())
+REBUILD_QUERY = """
+CREATE OR REPLACE TEMP TABLE consolidation_rebuild AS
+WITH touched AS (
+    SELECT
+        wiki,
+        article_id,
+        user_id,
+        MIN(timestamp) AS first_new_time
+    FROM revert_events
+    WHERE seq > $high_water
+      AND seq <= $new_high_water
+      AND is_vandalism = FALSE
+    GROUP BY wiki, article_id, user_id
+)
+SELECT
+    t.wiki,
+    t.article_id,
+    t.user_id,
+    LEAST(t.first_new_time, MIN(c.first_revert_time)) AS start_time
+FROM touched t
+LEFT JOIN consolidated_reverts c
+  ON c.wiki = t.wiki
+ AND c.article_id = t.article_id
+ AND c.user_id = t.user_id
+ AND c.last_revert_time >= t.first_new_time - $consolidation_gap
+GROUP BY t.wiki, t.article_id, t.user_id, t.first_new_time
+"""
+
+REGROUP_QUERY = "INSERT INTO consolidated_reverts " + _grouping_query(
+    """
+    SELECT e.wiki, e.article_id, e.user_id, e.timestamp
+    FROM revert_events e
+    JOIN consolidation_rebuild r
+      ON e.wiki = r.wiki
+     AND e.article_id = r.article_id
+     AND e.user_id = r.user_id
+    WHERE e.is_vandalism = FALSE
+      AND e.seq <= $new_high_water
+      AND e.timestamp >= r.start_time
+    """
+)
+
+# Groups of all non-vandalism reverts at or after $since
+GROUPS_QUERY = _grouping_query(
+    """
+    SELECT wiki, article_id, user_id, timestamp
+    FROM revert_events
+    WHERE is_vandalism = FALSE
+      AND timestamp >= $since
+    """
+)
+
+
+def update_consolidated_reverts(db: Optional[DuckDBClient] = None) -> int:
+    """
+    Fold revert events added since the last update into consolidated_reverts.
+
+    New events extend a pair's open group when they fall within
+    CONSOLIDATION_WINDOW_MINUTES of it and open a new group otherwise.
+    Late arrivals may also bridge or split existing groups, so every group
+    of a touched pair that ends within the window before its earliest new
+    event (or later) is dropped and regrouped from the raw events.
+
+    Args:
+        db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                  is opened for this call if omitted.
+
+    Returns:
+        int: Number of groups (re)written
+    """
+
+    gap = DEFAULT_CONFIG.sql_params("consolidation_gap")
+
+    written = 0
+
+    with borrow_client(db, DUCKDB_PATH) as db:
+        db.execute(DETECTOR_STATE_SCHEMA)
+        db.execute(CONSOLIDATED_SCHEMA)
+
+        db.execute("BEGIN TRANSACTION")
+        try:
+            row = db.execute(
+                "SELECT high_water FROM detector_state WHERE detector = ?",
+                [DETECTOR_NAME]
+            ).fetchone()
+            high_water = row[0] if row else 0
+            new_high_water = db.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM revert_events"
+            ).fetchone()[0]
+
+            if new_high_water > high_water:
+                params = {"high_water": high_water, "new_high_water": new_high_water, **gap}
+                db.execute(REBUILD_QUERY, params)
+                db.execute(
+                    """
+                    DELETE FROM consolidated_reverts c
+                    USING consolidation_rebuild r
+                    WHERE c.wiki = r.wiki
+                      AND c.article_id = r.article_id
+                      AND c.user_id = r.user_id
+                      AND c.first_revert_time >= r.start_time
+                    """
+                )
+                written = db.execute(REGROUP_QUERY, {"new_high_water": new_high_water, **gap}).fetchone()[0]
+                db.execute("DROP TABLE consolidation_rebuild")
+                db.execute(
+                    "INSERT OR REPLACE INTO detector_state VALUES (?, ?, now())",
+                    [DETECTOR_NAME, new_high_water]
+                )
+
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+
+    logger.info("Updated %d consolidated revert groups", written)
+    return written
+
+
+# Names and fields of consolidated actions, in time order
+NAMED_GROUPS = """
+SELECT a.name, u.name, g.first_revert_time, g.raw_revert_count
+FROM ({groups}) g
+LEFT JOIN articles a ON a.article_id = g.article_id
+LEFT JOIN users u ON u.user_id = g.user_id
+ORDER BY g.first_revert_time
+"""
+
+NAMED_GROUPS_QUERY = NAMED_GROUPS.format(groups=GROUPS_QUERY)
+
+NAMED_PERSISTED_QUERY = NAMED_GROUPS.format(groups="""
+SELECT *
+FROM consolidated_reverts
+WHERE first_revert_time >= $since
+""")
+
+
+def consolidate_reverts(
+    db: Optional[DuckDBClient] = None,
+    since: Optional[datetime] = None,
+    incremental: bool = False,
+    config: DetectorConfig = DEFAULT_CONFIG
+) -> List[Dict]:
+    """
+    Consolidate revert events stored in DuckDB.
+
+    Args:
+        db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                  is opened for this call if omitted.
+        since (datetime | None): Only consider reverts at or after this time
+                                 (lets DuckDB skip older row groups).
+        incremental (bool): Bring consolidated_reverts up to date and read
+                            the groups from it instead of regrouping
+                            (default consolidation window only).
+        config (DetectorConfig): Consolidation window
+
+    Returns:
+        List[Dict]: Consolidated revert events
     """
 
     logger.info("Consolidating revert events")
-    rows = con.execute(query).fetchall()
-    con.close()
+    with borrow_client(db, DUCKDB_PATH) as db:
+        if incremental:
+            check_persisted(config, "consolidated_reverts", "consolidation_window_minutes")
+            update_consolidated_reverts(db)
+            rows = db.execute(NAMED_PERSISTED_QUERY, {"since": since or datetime.min}).fetchall()
+        else:
+            params = {"since": since or datetime.min, **config.sql_params("consolidation_gap")}
+            rows = db.execute(NAMED_GROUPS_QUERY, params).fetchall()
 
     consolidated = [
         {
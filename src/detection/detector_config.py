@@ -0,0 +1,169 @@
+"""
+detector_config.py
+
+Detection thresholds as one value object, so a run (or a grid of what-if
+runs, see evaluate_grid() in edit_war_detector.py) can use other
+thresholds without editing the detector modules.
+
+The detector modules' constants (THREE_RR_LIMIT, WINDOW_HOURS,
+MIN_REVERTS_EACH, CONSOLIDATION_WINDOW_MINUTES) are DEFAULT_CONFIG's
+values. The SQL detectors bind a config's windows and limits as query
+parameters (sql_params()), so their statement text is fixed: built once
+at import and reused by every call and daemon cycle, whatever the config.
+"""
+
+from datetime import timedelta
+from itertools import product
+from typing import Dict, List
+
+FIELDS = (
+    "three_rr_limit",
+    "three_rr_window_hours",
+    "mutual_window_hours",
+    "min_reverts_each",
+    "consolidation_window_minutes",
+)
+
+
+class DetectorConfig:
+    """
+    Thresholds of the consolidation, 3RR and mutual revert detectors.
+
+    Configs compare and hash by value, so they can key result dicts;
+    use replace() rather than assigning to a config in use.
+
+    Args:
+        three_rr_limit (int): Consolidated reverts within the window that
+                              make a 3RR case
+        three_rr_window_hours (float): Rolling 3RR window
+        mutual_window_hours (float): How close two users' reverts must be
+                                     to count towards a mutual pair
+        min_reverts_each (int): Reverts each user of a mutual pair needs
+        consolidation_window_minutes (float): Largest gap between one
+                                              user's reverts that still
+                                              makes them a single action
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(
+        self,
+        three_rr_limit: int = 3,
+        three_rr_window_hours: float = 24,
+        mutual_window_hours: float = 24,
+        min_reverts_each: int = 2,
+        consolidation_window_minutes: float = 5
+    ):
+        self.three_rr_limit = three_rr_limit
+        self.three_rr_window_hours = three_rr_window_hours
+        self.mutual_window_hours = mutual_window_hours
+        self.min_reverts_each = min_reverts_each
+        self.consolidation_window_minutes = consolidation_window_minutes
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, f) for f in FIELDS)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DetectorConfig):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self) -> int:
+        return hash(self._values())
+
+    def __repr__(self) -> str:
+        return "DetectorConfig(" + ", ".join(f"{f}={getattr(self, f)!r}" for f in FIELDS) + ")"
+
+    def __getstate__(self):
+        return self._values()
+
+    def __setstate__(self, values):
+        for field, value in zip(FIELDS, values):
+            setattr(self, field, value)
+
+    def replace(self, **changes) -> "DetectorConfig":
+        """A copy with some thresholds changed."""
+
+        values = dict(zip(FIELDS, self._values()))
+        values.update(changes)
+        return DetectorConfig(**values)
+
+    @property
+    def three_rr_window(self) -> timedelta:
+        return timedelta(hours=self.three_rr_window_hours)
+
+    @property
+    def mutual_window(self) -> timedelta:
+        return timedelta(hours=self.mutual_window_hours)
+
+    @property
+    def consolidation_gap(self) -> timedelta:
+        return timedelta(minutes=self.consolidation_window_minutes)
+
+    def sql_params(self, *names: str) -> Dict:
+        """
+        Named query parameters of this config (windows as INTERVALs).
+
+        DuckDB rejects parameters a statement doesn't use, so callers name
+        the ones theirs does: three_rr_limit, three_rr_window,
+        mutual_window, min_reverts_each, consolidation_gap.
+        """
+
+        available = {
+            "three_rr_limit": self.three_rr_limit,
+            "three_rr_window": self.three_rr_window,
+            "mutual_window": self.mutual_window,
+            "min_reverts_each": self.min_reverts_each,
+            "consolidation_gap": self.consolidation_gap,
+        }
+        return {name: available[name] for name in names}
+
+
+# Conservative defaults; Wikipedia commonly treats rapid consecutive
+# reverts (within 5 minutes) as one action
+DEFAULT_CONFIG = DetectorConfig()
+
+
+def check_persisted(config: DetectorConfig, table: str, *fields: str):
+    """
+    Raise ValueError if `config` differs from DEFAULT_CONFIG in `fields`.
+
+    The incrementally maintained tables (consolidated_reverts,
+    three_rr_incidents, consolidated_three_rr_incidents) are built with
+    the default thresholds; other thresholds have to be evaluated from the
+    raw revert events.
+    """
+
+    changed = [f for f in fields if getattr(config, f) != getattr(DEFAULT_CONFIG, f)]
+    if changed:
+        raise ValueError(
+            f"{table} is maintained with the default {', '.join(changed)}; "
+            "run without incremental/consolidated to use other thresholds"
+        )
+
+
+def threshold_grid(base: DetectorConfig = DEFAULT_CONFIG, **values) -> List[DetectorConfig]:
+    """
+    Every combination of the given threshold values, other thresholds
+    taken from `base`.
+
+    Example:
+        threshold_grid(three_rr_window_hours=(12, 24, 48), three_rr_limit=(3, 4))
+
+    Args:
+        base (DetectorConfig): Values of the thresholds not varied
+        **values: Field name -> values to try
+
+    Returns:
+        List[DetectorConfig]: One config per combination
+    """
+
+    unknown = set(values) - set(FIELDS)
+    if unknown:
+        raise TypeError(f"Unknown detector thresholds: {', '.join(sorted(unknown))}")
+
+    names = list(values)
+    return [
+        base.replace(**dict(zip(names, combination)))
+        for combination in product(*(values[n] for n in names))
+    ]
@@ -0,0 +1,451 @@
+"""
+edit_war_detector.py
+
+Fused detection pass: consolidation, 3RR and mutual reverts from ONE scan.
+
+The standalone detectors each re-read and re-filter revert_events. Here
+the non-vandalism reverts in the look-back window are read once, ordered
+by wiki, article then time, and each article's events are walked once
+(articles of different wikis apart, even where their ids match) to build
+the shared intermediate — the consolidated revert actions
+(see consolidation.py) — from which:
+
+- 3RR counts are taken over consolidated actions (rapid consecutive
+  reverts by one user count once, as Wikipedia policy intends)
+- mutual revert pairs are swept over the same article's events
+  (see mutual_revert_detector.py), skipping users whose revert count
+  rules them out of any pair
+
+With three_rr=False only the mutual sweep runs; detect() in main.py
+takes 3RR from the incrementally maintained consolidated actions instead
+(detect_three_rr(incremental=True, consolidated=True)), so per cycle only
+the mutual side scans the whole look-back window.
+
+Thresholds come from a DetectorConfig (see detector_config.py).
+evaluate_grid() runs several configs off the same scan, sharing the work
+between configs with equal windows, for what-if comparisons.
+
+The pass runs on article and user ids; names are joined back onto the
+returned rows only, as a final "names" stage. Per-stage wall-clock
+timings are returned alongside the results.
+"""
+
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import chain, groupby
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.config import DUCKDB_PATH
+from src.db.dimensions import lookup_names
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.detection.detector_config import DEFAULT_CONFIG, DetectorConfig
+from src.detection.mutual_revert_detector import (
+    _fetch_batches,
+    _name_key,
+    _sweep_article,
+    name_mutual_rows,
+)
+from src.utils.logger import get_logger
+
+logger = get_logger("edit_war_detector")
+
+_SCAN = """
+SELECT
+    wiki,
+    article_id,
+    user_id,
+    timestamp
+FROM revert_events
+WHERE is_vandalism = FALSE
+  AND timestamp >= ?{wiki}
+ORDER BY wiki, article_id, timestamp, revid
+"""
+
+SCAN_QUERY = _SCAN.format(wiki="")
+
+# The same, for one wiki's reverts (evaluate_grid(wiki=...))
+WIKI_SCAN_QUERY = _SCAN.format(wiki="\n  AND wiki = ?")
+
+STAGES = ("scan", "consolidate", "three_rr", "mutual")
+
+
+def _consolidate_article(
+    article: int,
+    events: List[Tuple[int, datetime]],
+    gap: timedelta
+) -> Dict[int, List[List]]:
+    """
+    Consolidated actions for one article's time-ordered (user, timestamp) events.
+
+    Returns:
+        Dict[int, List[List]]: user -> [article, user, first_revert_time,
+                               last_revert_time, raw_revert_count] per action,
+                               in time order
+    """
+
+    by_user = {}
+
+    for user, ts in events:
+        groups = by_user.get(user)
+        if groups is None:
+            groups = by_user[user] = []
+        elif ts - groups[-1][3] <= gap:
+            group = groups[-1]
+            group[3] = ts
+            group[4] += 1
+            continue
+        groups.append([article, user, ts, ts, 1])
+
+    return by_user
+
+
+def _three_rr_article(
+    wiki: str,
+    by_user: Dict[int, List[List]],
+    window: timedelta,
+    limit: int
+) -> List[Tuple]:
+    """
+    3RR rows for one wiki article's consolidated actions.
+
+    Returns:
+        List[Tuple]: (wiki, article, user, last_revert_time, revert_count)
+                     for users whose actions reach `limit` within `window`
+    """
+
+    found = []
+
+    for user, groups in by_user.items():
+        if len(groups) < limit:
+            continue
+
+        max_count = 0
+        first = 0
+        for last, group in enumerate(groups):
+            while group[2] - groups[first][2] > window:
+                first += 1
+            max_count = max(max_count, last - first + 1)
+
+        if max_count >= limit:
+            found.append((wiki, group[0], user, group[3], max_count))
+
+    return found
+
+
+def scan_edit_wars_grid(
+    db: DuckDBClient,
+    configs: Iterable[DetectorConfig],
+    since: Optional[datetime] = None,
+    wiki: Optional[str] = None,
+    three_rr: bool = True
+) -> Dict[DetectorConfig, Dict]:
+    """
+    The fused pass for several threshold configs, from one scan.
+
+    Each article's events are read once. They are consolidated once per
+    distinct consolidation window, counted for 3RR once per (consolidation
+    window, 3RR window) at the lowest limit of those configs, and swept
+    for mutual pairs once per mutual window at the lowest reverts-each of
+    those configs; each config then keeps the rows that meet its own
+    thresholds.
+
+    Args:
+        db (DuckDBClient): Open client
+        configs (Iterable[DetectorConfig]): Thresholds to evaluate
+        since (datetime | None): Only consider reverts at or after this time
+        wiki (str | None): Only consider this wiki's reverts
+        three_rr (bool): Consolidate and count 3RR; False runs the mutual
+                         sweep only (no consolidated actions or 3RR rows)
+
+    Returns:
+        Dict[DetectorConfig, Dict]: scan_edit_wars() output per config;
+                                    the timings are those of the whole pass
+    """
+
+    configs = list(dict.fromkeys(configs))
+    timings = {stage: 0.0 for stage in STAGES}
+
+    # [(consolidation window, gap, [(3RR window, lowest limit, configs)])],
+    # empty for a mutual-only pass
+    three_rr_plan = []
+    gaps = dict.fromkeys(c.consolidation_window_minutes for c in configs) if three_rr else {}
+    for minutes in gaps:
+        same_gap = [c for c in configs if c.consolidation_window_minutes == minutes]
+        windows = []
+        for hours in dict.fromkeys(c.three_rr_window_hours for c in same_gap):
+            group = [c for c in same_gap if c.three_rr_window_hours == hours]
+            windows.append((timedelta(hours=hours), min(c.three_rr_limit for c in group), group))
+        three_rr_plan.append((minutes, timedelta(minutes=minutes), windows))
+
+    # [(mutual window, lowest reverts each, configs)]
+    mutual_plan = []
+    for hours in dict.fromkeys(c.mutual_window_hours for c in configs):
+        group = [c for c in configs if c.mutual_window_hours == hours]
+        mutual_plan.append((timedelta(hours=hours), min(c.min_reverts_each for c in group), group))
+
+    consolidated = {minutes: [] for minutes, _, _ in three_rr_plan}
+    incidents = {config: [] for config in configs}
+    mutual = {config: [] for config in configs}
+    event_count = 0
+
+    start = time.perf_counter()
+    if wiki is None:
+        cursor = db.execute(SCAN_QUERY, [since or datetime.min])
+    else:
+        cursor = db.execute(WIKI_SCAN_QUERY, [since or datetime.min, wiki])
+    articles = groupby(_fetch_batches(cursor), key=itemgetter(0, 1))
+    timings["scan"] += time.perf_counter() - start
+
+    while True:
+        start = time.perf_counter()
+        (wiki, article), group = next(articles, ((None, None), None))
+        if group is None:
+            timings["scan"] += time.perf_counter() - start
+            break
+        events = [(r[2], r[3]) for r in group]
+        event_count += len(events)
+        timings["scan"] += time.perf_counter() - start
+
+        for minutes, gap, windows in three_rr_plan:
+            start = time.perf_counter()
+            by_user = _consolidate_article(article, events, gap)
+            for groups in by_user.values():
+                consolidated[minutes].extend(groups)
+            timings["consolidate"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            for window, least, window_configs in windows:
+                found = _three_rr_article(wiki, by_user, window, least)
+                if not found:
+                    continue
+                for config in window_configs:
+                    limit = config.three_rr_limit
+                    incidents[config].extend(found if limit == least else [r for r in found if r[4] >= limit])
+            timings["three_rr"] += time.perf_counter() - start
+
+        # A pair needs two users with min_reverts_each reverts each;
+        # other users cannot be part of one, so they are left out
+        start = time.perf_counter()
+        reverts = Counter(user for user, _ in events)
+        for window, least, window_configs in mutual_plan:
+            eligible = {user for user, count in reverts.items() if count >= least}
+            if len(eligible) < 2:
+                continue
+            swept = events if len(eligible) == len(reverts) else [e for e in events if e[0] in eligible]
+            found = _sweep_article(wiki, article, swept, window, least)
+            if not found:
+                continue
+            for config in window_configs:
+                need = config.min_reverts_each
+                mutual[config].extend(found if need == least else [r for r in found if min(r[4], r[5]) >= need])
+        timings["mutual"] += time.perf_counter() - start
+
+    results = {}
+    for config in configs:
+        actions = consolidated.get(config.consolidation_window_minutes, [])
+        results[config] = {
+            "consolidated": actions,
+            "three_rr": incidents[config],
+            "mutual": mutual[config],
+            "event_count": event_count,
+            "consolidated_count": len(actions),
+            "timings": dict(timings),
+        }
+    return results
+
+
+def scan_edit_wars(
+    db: DuckDBClient,
+    since: Optional[datetime] = None,
+    config: DetectorConfig = DEFAULT_CONFIG,
+    three_rr: bool = True
+) -> Dict:
+    """
+    The fused pass on ids: what detect_edit_wars() returns, before names.
+
+    Returns:
+        Dict: {
+            "consolidated": [article_id, user_id, first_revert_time,
+                             last_revert_time, raw_revert_count] per action,
+            "three_rr": (wiki, article_id, user_id, last_revert_time,
+                         revert_count),
+            "mutual": (wiki, article_id, user_a_id, user_b_id, reverts_a,
+                       reverts_b, last_interaction),
+            "event_count", "consolidated_count" and "timings" as in
+            detect_edit_wars() (without "names")
+        }
+        Rows are in scan order; name_edit_wars() sorts them.
+    """
+
+    return scan_edit_wars_grid(db, [config], since, three_rr=three_rr)[config]
+
+
+def name_edit_wars(db: DuckDBClient, scanned: Dict) -> Dict:
+    """
+    Join names onto scan_edit_wars() output and order it.
+
+    Rows are ordered by time (three_rr and mutual most recent first), ties
+    in article name order and then in scan order, so the result does not
+    depend on how ids were assigned or how the scan was split into shards.
+
+    Returns:
+        Dict: detect_edit_wars() output; timings gain a "names" stage
+    """
+
+    start = time.perf_counter()
+
+    actions = scanned["consolidated"]
+    three_rr = scanned["three_rr"]
+    articles = lookup_names(db, "articles", chain((g[0] for g in actions), (r[1] for r in three_rr)))
+    users = lookup_names(db, "users", chain((g[1] for g in actions), (r[2] for r in three_rr)))
+
+    consolidated = [
+        {
+            "article": articles.get(g[0]),
+            "user": users.get(g[1]),
+            "timestamp": g[2],
+            "raw_revert_count": g[4],
+        }
+        for g in actions
+    ]
+    consolidated.sort(key=lambda c: _name_key(c["article"]))
+    consolidated.sort(key=itemgetter("timestamp"))
+
+    incidents = [
+        {
+            "wiki": r[0],
+            "article": articles.get(r[1]),
+            "user": users.get(r[2]),
+            "last_revert_time": r[3],
+            "revert_count": r[4],
+        }
+        for r in three_rr
+    ]
+    incidents.sort(key=lambda c: _name_key(c["article"]))
+    incidents.sort(key=itemgetter("last_revert_time"), reverse=True)
+
+    mutual = [
+        {
+            "wiki": r[0],
+            "article": r[1],
+            "user_a": r[2],
+            "user_b": r[3],
+            "reverts_user_a": r[4],
+            "reverts_user_b": r[5],
+            "last_interaction": r[6],
+        }
+        for r in name_mutual_rows(db, scanned["mutual"])
+    ]
+
+    timings = dict(scanned["timings"])
+    timings["names"] = time.perf_counter() - start
+
+    return {
+        "consolidated": consolidated,
+        "three_rr": incidents,
+        "mutual": mutual,
+        "event_count": scanned["event_count"],
+        "consolidated_count": scanned["consolidated_count"],
+        "timings": timings,
+    }
+
+
+def detect_edit_wars(
+    db: Optional[DuckDBClient] = None,
+    since: Optional[datetime] = None,
+    consolidated: bool = True,
+    config: DetectorConfig = DEFAULT_CONFIG,
+    three_rr: bool = True
+) -> Dict:
+    """
+    Run consolidation, 3RR and mutual revert detection from a single scan.
+
+    Args:
+        db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                  is opened for this call if omitted.
+        since (datetime | None): Only consider reverts at or after this time.
+        consolidated (bool): Also return the consolidated actions; naming
+                             them costs more than the incidents (the counts
+                             are always set)
+        config (DetectorConfig): Thresholds and windows
+        three_rr (bool): Consolidate and count 3RR; False detects mutual
+                         reverts only (no consolidated actions or 3RR cases)
+
+    Returns:
+        Dict: {
+            "consolidated": consolidated revert actions,
+            "three_rr": 3RR incidents (counted over consolidated actions),
+            "mutual": mutual revert incidents,
+            "event_count": revert events scanned,
+            "consolidated_count": number of consolidated actions,
+            "timings": seconds spent per stage (scan, consolidate,
+                       three_rr, mutual, names)
+        }
+    """
+
+    logger.info("Detecting edit wars (fused pass)")
+    with borrow_client(db, DUCKDB_PATH) as db:
+        scanned = scan_edit_wars(db, since, config, three_rr)
+        if not consolidated:
+            scanned["consolidated"] = []
+        results = name_edit_wars(db, scanned)
+
+    timings = results["timings"]
+    logger.info(
+        "Fused pass: %d revert groups, %d possible 3RR cases, %d mutual revert cases "
+        "(scan %.3fs, consolidate %.3fs, 3RR %.3fs, mutual %.3fs, names %.3fs)",
+        results["consolidated_count"],
+        len(results["three_rr"]),
+        len(results["mutual"]),
+        timings["scan"],
+        timings["consolidate"],
+        timings["three_rr"],
+        timings["mutual"],
+        timings["names"],
+    )
+    return results
+
+
+def evaluate_grid(
+    configs: Iterable[DetectorConfig],
+    db: Optional[DuckDBClient] = None,
+    since: Optional[datetime] = None,
+    wiki: Optional[str] = None,
+    consolidated: bool = False
+) -> Dict[DetectorConfig, Dict]:
+    """
+    What-if evaluation: detect_edit_wars() for each config, from one scan.
+
+    Args:
+        configs (Iterable[DetectorConfig]): Thresholds to compare, e.g.
+                                            from threshold_grid()
+        db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                  is opened for this call if omitted.
+        since (datetime | None): Only consider reverts at or after this time.
+        wiki (str | None): Only consider this wiki's reverts (per-wiki tuning)
+        consolidated (bool): Also return each config's consolidated actions
+
+    Returns:
+        Dict[DetectorConfig, Dict]: detect_edit_wars() output per config, in
+                                    the order the configs were given
+    """
+
+    logger.info("Evaluating detector thresholds (fused pass)")
+    start = time.perf_counter()
+    with borrow_client(db, DUCKDB_PATH) as db:
+        scanned = scan_edit_wars_grid(db, configs, since, wiki)
+        results = {}
+        for config, rows in scanned.items():
+            if not consolidated:
+                rows["consolidated"] = []
+            results[config] = name_edit_wars(db, rows)
+
+    logger.info(
+        "Evaluated %d threshold configs over %d revert events (%.3fs)",
+        len(results),
+        next(iter(results.values()))["event_count"] if results else 0,
+        time.perf_counter() - start
+    )
+    return results
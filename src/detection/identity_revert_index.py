@@ -0,0 +1,199 @@
+"""
+identity_revert_index.py
+
+Detects identity reverts from revision content hashes.
+
+An edit that restores an article to exactly the content of an earlier
+revision is a revert whatever its edit summary says, so manual reverts
+with empty or unhelpful summaries are caught too. recentchanges already
+returns each revision's sha1 (rcprop=sha1), so no extra API requests are
+needed: the index only remembers, per article, the hashes of its last
+IDENTITY_INDEX_DEPTH revisions.
+
+Memory is bounded by keeping at most IDENTITY_INDEX_MAX_ARTICLES articles,
+dropping the least recently edited first; hashes are stored as 20 raw
+bytes. Every observed hash is also written to revision_hashes, so an
+evicted article (or a restarted process) reloads its recent hashes from
+DuckDB in one query per page of changes.
+
+An edit matching its own parent is a null edit, not a revert, and is
+ignored.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from src.config import IDENTITY_INDEX_DEPTH, IDENTITY_INDEX_MAX_ARTICLES
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import REVISION_HASH_SCHEMA
+from src.utils.logger import get_logger
+
+logger = get_logger("identity_revert_index")
+
+_Key = Tuple[str, str]
+
+
+def _digest(sha1: Optional[str]) -> Optional[bytes]:
+    if not sha1:
+        return None
+    try:
+        return bytes.fromhex(sha1)
+    except ValueError:
+        return None
+
+
+class IdentityRevertIndex:
+    """
+    Per-article LRU of recent revision hashes.
+
+    Args:
+        max_articles (int): Articles kept in memory
+        depth (int): Recent revisions remembered per article
+    """
+
+    def __init__(
+        self,
+        max_articles: int = IDENTITY_INDEX_MAX_ARTICLES,
+        depth: int = IDENTITY_INDEX_DEPTH
+    ):
+        self.max_articles = max_articles
+        self.depth = depth
+        # (wiki, article) -> {sha1 digest: revid}, oldest revision first
+        self._articles: "OrderedDict[_Key, Dict[bytes, int]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def _load(self, db: DuckDBClient, keys: List[_Key]):
+        """Reload the recent hashes of articles not in memory."""
+
+        db.execute(REVISION_HASH_SCHEMA)
+
+        wanted = pa.table({
+            "wiki": [k[0] for k in keys],
+            "article": [k[1] for k in keys],
+        })
+        db.con.register("identity_index_keys", wanted)
+        try:
+            rows = db.execute(
+                """
+                SELECT h.wiki, h.article, h.sha1, h.revid
+                FROM revision_hashes h
+                JOIN identity_index_keys k
+                  ON h.wiki = k.wiki
+                 AND h.article = k.article
+                QUALIFY ROW_NUMBER() OVER (
+                    PARTITION BY h.wiki, h.article
+                    ORDER BY h.revid DESC
+                ) <= ?
+                ORDER BY h.revid
+                """,
+                [self.depth]
+            ).fetchall()
+        finally:
+            db.con.unregister("identity_index_keys")
+
+        for key in keys:
+            self._articles[key] = {}
+        for wiki, article, sha1, revid in rows:
+            self._articles[(wiki, article)][bytes(sha1)] = revid
+
+    def _evict(self):
+        while len(self._articles) > self.max_articles:
+            self._articles.popitem(last=False)
+
+    def observe_page(
+        self,
+        changes: List[Dict],
+        db: Optional[DuckDBClient] = None
+    ) -> List[Optional[int]]:
+        """
+        Record a page of changes (oldest first) and find identity reverts.
+
+        Args:
+            changes (List[Dict]): Recent changes with wiki, title, revid,
+                                  old_revid, timestamp and sha1
+            db (DuckDBClient | None): Backing store; memory-only if omitted
+
+        Returns:
+            List[Optional[int]]: Per change, the earlier revid whose content
+                                 it restores, or None
+        """
+
+        keys = [(c.get("wiki") or "", c.get("title")) for c in changes]
+        if db is not None:
+            missing = list(dict.fromkeys(k for k in keys if k not in self._articles))
+            if missing:
+                self._load(db, missing)
+
+        restored = []
+        persisted = []
+
+        for change, key in zip(changes, keys):
+            digest = _digest(change.get("sha1"))
+            revid = change.get("revid")
+            if digest is None or revid is None:
+                restored.append(None)
+                continue
+
+            hashes = self._articles.get(key)
+            if hashes is None:
+                hashes = self._articles[key] = {}
+            else:
+                self._articles.move_to_end(key)
+
+            match = hashes.get(digest)
+            is_revert = match is not None and match not in (revid, change.get("old_revid"))
+            restored.append(match if is_revert else None)
+
+            # Re-insert so the dict stays ordered oldest to newest revision
+            hashes.pop(digest, None)
+            hashes[digest] = revid
+            while len(hashes) > self.depth:
+                del hashes[next(iter(hashes))]
+
+            persisted.append((key[0], key[1], revid, digest, change.get("timestamp")))
+
+        self._evict()
+
+        if db is not None and persisted:
+            wiki, article, revids, digests, timestamps = zip(*persisted)
+            db.insert_df(
+                "revision_hashes",
+                pa.table({
+                    "wiki": pa.array(wiki, pa.string()),
+                    "article": pa.array(article, pa.string()),
+                    "revid": pa.array(revids, pa.int64()),
+                    "sha1": pa.array(digests, pa.binary()),
+                    "timestamp": pa.array(timestamps, pa.string()),
+                }),
+                ignore_duplicates=True
+            )
+
+        found = sum(r is not None for r in restored)
+        if found:
+            logger.info("Found %d identity reverts by content hash", found)
+        return restored
+
+
+def mark_identity_reverts(classified: pa.Table, restored: List[Optional[int]]) -> pa.Table:
+    """
+    Flag identity reverts as reverts in classify_table() output.
+
+    Args:
+        classified (pa.Table): classify_table() output for a page
+        restored (List[Optional[int]]): IdentityRevertIndex.observe_page()
+                                        output for the same page
+
+    Returns:
+        pa.Table: `classified` with is_revert also set for identity reverts
+    """
+
+    identity = pc.is_valid(pa.array(restored, pa.int64()))
+    is_revert = pc.or_(pc.fill_null(classified["is_revert"], False), identity)
+    return classified.set_column(
+        classified.column_names.index("is_revert"), "is_revert", is_revert
+    )
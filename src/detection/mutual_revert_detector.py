@@ -8,88 +8,233 @@ Definition used:
 - Reverting on the SAME article
 - Within a rolling time window
 - Each user has reverted at least MIN_REVERTS times
+
+A user's revert counts towards a pair when the other user reverted the
+same article within WINDOW_HOURS of it (before or after).
+
+Each article's time-ordered reverts are swept once in each direction with
+a sliding window that only holds the users active within it, so the cost
+is linear in the number of reverts (times the number of users active at
+once) instead of quadratic per hot article.
+
+The sweep runs on article and user ids, each wiki's articles apart;
+names are looked up for the pairs found only (name_mutual_rows()).
 """
 
-from typing import List, Dict
-import duckdb
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from src.config import DUCKDB_PATH
+from src.db.dimensions import lookup_names
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.detection.detector_config import DEFAULT_CONFIG, DetectorConfig
 from src.utils.logger import get_logger
 
 logger = get_logger("mutual_revert_detector")
 
-WINDOW_HOURS = 24
-MIN_REVERTS_EACH = 2  # conservative default
+WINDOW_HOURS = DEFAULT_CONFIG.mutual_window_hours
+MIN_REVERTS_EACH = DEFAULT_CONFIG.min_reverts_each  # conservative default
+
+FETCH_BATCH_SIZE = 10_000
+
+
+def _partners_within(
+    events: List[Tuple[str, datetime]],
+    window: timedelta,
+    reverse: bool
+) -> Iterator[Set[str]]:
+    """
+    One sweep over time-ordered (user, timestamp) events.
+
+    Yields, for each event in sweep order, the other users whose most recent
+    revert (in sweep direction) lies within `window` of it.
+    """
+
+    # user -> timestamp of their latest event in sweep order, kept in
+    # insertion order so expired users are always at the front
+    active = OrderedDict()
+
+    for user, ts in (reversed(events) if reverse else events):
+        while active:
+            oldest_user, oldest_ts = next(iter(active.items()))
+            if abs(ts - oldest_ts) <= window:
+                break
+            del active[oldest_user]
+
+        yield {u for u in active if u != user}
+
+        active[user] = ts
+        active.move_to_end(user)
+
+
+def _sweep_article(
+    wiki: str,
+    article: str,
+    events: List[Tuple[str, datetime]],
+    window: timedelta,
+    min_reverts_each: int
+) -> List[Tuple]:
+    """Mutual revert rows for one wiki article's time-ordered (user, timestamp) events."""
+
+    forward = list(_partners_within(events, window, reverse=False))
+    backward = list(_partners_within(events, window, reverse=True))
+    backward.reverse()
+
+    # (user_a, user_b) -> [reverts_a, reverts_b, last_interaction]
+    pairs = defaultdict(lambda: [0, 0, None])
+
+    for (user, ts), before, after in zip(events, forward, backward):
+        for other in before | after:
+            if user < other:
+                stats = pairs[(user, other)]
+                stats[0] += 1
+            else:
+                stats = pairs[(other, user)]
+                stats[1] += 1
+            if stats[2] is None or ts > stats[2]:
+                stats[2] = ts
+
+    # Sorted by pair, so ties in the final ordering don't depend on set order
+    return [
+        (wiki, article, user_a, user_b, reverts_a, reverts_b, last_interaction)
+        for (user_a, user_b), (reverts_a, reverts_b, last_interaction) in sorted(pairs.items())
+        if reverts_a >= min_reverts_each and reverts_b >= min_reverts_each
+    ]
+
+
+def find_mutual_reverts(
+    rows: Iterable[Tuple],
+    window_hours: float = WINDOW_HOURS,
+    min_reverts_each: int = MIN_REVERTS_EACH,
+    by_wiki: bool = False
+) -> List[Tuple]:
+    """
+    Sweep (article, user, timestamp) rows sorted by article, then timestamp.
+
+    Args:
+        rows (Iterable[Tuple]): Reverts to sweep
+        window_hours (float): How close two users' reverts must be
+        min_reverts_each (int): Reverts each user of a pair needs
+        by_wiki (bool): Rows are (wiki, article, user, timestamp), sorted
+                        by wiki first; same article ids on different wikis
+                        are swept apart. Otherwise all rows are one wiki's
+                        (wiki "")
+
+    Returns:
+        List[Tuple]: (wiki, article, user_a, user_b, reverts_a, reverts_b,
+                      last_interaction), most recent interaction first
+    """
+
+    window = timedelta(hours=window_hours)
+    found = []
+
+    for key, group in groupby(rows, key=itemgetter(0, 1) if by_wiki else itemgetter(0)):
+        wiki, article = key if by_wiki else ("", key)
+        events = [(r[-2], r[-1]) for r in group]
+        found.extend(_sweep_article(wiki, article, events, window, min_reverts_each))
 
+    found.sort(key=itemgetter(6), reverse=True)
+    return found
 
-def detect_mutual_reverts() -> List[Dict]:
+
+def _name_key(name: Optional[str]) -> Tuple[bool, str]:
+    # Missing names sort last, as NULLs do in SQL
+    return name is None, name or ""
+
+
+def name_mutual_rows(db: DuckDBClient, rows: List[Tuple]) -> List[Tuple]:
+    """
+    Replace the ids in mutual revert rows with names.
+
+    Each pair is reordered so user_a is the name that sorts first, and
+    rows are ordered by most recent interaction, ties by article, pair
+    and wiki.
+
+    Args:
+        db (DuckDBClient): Database the ids belong to
+        rows (List[Tuple]): (wiki, article_id, user_a_id, user_b_id,
+                            reverts_a, reverts_b, last_interaction)
+
+    Returns:
+        List[Tuple]: Same rows with names
+    """
+
+    articles = lookup_names(db, "articles", (r[1] for r in rows))
+    users = lookup_names(db, "users", (u for r in rows for u in r[2:4]))
+
+    named = []
+    for wiki, article_id, a, b, reverts_a, reverts_b, last_interaction in rows:
+        user_a, user_b = users.get(a), users.get(b)
+        if _name_key(user_b) < _name_key(user_a):
+            user_a, user_b, reverts_a, reverts_b = user_b, user_a, reverts_b, reverts_a
+        named.append((wiki, articles.get(article_id), user_a, user_b, reverts_a, reverts_b, last_interaction))
+
+    named.sort(key=lambda r: (_name_key(r[1]), _name_key(r[2]), _name_key(r[3]), r[0]))
+    named.sort(key=itemgetter(6), reverse=True)
+    return named
+
+
+def _fetch_batches(cursor) -> Iterator[Tuple]:
+    while True:
+        batch = cursor.fetchmany(FETCH_BATCH_SIZE)
+        if not batch:
+            return
+        yield from batch
+
+
+def detect_mutual_reverts(
+    db: Optional[DuckDBClient] = None,
+    since: Optional[datetime] = None,
+    config: DetectorConfig = DEFAULT_CONFIG
+) -> List[Dict]:
     """
     Detect mutual revert edit wars.
 
+    Args:
+        db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                  is opened for this call if omitted.
+        since (datetime | None): Only consider reverts at or after this time
+                                 (lets DuckDB skip older row groups).
+        config (DetectorConfig): Window and reverts needed per user
+
     Returns:
         List[Dict]: Detected mutual revert incidents
     """
 
-    con = duckdb.connect(DUCKDB_PATH)
-
-    query = f"""
-    WITH base AS (
-        SELECT
-            article,
-            "user",
-            timestamp
-        FROM revert_events
-        WHERE is_vandalism = FALSE
-    ),
-    pairs AS (
-        SELECT
-            a.article AS article,
-            a."user" AS user_a,
-            b."user" AS user_b,
-            a.timestamp AS ts_a,
-            b.timestamp AS ts_b
-        FROM base a
-        JOIN base b
-          ON a.article = b.article
-         AND a."user" < b."user"
-         AND ABS(EPOCH(a.timestamp) - EPOCH(b.timestamp)) <= {WINDOW_HOURS} * 3600
-    ),
-    counts AS (
-        SELECT
-            article,
-            user_a,
-            user_b,
-            COUNT(*) FILTER (WHERE ts_a IS NOT NULL) AS reverts_a,
-            COUNT(*) FILTER (WHERE ts_b IS NOT NULL) AS reverts_b,
-            MAX(GREATEST(ts_a, ts_b)) AS last_interaction
-        FROM pairs
-        GROUP BY article, user_a, user_b
-    )
+    query = """
     SELECT
-        article,
-        user_a,
-        user_b,
-        reverts_a,
-        reverts_b,
-        last_interaction
-    FROM counts
-    WHERE reverts_a >= {MIN_REVERTS_EACH}
-      AND reverts_b >= {MIN_REVERTS_EACH}
-    ORDER BY last_interaction DESC;
+        wiki,
+        article_id,
+        user_id,
+        timestamp
+    FROM revert_events
+    WHERE is_vandalism = FALSE
+      AND timestamp >= ?
+    ORDER BY wiki, article_id, timestamp
     """
 
     logger.info("Detecting mutual revert edit wars")
-    rows = con.execute(query).fetchall()
-    con.close()
+    with borrow_client(db, DUCKDB_PATH) as db:
+        rows = find_mutual_reverts(
+            _fetch_batches(db.execute(query, [since or datetime.min])),
+            window_hours=config.mutual_window_hours,
+            min_reverts_each=config.min_reverts_each,
+            by_wiki=True
+        )
+        rows = name_mutual_rows(db, rows)
 
     results = [
         {
-            "article": r[0],
-            "user_a": r[1],
-            "user_b": r[2],
-            "reverts_user_a": r[3],
-            "reverts_user_b": r[4],
-            "last_interaction": r[5],
+            "wiki": r[0],
+            "article": r[1],
+            "user_a": r[2],
+            "user_b": r[3],
+            "reverts_user_a": r[4],
+            "reverts_user_b": r[5],
+            "last_interaction": r[6],
         }
         for r in rows
     ]
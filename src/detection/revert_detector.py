@@ -7,12 +7,32 @@ Responsible for classifying edits as:
 - normal edit
 
 This module does NOT touch the database.
-It only analyzes a single recentchanges item and returns structured results.
+It only analyzes recentchanges items and returns structured results.
+
+All keyword sets are compiled once into a single KeywordMatcher, so each
+comment and tag list is lower-cased and scanned once per change, and
+classify_changes() scans a whole batch of comments in one pass.
+classify_table() is the columnar equivalent for Arrow tables and
+DataFrames, evaluated with vectorized Arrow string kernels.
+classify_record() returns a compact slotted ClassifiedChange instead of a
+dict, for paths that hold many classified changes at once.
 """
 
-from typing import Dict, Any
+import logging
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import TYPE_CHECKING, Dict, Any, FrozenSet, Iterable, Iterator, List, Mapping, Tuple, Union
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.config import KEYWORD_WORD_BOUNDARY
 from src.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 logger = get_logger("revert_detector")
 
 # Strong revert indicators from tags (high confidence)
@@ -47,12 +67,160 @@ VANDALISM_KEYWORDS = (
 )
 
 
-def _contains_keyword(text: str, keywords: tuple[str, ...]) -> bool:
-    """Case-insensitive keyword check."""
-    if not text:
-        return False
-    text = text.lower()
-    return any(k in text for k in keywords)
+def _lower(text: str) -> str:
+    """
+    Lower-case text as utf8_lower() does for classify_table(): str.lower()
+    turns U+0130 into "i" plus a combining dot, which would end the word
+    before a keyword that follows.
+    """
+
+    if "\u0130" in text:
+        text = text.replace("\u0130", "i")
+    return text.lower()
+
+
+class KeywordMatcher:
+    """
+    Match several labelled keyword sets against text in one pass.
+
+    Keywords are grouped into families sharing a root keyword that is a
+    prefix of all of them ("revert" -> "revert", "reverted",
+    "reverted vandalism"). Each root is located with str.find, which
+    scans at C speed, and only at its hits are the longer family members
+    checked. Every occurrence of every keyword is found, including
+    overlapping ones, and text is lower-cased once.
+
+    With word_boundary, keywords only match at the start of a word
+    (so "rv" does not match "survey").
+    """
+
+    def __init__(
+        self,
+        keyword_sets: Mapping[str, Tuple[str, ...]],
+        word_boundary: bool = False
+    ):
+        # Label sets are tracked as bitmasks while scanning
+        self.label_names = tuple(keyword_sets)
+        self.masks = {}
+        for bit, keywords in enumerate(keyword_sets.values()):
+            for k in keywords:
+                self.masks[k.lower()] = self.masks.get(k.lower(), 0) | (1 << bit)
+
+        keywords = sorted(self.masks)
+        roots = [
+            k for k in keywords
+            if not any(k != other and k.startswith(other) for other in keywords)
+        ]
+        self.families = [
+            (
+                root,
+                self.masks[root],
+                tuple((k, self.masks[k]) for k in keywords if k.startswith(root) and k != root)
+            )
+            for root in roots
+        ]
+        self.word_boundary = word_boundary
+
+        self._labels_by_mask = [
+            frozenset(name for bit, name in enumerate(self.label_names) if mask & (1 << bit))
+            for mask in range(1 << len(self.label_names))
+        ]
+
+    def regex(self, label: str) -> str:
+        """
+        Regex (RE2 syntax, for vectorized kernels) matching the keywords of
+        one label in lower-cased text.
+
+        RE2's \\b only knows ASCII word characters, so the word boundary is
+        spelled out with the same Unicode classes _scan() checks (letters,
+        digits, underscore); both paths then agree on non-Latin text.
+        """
+
+        bit = 1 << self.label_names.index(label)
+        keywords = sorted((k for k, mask in self.masks.items() if mask & bit), key=len, reverse=True)
+        boundary = r"(?:^|[^\p{L}\p{N}_])" if self.word_boundary else ""
+        return boundary + "(?:" + "|".join(re.sub(r"([^\w\s])", r"\\\1", k) for k in keywords) + ")"
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(position, label mask) of every keyword hit in lower-cased text."""
+
+        for root, root_mask, longer in self.families:
+            pos = text.find(root)
+            while pos != -1:
+                if (
+                    not self.word_boundary
+                    or pos == 0
+                    or not (text[pos - 1].isalnum() or text[pos - 1] == "_")
+                ):
+                    mask = root_mask
+                    for k, k_mask in longer:
+                        if text.startswith(k, pos):
+                            mask |= k_mask
+                    yield pos, mask
+                pos = text.find(root, pos + 1)
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Labels of all keyword sets with at least one keyword in text."""
+        if not text:
+            return self._labels_by_mask[0]
+
+        mask = 0
+        for _, hit_mask in self._scan(_lower(text)):
+            mask |= hit_mask
+        return self._labels_by_mask[mask]
+
+    def match_many(self, texts: List[str]) -> List[FrozenSet[str]]:
+        """
+        match() for many texts in a single pass.
+
+        Texts are lower-cased and joined with newlines (which no keyword
+        spans), scanned once, and hits are mapped back to their text by
+        offset.
+        """
+
+        lowered = [_lower(t) if t else "" for t in texts]
+        starts = list(accumulate((len(t) + 1 for t in lowered[:-1]), initial=0))
+
+        masks = [0] * len(texts)
+        for pos, hit_mask in self._scan("\n".join(lowered)):
+            masks[bisect_right(starts, pos) - 1] |= hit_mask
+
+        return [self._labels_by_mask[mask] for mask in masks]
+
+
+KEYWORD_SETS = {
+    "revert_tag": REVERT_TAG_KEYWORDS,
+    "revert_summary": REVERT_SUMMARY_KEYWORDS,
+    "vandalism": VANDALISM_KEYWORDS,
+    # Rollback tag + vandalism wording rule
+    "rollback": ("rollback",),
+    "vandal": ("vandal",),
+}
+
+MATCHER = KeywordMatcher(KEYWORD_SETS, word_boundary=KEYWORD_WORD_BOUNDARY)
+
+
+@lru_cache(maxsize=4096)
+def _tag_labels(tags: Tuple[str, ...]) -> FrozenSet[str]:
+    """Tag combinations repeat constantly, so their matches are cached."""
+    return MATCHER.match("\n".join(tags))
+
+
+def _match(change: Dict[str, Any]) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """(comment labels, tag labels) of a change."""
+    comment = change.get("comment", "") or ""
+    tags = change.get("tags", []) or []
+    return MATCHER.match(comment), _tag_labels(tuple(tags))
+
+
+def _is_revert(comment_labels: FrozenSet[str], tag_labels: FrozenSet[str]) -> bool:
+    return "revert_tag" in tag_labels or "revert_summary" in comment_labels
+
+
+def _is_vandalism_revert(comment_labels: FrozenSet[str], tag_labels: FrozenSet[str]) -> bool:
+    return "vandalism" in comment_labels or (
+        "rollback" in tag_labels and "vandal" in comment_labels
+    )
 
 
 def is_revert(change: Dict[str, Any]) -> bool:
@@ -64,19 +232,16 @@ def is_revert(change: Dict[str, Any]) -> bool:
     2. Summary keywords (weaker but common)
     """
 
-    tags = change.get("tags", []) or []
-    comment = change.get("comment", "") or ""
+    comment_labels, tag_labels = _match(change)
 
     # 1️⃣ Tag-based detection (highest confidence)
-    for tag in tags:
-        tag_lower = tag.lower()
-        if _contains_keyword(tag_lower, REVERT_TAG_KEYWORDS):
-            logger.debug("Revert detected via tag: %s", tag)
-            return True
+    if "revert_tag" in tag_labels:
+        logger.debug("Revert detected via tag: %s", change.get("tags"))
+        return True
 
     # 2️⃣ Summary-based detection
-    if _contains_keyword(comment, REVERT_SUMMARY_KEYWORDS):
-        logger.debug("Revert detected via summary: %s", comment)
+    if "revert_summary" in comment_labels:
+        logger.debug("Revert detected via summary: %s", change.get("comment"))
         return True
 
     return False
@@ -89,23 +254,111 @@ def is_vandalism_revert(change: Dict[str, Any]) -> bool:
     These reverts are generally exempt from 3RR enforcement.
     """
 
-    comment = change.get("comment", "") or ""
-    tags = change.get("tags", []) or []
+    comment_labels, tag_labels = _match(change)
 
-    # Summary-based vandalism detection
-    if _contains_keyword(comment, VANDALISM_KEYWORDS):
-        logger.debug("Vandalism revert detected via summary: %s", comment)
+    # Summary-based vandalism detection, or
+    # rollback tool + vandalism wording (strong signal)
+    if _is_vandalism_revert(comment_labels, tag_labels):
+        logger.debug("Vandalism revert detected: %s", change.get("comment"))
         return True
 
-    # Rollback tool + vandalism wording is strong signal
-    for tag in tags:
-        if "rollback" in tag.lower() and "vandal" in comment.lower():
-            logger.debug("Vandalism revert detected via rollback tag")
-            return True
-
     return False
 
 
+def _classify(
+    change: Dict[str, Any],
+    comment_labels: FrozenSet[str],
+    tag_labels: FrozenSet[str]
+) -> Dict[str, Any]:
+    revert = _is_revert(comment_labels, tag_labels)
+    vandalism = revert and _is_vandalism_revert(comment_labels, tag_labels)
+    get = change.get
+
+    return {
+        "wiki": get("wiki"),
+        "article": get("title"),
+        "user": get("user"),
+        "revid": get("revid"),
+        "old_revid": get("old_revid"),
+        "timestamp": get("timestamp"),
+        "comment": get("comment"),
+        "tags": get("tags", []),
+        "is_revert": revert,
+        "is_vandalism_revert": vandalism
+    }
+
+
+class ClassifiedChange:
+    """
+    Compact classify_change() result.
+
+    Same fields as the dict, stored in slots (no per-instance __dict__),
+    with tags kept as a tuple. Supports read-only item access, so code
+    written against the dict (e.g. SlidingWindowEngine) accepts it too.
+    """
+
+    __slots__ = (
+        "wiki", "article", "user", "revid", "old_revid", "timestamp",
+        "comment", "tags", "is_revert", "is_vandalism_revert"
+    )
+
+    def __init__(
+        self,
+        wiki, article, user, revid, old_revid, timestamp,
+        comment, tags, is_revert, is_vandalism_revert
+    ):
+        self.wiki = wiki
+        self.article = article
+        self.user = user
+        self.revid = revid
+        self.old_revid = old_revid
+        self.timestamp = timestamp
+        self.comment = comment
+        self.tags = tags
+        self.is_revert = is_revert
+        self.is_vandalism_revert = is_vandalism_revert
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The classify_change() dict (tags as a list)."""
+        result = {name: getattr(self, name) for name in self.__slots__}
+        result["tags"] = list(self.tags)
+        return result
+
+
+def classify_record(change: Dict[str, Any]) -> ClassifiedChange:
+    """
+    Classify a single recent change into a ClassifiedChange.
+
+    Same classification as classify_change(), without building a dict.
+    """
+
+    comment_labels, tag_labels = _match(change)
+    revert = _is_revert(comment_labels, tag_labels)
+    get = change.get
+
+    return ClassifiedChange(
+        get("wiki"),
+        get("title"),
+        get("user"),
+        get("revid"),
+        get("old_revid"),
+        get("timestamp"),
+        get("comment"),
+        tuple(get("tags") or ()),
+        revert,
+        revert and _is_vandalism_revert(comment_labels, tag_labels)
+    )
+
+
 def classify_change(change: Dict[str, Any]) -> Dict[str, Any]:
     """
     Classify a single recent change.
@@ -113,27 +366,107 @@ def classify_change(change: Dict[str, Any]) -> Dict[str, Any]:
     Returns a normalized dict that downstream logic can store or analyze.
     """
 
-    revert = is_revert(change)
-    vandalism = revert and is_vandalism_revert(change)
-
-    result = {
-        "article": change.get("title"),
-        "user": change.get("user"),
-        "revid": change.get("revid"),
-        "old_revid": change.get("old_revid"),
-        "timestamp": change.get("timestamp"),
-        "comment": change.get("comment"),
-        "tags": change.get("tags", []),
-        "is_revert": revert,
-        "is_vandalism_revert": vandalism
-    }
+    result = _classify(change, *_match(change))
 
     logger.debug(
         "Classified change | article=%s user=%s revert=%s vandalism=%s",
         result["article"],
         result["user"],
-        revert,
-        vandalism
+        result["is_revert"],
+        result["is_vandalism_revert"]
     )
 
     return result
+
+
+def classify_changes(changes: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Classify a batch of recent changes.
+
+    Same output as classify_change() per item, but all comments are
+    matched in one scan and per-item logging is skipped unless DEBUG
+    logging is enabled.
+    """
+
+    changes = list(changes)
+    if not changes:
+        return []
+
+    if logger.isEnabledFor(logging.DEBUG):
+        return [classify_change(c) for c in changes]
+
+    comment_labels = MATCHER.match_many([c.get("comment", "") for c in changes])
+
+    return [
+        _classify(c, labels, _tag_labels(tuple(c.get("tags", []) or [])))
+        for c, labels in zip(changes, comment_labels)
+    ]
+
+
+# Columns of a recent changes page consumed by classify_table()
+RECENT_CHANGE_SCHEMA = pa.schema([
+    ("wiki", pa.string()),
+    ("title", pa.string()),
+    ("user", pa.string()),
+    ("revid", pa.int64()),
+    ("old_revid", pa.int64()),
+    ("timestamp", pa.string()),
+    ("comment", pa.string()),
+    ("tags", pa.list_(pa.string())),
+])
+
+
+def classify_table(changes: Union[pa.Table, "pd.DataFrame"]) -> pa.Table:
+    """
+    Classify a whole page (or backfill batch) of recent changes at once.
+
+    Args:
+        changes (pa.Table | pd.DataFrame): Recent changes with the columns of
+            RECENT_CHANGE_SCHEMA (missing ones are treated as null); e.g.
+            pa.Table.from_pylist(page, schema=RECENT_CHANGE_SCHEMA).
+
+    Returns:
+        pa.Table: The columns of classify_change() output, with "title"
+                  renamed to "article".
+    """
+
+    # pandas is only imported (by pyarrow) when a DataFrame is passed in
+    if not isinstance(changes, pa.Table):
+        changes = pa.Table.from_pandas(changes, preserve_index=False)
+
+    columns = {}
+    for field in RECENT_CHANGE_SCHEMA:
+        if field.name in changes.column_names:
+            columns[field.name] = changes[field.name].cast(field.type)
+        else:
+            columns[field.name] = pa.nulls(changes.num_rows, field.type)
+
+    comment = pc.utf8_lower(pc.fill_null(columns["comment"], ""))
+    tags = pc.utf8_lower(pc.fill_null(pc.binary_join(columns["tags"], "\n"), ""))
+
+    def has(text, label):
+        return pc.match_substring_regex(text, MATCHER.regex(label))
+
+    revert = pc.or_(has(tags, "revert_tag"), has(comment, "revert_summary"))
+    vandalism = pc.and_(
+        revert,
+        pc.or_(
+            has(comment, "vandalism"),
+            pc.and_(has(tags, "rollback"), has(comment, "vandal"))
+        )
+    )
+
+    logger.debug("Classified %d changes (columnar)", changes.num_rows)
+
+    return pa.table({
+        "wiki": columns["wiki"],
+        "article": columns["title"],
+        "user": columns["user"],
+        "revid": columns["revid"],
+        "old_revid": columns["old_revid"],
+        "timestamp": columns["timestamp"],
+        "comment": columns["comment"],
+        "tags": columns["tags"],
+        "is_revert": revert,
+        "is_vandalism_revert": vandalism,
+    })
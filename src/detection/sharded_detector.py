@@ -0,0 +1,192 @@
+"""
+sharded_detector.py
+
+Multi-process variant of the fused detection pass (edit_war_detector.py).
+
+The look-back window of revert_events is exported once per cycle into N
+Parquet shards, partitioned by hash(wiki, article_id), and each shard is
+run through scan_edit_wars() (consolidation, 3RR and mutual reverts, on
+ids) by a worker of a process pool, on its own in-memory DuckDB
+connection. Every detector groups by wiki and article, so an article's
+events all land in one shard and per-shard results are exact; the parent merges them and joins
+the names back (name_edit_wars()), which orders them exactly like the
+single-process pass.
+
+The pool is spawned once and reused across cycles (e.g. by the daemon);
+call close() to shut it down.
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Optional
+
+import duckdb
+
+from src.config import DETECTION_SHARDS, DETECTION_WORKERS, DUCKDB_PATH
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.detection.detector_config import DEFAULT_CONFIG, DetectorConfig
+from src.detection.edit_war_detector import STAGES, name_edit_wars, scan_edit_wars
+from src.utils.logger import get_logger
+
+logger = get_logger("sharded_detector")
+
+
+def _detect_shard(
+    shard_dir: str,
+    since: Optional[datetime],
+    consolidated: bool,
+    config: DetectorConfig,
+    three_rr: bool
+) -> Dict:
+    """Worker: run the fused pass over one exported shard."""
+
+    con = duckdb.connect()
+    try:
+        con.execute(
+            f"CREATE VIEW revert_events AS SELECT * FROM read_parquet('{shard_dir}/*.parquet')"
+        )
+        result = scan_edit_wars(DuckDBClient(None, con=con), since, config, three_rr)
+    finally:
+        con.close()
+
+    # The consolidated actions dwarf the incidents; only ship them back if asked
+    if not consolidated:
+        result["consolidated"] = []
+    return result
+
+
+class ShardedDetector:
+    """
+    Args:
+        shards (int): Number of shards the look-back window is split into
+        workers (int): Worker processes; 0 = one per CPU
+        shard_dir (str | None): Where shards are exported (a temporary
+                                directory, removed on close(), if omitted)
+    """
+
+    def __init__(
+        self,
+        shards: int = DETECTION_SHARDS,
+        workers: int = DETECTION_WORKERS,
+        shard_dir: Optional[str] = None
+    ):
+        self.shards = max(shards, 1)
+        self.workers = min(workers or os.cpu_count() or 1, self.shards)
+        self.owns_dir = shard_dir is None
+        self.shard_dir = shard_dir or tempfile.mkdtemp(prefix="editwar-shards-")
+        # Spawned workers never inherit the parent's DuckDB connection
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def export(self, db: DuckDBClient, since: Optional[datetime] = None) -> int:
+        """
+        Write the look-back window's non-vandalism reverts into the shards.
+
+        Returns:
+            int: Rows exported
+        """
+
+        shutil.rmtree(self.shard_dir, ignore_errors=True)
+        os.makedirs(self.shard_dir, exist_ok=True)
+
+        return db.execute(
+            f"""
+            COPY (
+                SELECT
+                    wiki,
+                    article_id,
+                    user_id,
+                    revid,
+                    timestamp,
+                    is_vandalism,
+                    hash(wiki, article_id) % {self.shards} AS shard
+                FROM revert_events
+                WHERE is_vandalism = FALSE
+                  AND timestamp >= ?
+            ) TO '{self.shard_dir}' (FORMAT parquet, PARTITION_BY (shard), OVERWRITE_OR_IGNORE)
+            """,
+            [since or datetime.min]
+        ).fetchone()[0]
+
+    def detect(
+        self,
+        db: Optional[DuckDBClient] = None,
+        since: Optional[datetime] = None,
+        consolidated: bool = False,
+        config: DetectorConfig = DEFAULT_CONFIG,
+        three_rr: bool = True
+    ) -> Dict:
+        """
+        Sharded equivalent of detect_edit_wars().
+
+        Args:
+            db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                      is opened for this call if omitted.
+            since (datetime | None): Only consider reverts at or after this time.
+            consolidated (bool): Also return the consolidated actions (left
+                                 empty by default; the counts are always set)
+            config (DetectorConfig): Thresholds and windows
+            three_rr (bool): Consolidate and count 3RR; False detects
+                             mutual reverts only
+
+        Returns:
+            Dict: Same keys as detect_edit_wars(); "timings" holds the
+                  export, the slowest shard's time per stage and the
+                  names stage
+        """
+
+        start = time.perf_counter()
+        with borrow_client(db, DUCKDB_PATH) as db:
+            exported = self.export(db, since)
+            export_seconds = time.perf_counter() - start
+
+            # Shards without rows have no directory
+            shard_dirs = [
+                os.path.join(self.shard_dir, f"shard={i}")
+                for i in range(self.shards)
+                if os.path.isdir(os.path.join(self.shard_dir, f"shard={i}"))
+            ]
+            n = len(shard_dirs)
+            parts = list(self.pool.map(
+                _detect_shard, shard_dirs, [since] * n, [consolidated] * n, [config] * n, [three_rr] * n
+            ))
+
+            # Shards hold disjoint articles, so their rows just concatenate;
+            # name_edit_wars() puts them in the single pass's order
+            scanned = {
+                key: [row for part in parts for row in part[key]]
+                for key in ("consolidated", "three_rr", "mutual")
+            }
+            scanned["event_count"] = sum(p["event_count"] for p in parts)
+            scanned["consolidated_count"] = sum(p["consolidated_count"] for p in parts)
+            scanned["timings"] = {
+                stage: max((p["timings"][stage] for p in parts), default=0.0)
+                for stage in STAGES
+            }
+            merged = name_edit_wars(db, scanned)
+
+        merged["timings"]["export"] = export_seconds
+
+        logger.info(
+            "Sharded pass: %d rows in %d shards on %d workers, %d possible 3RR cases, "
+            "%d mutual revert cases (%.3fs)",
+            exported,
+            len(shard_dirs),
+            self.workers,
+            len(merged["three_rr"]),
+            len(merged["mutual"]),
+            time.perf_counter() - start
+        )
+        return merged
+
+    def close(self):
+        self.pool.shutdown()
+        if self.owns_dir:
+            shutil.rmtree(self.shard_dir, ignore_errors=True)
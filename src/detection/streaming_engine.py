@@ -0,0 +1,288 @@
+"""
+streaming_engine.py
+
+In-process sliding-window detection for streaming mode.
+
+Applies the rules of consolidation.py, three_rr_detector.py and
+mutual_revert_detector.py to reverts one at a time, without a DuckDB
+round trip, and raises an incident the moment a threshold is crossed.
+
+State is kept per (article, user) and per article, each keyed by wiki
+too, holding only what can still fall inside a window:
+
+- 3RR: a deque of revert times (or, when counting consolidated actions,
+  of action start times) within the 3RR window
+- consolidation: the pair's open group
+- mutual reverts: each active user's recent reverts on the article, with
+  the partners each revert has already been counted for
+- mutual revert counts: each user pair's counted revert times, decayed
+  to the mutual window so counts stay comparable to a windowed SQL run
+
+An incident alerts once and then stays open while the key keeps
+reverting within the window; once a full window passes without a
+revert (3RR) or an interaction (mutual) it expires, and the next
+violation alerts again.
+
+Reverts must arrive in time order (as they do on the recentchange feed).
+Cold keys and incidents are dropped least-recently-used first once
+STREAM_ENGINE_MAX_KEYS is exceeded, which bounds memory at the cost of
+forgetting pairs that went quiet for longer than the cache can hold.
+"""
+
+from bisect import bisect_left, insort
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.api.fetcher import MW_TIMESTAMP_FORMAT
+from src.config import STREAM_ENGINE_MAX_KEYS
+from src.detection.detector_config import DEFAULT_CONFIG, DetectorConfig
+
+
+class _LRU(OrderedDict):
+    """OrderedDict that drops its least recently used entries beyond max_size."""
+
+    def __init__(self, max_size: int):
+        super().__init__()
+        self.max_size = max_size
+
+    def touch(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = self[key] = factory()
+            while len(self) > self.max_size:
+                self.popitem(last=False)
+        else:
+            self.move_to_end(key)
+        return value
+
+
+class _PairState:
+    """Window state of one (article, user) pair."""
+
+    __slots__ = ("window_starts", "group_first", "group_last", "group_count", "alerting")
+
+    def __init__(self):
+        self.window_starts = deque()
+        self.group_first = None
+        self.group_last = None
+        self.group_count = 0
+        self.alerting = False
+
+
+class _MutualState:
+    """Decaying revert counts of one (article, user_a, user_b) triple."""
+
+    __slots__ = ("reverts", "last_interaction", "alerting")
+
+    def __init__(self):
+        # Counted revert times of user_a and user_b, each kept sorted
+        self.reverts = ([], [])
+        self.last_interaction = None
+        self.alerting = False
+
+
+class SlidingWindowEngine:
+    """
+    Incremental 3RR and mutual revert detection over a stream of reverts.
+
+    Args:
+        count_consolidated (bool): Count consolidated actions towards 3RR,
+                                   as detect_three_rr(consolidated=True)
+                                   does, instead of raw reverts.
+        max_keys (int): Cap on tracked (article, user) pairs, articles,
+                        user pairs and incidents (each).
+        config (DetectorConfig): Thresholds and windows
+    """
+
+    def __init__(
+        self,
+        count_consolidated: bool = False,
+        max_keys: int = STREAM_ENGINE_MAX_KEYS,
+        config: DetectorConfig = DEFAULT_CONFIG
+    ):
+        self.count_consolidated = count_consolidated
+        self.three_rr_limit = config.three_rr_limit
+        self.min_reverts_each = config.min_reverts_each
+        self.three_rr_window = config.three_rr_window
+        self.mutual_window = config.mutual_window
+        self.consolidation_gap = config.consolidation_gap
+
+        # (wiki, article, user) -> _PairState
+        self._pairs = _LRU(max_keys)
+        # (wiki, article) -> {user: deque([timestamp, partners counted for])}
+        self._articles = _LRU(max_keys)
+        # (wiki, article, user_a, user_b) -> _MutualState
+        self._mutual_stats = _LRU(max_keys)
+
+        # Cases reported by three_rr_cases() and mutual_cases()
+        self.three_rr_incidents = _LRU(max_keys)
+        self.mutual_incidents = _LRU(max_keys)
+
+    def process(self, revert: Dict) -> List[Dict]:
+        """
+        Feed one classified revert (see revert_detector.classify_change).
+
+        Returns:
+            List[Dict]: Incidents whose threshold this revert crossed, each
+                        with a "type" of "three_rr" or "mutual"
+        """
+
+        if revert.get("is_vandalism_revert"):
+            return []
+
+        ts = revert["timestamp"]
+        if isinstance(ts, str):
+            ts = datetime.strptime(ts, MW_TIMESTAMP_FORMAT)
+
+        wiki = revert.get("wiki") or ""
+        raised = self._update_three_rr(wiki, revert["article"], revert["user"], ts)
+        raised.extend(self._update_mutual(wiki, revert["article"], revert["user"], ts))
+        return raised
+
+    def _update_three_rr(self, wiki: str, article: str, user: str, ts: datetime) -> List[Dict]:
+        key = (wiki, article, user)
+        state = self._pairs.touch(key, _PairState)
+
+        # Consolidation: extend the open group or open a new one
+        new_action = (
+            state.group_last is None
+            or ts - state.group_last > self.consolidation_gap
+        )
+        if new_action:
+            state.group_first = ts
+            state.group_count = 0
+        state.group_last = ts
+        state.group_count += 1
+
+        case = self.three_rr_incidents.get(key)
+        if case is not None:
+            case["last_revert_time"] = max(case["last_revert_time"], ts)
+
+        if self.count_consolidated and not new_action:
+            return []
+
+        starts = state.window_starts
+        while starts and ts - starts[0] > self.three_rr_window:
+            starts.popleft()
+        if not starts:
+            # A full window passed since the last counted revert
+            state.alerting = False
+        starts.append(ts)
+
+        if len(starts) < self.three_rr_limit:
+            return []
+
+        case = self.three_rr_incidents.touch(key, lambda: {
+            "wiki": wiki,
+            "article": article,
+            "user": user,
+            "last_revert_time": ts,
+            "revert_count": 0,
+        })
+        case["revert_count"] = max(case["revert_count"], len(starts))
+
+        if state.alerting:
+            return []
+        state.alerting = True
+        return [{
+            "wiki": wiki,
+            "article": article,
+            "user": user,
+            "last_revert_time": ts,
+            "revert_count": len(starts),
+            "type": "three_rr",
+        }]
+
+    def _count_mutual(self, page: tuple, user: str, other: str, ts: datetime, now: datetime):
+        if user < other:
+            key, side = page + (user, other), 0
+        else:
+            key, side = page + (other, user), 1
+
+        stats = self._mutual_stats.touch(key, _MutualState)
+        if stats.last_interaction is not None and now - stats.last_interaction > self.mutual_window:
+            # A full window passed since the pair last interacted
+            stats.alerting = False
+        insort(stats.reverts[side], ts)
+        if stats.last_interaction is None or ts > stats.last_interaction:
+            stats.last_interaction = ts
+        return key, stats
+
+    def _update_mutual(self, wiki: str, article: str, user: str, ts: datetime) -> List[Dict]:
+        page = (wiki, article)
+        active = self._articles.touch(page, dict)
+
+        # Evict reverts that can no longer pair with anything new
+        for other in list(active):
+            events = active[other]
+            while events and ts - events[0][0] > self.mutual_window:
+                events.popleft()
+            if not events:
+                del active[other]
+
+        event = [ts, set()]
+        touched = {}
+
+        for other, events in active.items():
+            if other == user:
+                continue
+
+            # This revert has a partner revert by `other` within the window ...
+            event[1].add(other)
+            key, stats = self._count_mutual(page, user, other, ts, ts)
+            touched[key] = stats
+
+            # ... and so do `other`'s recent reverts not yet paired with `user`
+            for other_ts, partners in events:
+                if user not in partners:
+                    partners.add(user)
+                    key, stats = self._count_mutual(page, other, user, other_ts, ts)
+                    touched[key] = stats
+
+        active.setdefault(user, deque()).append(event)
+
+        raised = []
+        cutoff = ts - self.mutual_window
+        for key, stats in touched.items():
+            # Only reverts within the window count
+            for times in stats.reverts:
+                del times[:bisect_left(times, cutoff)]
+            reverts_a, reverts_b = map(len, stats.reverts)
+
+            incident = {
+                "wiki": key[0],
+                "article": key[1],
+                "user_a": key[2],
+                "user_b": key[3],
+                "reverts_user_a": reverts_a,
+                "reverts_user_b": reverts_b,
+                "last_interaction": stats.last_interaction,
+            }
+            if not stats.alerting:
+                if reverts_a < self.min_reverts_each or reverts_b < self.min_reverts_each:
+                    continue
+                stats.alerting = True
+                raised.append(dict(incident, type="mutual"))
+            self.mutual_incidents.touch(key, dict).update(incident)
+
+        return raised
+
+    def three_rr_cases(self, since: Optional[datetime] = None) -> List[Dict]:
+        """
+        3RR cases raised so far, in detect_three_rr() shape: one per pair,
+        with the highest count any of its incidents reached.
+        """
+        cases = [
+            dict(c) for c in self.three_rr_incidents.values()
+            if since is None or c["last_revert_time"] >= since
+        ]
+        return sorted(cases, key=lambda c: c["last_revert_time"], reverse=True)
+
+    def mutual_cases(self) -> List[Dict]:
+        """
+        Mutual revert cases raised so far, in detect_mutual_reverts() shape:
+        one per user pair, with the windowed counts of its latest incident.
+        """
+        cases = [dict(c) for c in self.mutual_incidents.values()]
+        return sorted(cases, key=lambda c: c["last_interaction"], reverse=True)
@@ -4,80 +4,451 @@ three_rr_detector.py
 Detects potential violations of Wikipedia's Three-Revert Rule (3RR).
 
 Logic:
-- Uses CONSOLIDATED reverts (from consolidation.py)
 - Counts reverts by the same user
 - On the same article
 - Within a rolling 24-hour window
+- Over the raw revert events by default, or with consolidated=True over
+  the consolidated revert actions (see consolidation.py), where rapid
+  consecutive reverts count once
+
+In incremental mode only (article, user) pairs that gained revert events
+since the previous run (tracked by a high-water mark on revert_events.seq)
+are re-evaluated, and only over the 24-hour look-back preceding their
+earliest new event. Results are merged into the persisted
+three_rr_incidents table.
+
+With consolidated=True the actions are read pre-grouped from
+consolidated_reverts, which is brought up to date first. Incrementally,
+new reverts can extend, bridge or split a pair's actions, so its count
+can drop as well as rise: touched pairs are recounted over all their
+actions and their row in consolidated_three_rr_incidents replaced.
+
+Pairs are counted per wiki, by article and user ids; names are joined
+back onto the incidents only (NAMED_INCIDENTS).
+
+The limit and window are bound as query parameters from a DetectorConfig
+(see detector_config.py), so each query below is built once; the
+persisted three_rr_incidents use the default thresholds.
 """
 
-from datetime import timedelta
-from typing import List, Dict
-import duckdb
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
 
 from src.config import DUCKDB_PATH
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.db.duckdb_init import CONSOLIDATED_THREE_RR_SCHEMA, DETECTOR_STATE_SCHEMA, THREE_RR_SCHEMA
+from src.detection.consolidation import DETECTOR_NAME as CONSOLIDATION_DETECTOR_NAME
+from src.detection.consolidation import update_consolidated_reverts
+from src.detection.detector_config import DEFAULT_CONFIG, DetectorConfig, check_persisted
 from src.utils.logger import get_logger
 
 logger = get_logger("three_rr_detector")
 
-THREE_RR_LIMIT = 3
-WINDOW_HOURS = 24
+THREE_RR_LIMIT = DEFAULT_CONFIG.three_rr_limit
+WINDOW_HOURS = DEFAULT_CONFIG.three_rr_window_hours
 
+DETECTOR_NAME = "three_rr"
+CONSOLIDATED_DETECTOR_NAME = "three_rr_consolidated"
 
-def detect_three_rr() -> List[Dict]:
-    """
-    Detect possible Three-Revert Rule violations.
+# Rows fetched at a time when streaming incidents
+FETCH_BATCH_SIZE = 10_000
 
-    Returns:
-        List[Dict]: List of detected 3RR incidents
-    """
 
-    con = duckdb.connect(DUCKDB_PATH)
+# Names and fields of (wiki, article_id, user_id, last_revert_time,
+# revert_count) rows, most recent first
+NAMED_INCIDENTS = """
+SELECT i.wiki, a.name, u.name, i.last_revert_time, i.revert_count
+FROM ({incidents}) i
+LEFT JOIN articles a ON a.article_id = i.article_id
+LEFT JOIN users u ON u.user_id = i.user_id
+ORDER BY i.last_revert_time DESC, a.name, u.name, i.wiki
+"""
 
-    query = f"""
-    WITH consolidated AS (
-        SELECT
-            article,
-            "user",
-            timestamp
-        FROM revert_events
-        WHERE is_vandalism = FALSE
-    ),
-    windowed AS (
+
+def _count_query(events: str, time_column: str, last_column: str) -> str:
+    """
+    Pairs whose rolling $three_rr_window count of the rows selected by
+    `events` reaches $three_rr_limit, as (wiki, article_id, user_id,
+    last_revert_time, revert_count).
+    """
+
+    return f"""
+    WITH windowed AS (
         SELECT
-            article,
-            "user",
-            timestamp,
+            wiki,
+            article_id,
+            user_id,
+            {last_column} AS last_time,
             COUNT(*) OVER (
-                PARTITION BY article, "user"
-                ORDER BY timestamp
-                RANGE BETWEEN INTERVAL '{WINDOW_HOURS} hours' PRECEDING AND CURRENT ROW
+                PARTITION BY wiki, article_id, user_id
+                ORDER BY {time_column}
+                RANGE BETWEEN $three_rr_window PRECEDING AND CURRENT ROW
             ) AS revert_count_24h
-        FROM consolidated
+        FROM ({events})
     )
     SELECT
-        article,
-        "user",
-        MAX(timestamp) AS last_revert_time,
+        wiki,
+        article_id,
+        user_id,
+        MAX(last_time) AS last_revert_time,
         MAX(revert_count_24h) AS revert_count
     FROM windowed
-    GROUP BY article, "user"
-    HAVING MAX(revert_count_24h) >= {THREE_RR_LIMIT}
-    ORDER BY last_revert_time DESC;
+    GROUP BY wiki, article_id, user_id
+    HAVING MAX(revert_count_24h) >= $three_rr_limit
     """
 
-    logger.info("Detecting possible 3RR violations")
-    rows = con.execute(query).fetchall()
-    con.close()
 
+CONSOLIDATED_QUERY = NAMED_INCIDENTS.format(incidents=_count_query(
+    """
+    SELECT *
+    FROM consolidated_reverts
+    WHERE first_revert_time >= $since
+    """,
+    "first_revert_time",
+    "last_revert_time"
+))
+
+RAW_QUERY = NAMED_INCIDENTS.format(incidents=_count_query(
+    """
+    SELECT *
+    FROM revert_events
+    WHERE is_vandalism = FALSE
+      AND timestamp >= $since
+    """,
+    "timestamp",
+    "timestamp"
+))
+
+PERSISTED_QUERY = NAMED_INCIDENTS.format(incidents="""
+SELECT *
+FROM three_rr_incidents
+WHERE last_revert_time >= $since
+""")
+
+# Merge of the pairs touched by reverts $high_water..$new_high_water (see
+# _detect_incremental())
+INCREMENTAL_QUERY = """
+INSERT OR REPLACE INTO three_rr_incidents
+WITH touched AS (
+    SELECT
+        wiki,
+        article_id,
+        user_id,
+        MIN(timestamp) AS first_new_time
+    FROM revert_events
+    WHERE seq > $high_water
+      AND seq <= $new_high_water
+      AND is_vandalism = FALSE
+    GROUP BY wiki, article_id, user_id
+),
+lookback AS (
+    SELECT
+        e.wiki,
+        e.article_id,
+        e.user_id,
+        e.timestamp,
+        t.first_new_time
+    FROM revert_events e
+    JOIN touched t
+      ON e.wiki = t.wiki
+     AND e.article_id = t.article_id
+     AND e.user_id = t.user_id
+    WHERE e.is_vandalism = FALSE
+      AND e.seq <= $new_high_water
+      AND e.timestamp >= t.first_new_time - $three_rr_window
+),
+windowed AS (
+    SELECT
+        wiki,
+        article_id,
+        user_id,
+        timestamp,
+        first_new_time,
+        COUNT(*) OVER (
+            PARTITION BY wiki, article_id, user_id
+            ORDER BY timestamp
+            RANGE BETWEEN $three_rr_window PRECEDING AND CURRENT ROW
+        ) AS revert_count_24h
+    FROM lookback
+),
+fresh AS (
+    SELECT
+        wiki,
+        article_id,
+        user_id,
+        MAX(timestamp) AS last_revert_time,
+        MAX(revert_count_24h) FILTER (WHERE timestamp >= first_new_time) AS revert_count
+    FROM windowed
+    GROUP BY wiki, article_id, user_id
+)
+SELECT
+    f.wiki,
+    f.article_id,
+    f.user_id,
+    GREATEST(f.last_revert_time, i.last_revert_time),
+    GREATEST(f.revert_count, i.revert_count)
+FROM fresh f
+LEFT JOIN three_rr_incidents i
+  ON f.wiki = i.wiki
+ AND f.article_id = i.article_id
+ AND f.user_id = i.user_id
+WHERE GREATEST(f.revert_count, i.revert_count) >= $three_rr_limit;
+"""
+
+
+# Pairs with reverts in $high_water..$new_high_water, whose consolidated
+# actions may have changed (see _detect_incremental_consolidated())
+TOUCHED_PAIRS_QUERY = """
+CREATE OR REPLACE TEMP TABLE three_rr_touched AS
+SELECT DISTINCT wiki, article_id, user_id
+FROM revert_events
+WHERE seq > $high_water
+  AND seq <= $new_high_water
+  AND is_vandalism = FALSE
+"""
+
+RECOUNT_QUERY = "INSERT INTO consolidated_three_rr_incidents " + _count_query(
+    """
+    SELECT c.*
+    FROM consolidated_reverts c
+    JOIN three_rr_touched t
+      ON c.wiki = t.wiki
+     AND c.article_id = t.article_id
+     AND c.user_id = t.user_id
+    """,
+    "first_revert_time",
+    "last_revert_time"
+)
+
+CONSOLIDATED_PERSISTED_QUERY = NAMED_INCIDENTS.format(incidents="""
+SELECT *
+FROM consolidated_three_rr_incidents
+WHERE last_revert_time >= $since
+""")
+
+
+def _high_water(db: DuckDBClient, detector: str) -> int:
+    row = db.execute(
+        "SELECT high_water FROM detector_state WHERE detector = ?",
+        [detector]
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def _detect_incremental(db: DuckDBClient, since: datetime) -> List[tuple]:
+    """
+    Merge 3RR counts of pairs touched since the last run into
+    three_rr_incidents and return the persisted incidents whose last
+    revert is at or after `since`.
+
+    A pair's maximum rolling count can only change for windows ending at or
+    after its earliest new event, and those windows only reach back
+    WINDOW_HOURS, so that look-back is all that has to be rescanned.
+    Pairs below the limit are not persisted: their stored maximum is
+    implicitly < THREE_RR_LIMIT, which is all the merge needs to know.
+    """
+
+    db.execute(DETECTOR_STATE_SCHEMA)
+    db.execute(THREE_RR_SCHEMA)
+
+    db.execute("BEGIN TRANSACTION")
+    try:
+        high_water = _high_water(db, DETECTOR_NAME)
+        new_high_water = db.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM revert_events"
+        ).fetchone()[0]
+
+        if new_high_water > high_water:
+            logger.info("Re-evaluating 3RR for reverts %d..%d", high_water + 1, new_high_water)
+            db.execute(INCREMENTAL_QUERY, {
+                "high_water": high_water,
+                "new_high_water": new_high_water,
+                **DEFAULT_CONFIG.sql_params("three_rr_window", "three_rr_limit"),
+            })
+            db.execute(
+                "INSERT OR REPLACE INTO detector_state VALUES (?, ?, now())",
+                [DETECTOR_NAME, new_high_water]
+            )
+
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+    return db.execute(PERSISTED_QUERY, {"since": since}).fetchall()
+
+
+def _detect_incremental_consolidated(db: DuckDBClient, since: datetime) -> List[tuple]:
+    """
+    Bring consolidated_reverts up to date, recount the pairs it regrouped
+    since the last run into consolidated_three_rr_incidents and return the
+    persisted incidents whose last revert is at or after `since`.
+
+    A touched pair is recounted over all of its consolidated actions, which
+    only reach back as far as the hot revert_events table (see
+    retention.py), and pairs now below the limit lose their row.
+    """
+
+    db.execute(DETECTOR_STATE_SCHEMA)
+    db.execute(CONSOLIDATED_THREE_RR_SCHEMA)
+    update_consolidated_reverts(db)
+
+    db.execute("BEGIN TRANSACTION")
+    try:
+        high_water = _high_water(db, CONSOLIDATED_DETECTOR_NAME)
+        # As far as consolidated_reverts has been brought
+        new_high_water = _high_water(db, CONSOLIDATION_DETECTOR_NAME)
+
+        if new_high_water > high_water:
+            logger.info("Recounting 3RR actions for reverts %d..%d", high_water + 1, new_high_water)
+            db.execute(TOUCHED_PAIRS_QUERY, {"high_water": high_water, "new_high_water": new_high_water})
+            db.execute(
+                """
+                DELETE FROM consolidated_three_rr_incidents i
+                USING three_rr_touched t
+                WHERE i.wiki = t.wiki
+                  AND i.article_id = t.article_id
+                  AND i.user_id = t.user_id
+                """
+            )
+            db.execute(RECOUNT_QUERY, DEFAULT_CONFIG.sql_params("three_rr_window", "three_rr_limit"))
+            db.execute("DROP TABLE three_rr_touched")
+            db.execute(
+                "INSERT OR REPLACE INTO detector_state VALUES (?, ?, now())",
+                [CONSOLIDATED_DETECTOR_NAME, new_high_water]
+            )
+
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+    return db.execute(CONSOLIDATED_PERSISTED_QUERY, {"since": since}).fetchall()
+
+
+def _to_incidents(rows: List[tuple]) -> List[Dict]:
     results = [
         {
-            "article": r[0],
-            "user": r[1],
-            "last_revert_time": r[2],
-            "revert_count": r[3],
+            "wiki": r[0],
+            "article": r[1],
+            "user": r[2],
+            "last_revert_time": r[3],
+            "revert_count": r[4],
         }
         for r in rows
     ]
 
     logger.info("Detected %d possible 3RR cases", len(results))
     return results
+
+
+def detect_three_rr(
+    incremental: bool = False,
+    db: Optional[DuckDBClient] = None,
+    since: Optional[datetime] = None,
+    consolidated: bool = False,
+    config: DetectorConfig = DEFAULT_CONFIG
+) -> List[Dict]:
+    """
+    Detect possible Three-Revert Rule violations.
+
+    Args:
+        incremental (bool): Only re-evaluate pairs with new revert events
+                            and return the persisted result set (default
+                            thresholds only).
+        db (DuckDBClient | None): Shared client; a connection to DUCKDB_PATH
+                                  is opened for this call if omitted.
+        since (datetime | None): Only consider reverts (incremental: report
+                                 incidents) at or after this time.
+        consolidated (bool): Count consolidated revert actions (kept up to
+                             date in consolidated_reverts) rather than raw
+                             reverts; incrementally, the result set is kept
+                             in consolidated_three_rr_incidents.
+        config (DetectorConfig): 3RR limit and window (and, with
+                                 consolidated, the default consolidation
+                                 window)
+
+    Returns:
+        List[Dict]: List of detected 3RR incidents
+    """
+
+    params = {"since": since or datetime.min}
+
+    if incremental and consolidated:
+        check_persisted(
+            config, "consolidated_three_rr_incidents",
+            "three_rr_limit", "three_rr_window_hours", "consolidation_window_minutes"
+        )
+        logger.info("Detecting possible 3RR violations (incremental, consolidated actions)")
+        with borrow_client(db, DUCKDB_PATH) as db:
+            return _to_incidents(_detect_incremental_consolidated(db, params["since"]))
+
+    if incremental:
+        check_persisted(config, "three_rr_incidents", "three_rr_limit", "three_rr_window_hours")
+        logger.info("Detecting possible 3RR violations (incremental)")
+        with borrow_client(db, DUCKDB_PATH) as db:
+            return _to_incidents(_detect_incremental(db, params["since"]))
+
+    params.update(config.sql_params("three_rr_window", "three_rr_limit"))
+
+    if consolidated:
+        check_persisted(config, "consolidated_reverts", "consolidation_window_minutes")
+        logger.info("Detecting possible 3RR violations (consolidated actions)")
+        with borrow_client(db, DUCKDB_PATH) as db:
+            update_consolidated_reverts(db)
+            rows = db.execute(CONSOLIDATED_QUERY, params).fetchall()
+        return _to_incidents(rows)
+
+    logger.info("Detecting possible 3RR violations")
+    with borrow_client(db, DUCKDB_PATH) as db:
+        rows = db.execute(RAW_QUERY, params).fetchall()
+
+    return _to_incidents(rows)
+
+
+def iter_three_rr(
+    db: DuckDBClient,
+    since: Optional[datetime] = None,
+    config: DetectorConfig = DEFAULT_CONFIG
+) -> Iterator[Dict]:
+    """
+    Stream 3RR incidents over consolidated actions straight off a cursor.
+
+    Same incidents as detect_three_rr(consolidated=True), but fetched in
+    batches of FETCH_BATCH_SIZE, e.g. to feed iter_report_pages() without
+    holding the whole result set. Runs on its own cursor of `db`, which
+    must stay open until the iterator is exhausted; the cursor is closed
+    once the iterator is exhausted or closed.
+
+    Args:
+        db (DuckDBClient): Open client
+        since (datetime | None): Only consider actions at or after this time
+        config (DetectorConfig): 3RR limit and window
+
+    Yields:
+        Dict: 3RR incident, most recent first
+    """
+
+    check_persisted(config, "consolidated_reverts", "consolidation_window_minutes")
+    update_consolidated_reverts(db)
+    cursor = db.cursor()
+    try:
+        result = cursor.execute(CONSOLIDATED_QUERY, {
+            "since": since or datetime.min,
+            **config.sql_params("three_rr_window", "three_rr_limit"),
+        })
+
+        while True:
+            batch = result.fetchmany(FETCH_BATCH_SIZE)
+            if not batch:
+                return
+            for r in batch:
+                yield {
+                    "wiki": r[0],
+                    "article": r[1],
+                    "user": r[2],
+                    "last_revert_time": r[3],
+                    "revert_count": r[4],
+                }
+    finally:
+        cursor.close()
@@ -4,68 +4,476 @@ main.py
 Entry point for EditWarCatcherBot.
 
 Pipeline:
-1. Fetch recent Wikipedia changes
+1. Fetch recent Wikipedia changes since the last run (paged, cursor-resumed;
+   several wikis are polled concurrently)
 2. Detect reverts
 3. Persist revert events to DuckDB
 4. Consolidate revert actions
-5. Detect 3RR violations
+5. Detect 3RR violations over the consolidated actions
+   (4-5 are maintained incrementally: only (article, user) pairs with new
+   reverts are regrouped and recounted)
 6. Detect mutual revert edit wars
-7. Generate WikiText report
+   (one sweep of the look-back window, or per shard in a process pool
+   with DETECTION_SHARDS)
+7. Generate WikiText report (and publish it on-wiki when PUBLISH_TARGET
+   is set, see reporter/publisher.py)
+
+With --stream, reverts are instead ingested continuously from the
+EventStreams (SSE) recentchange feed. With --daemon, the process stays up
+and repeats the cycle with warm connections (see daemon.py).
+
+The modules of the optional paths (multi-wiki polling, streaming, sharded
+detection, on-wiki publishing) are imported on first use. cli.py exposes
+the stages as separate subcommands (fetch, detect, report, init-db, run).
 """
 
-from src.api.fetcher import fetch_recent_changes
-from src.detection.revert_detector import classify_change
-from src.db.revert_writer import RevertWriter
-from src.detection.consolidation import consolidate_reverts
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Tuple
+
+import pyarrow as pa
+
+from src.api.fetcher import MW_TIMESTAMP_FORMAT, iter_recent_changes, wiki_id
+from src.config import (
+    DUCKDB_PATH,
+    WIKI_API_URL,
+    WIKI_API_URLS,
+    RC_PAGE_LIMIT,
+    RC_BOOTSTRAP_HOURS,
+    EVENTSTREAM_URL,
+    STREAM_BATCH_SIZE,
+    STREAM_FLUSH_SECONDS,
+    DETECTION_LOOKBACK_HOURS,
+    DAEMON_INTERVAL_SECONDS,
+    REPORT_PATH,
+    PUBLISH_TARGET,
+    DETECTION_SHARDS,
+)
+from src.detection.revert_detector import (
+    RECENT_CHANGE_SCHEMA,
+    classify_record,
+    classify_table,
+)
+from src.db.cursor_store import CursorStore
+from src.db.duckdb_client import DuckDBClient, borrow_client
+from src.db.revert_writer import RevertBatchBuilder, RevertWriter
+from src.detection.consolidation import update_consolidated_reverts
+from src.detection.detector_config import DEFAULT_CONFIG
+from src.detection.edit_war_detector import detect_edit_wars
 from src.detection.three_rr_detector import detect_three_rr
-from src.detection.mutual_revert_detector import detect_mutual_reverts
-from src.reporter.report_formatter import format_full_report
+from src.detection.identity_revert_index import IdentityRevertIndex, mark_identity_reverts
+from src.reporter.report_formatter import FileSink, PageListSink, StdoutSink, render_report
 from src.utils.logger import get_logger
+from src.utils.metrics import METRICS
+
+# Only needed for multi-wiki polling, streaming, sharded detection or
+# on-wiki publishing: imported where used, so a plain run starts faster
+if TYPE_CHECKING:
+    import requests
+
+    from src.api.async_fetcher import WikiPoller
+    from src.api.wiki_editor import WikiEditor
+    from src.detection.sharded_detector import ShardedDetector
+    from src.utils.rate_limiter import TokenBucket
 
 logger = get_logger("main")
 
+# Thresholds of detect() (the incrementally persisted 3RR state is kept at
+# the defaults) and of the --stream engine, so both report the same cases
+DETECTION_CONFIG = DEFAULT_CONFIG
+
+# Lives as long as the process, so the daemon keeps it warm across cycles
+IDENTITY_INDEX = IdentityRevertIndex()
+
+# Report publishing: the throttle and the logged-in edit session also
+# outlive a single cycle (both are created on first publish)
+_publish_bucket: Optional["TokenBucket"] = None
+_wiki_editor: Optional["WikiEditor"] = None
+
+# Worker pool of the sharded detection pass (DETECTION_SHARDS > 1)
+_sharded_detector: Optional["ShardedDetector"] = None
+
+
+def _resume_point(cursor_store: CursorStore, api_url: str) -> Tuple[Optional[int], datetime]:
+    """(after_rcid, start) to fetch from for a wiki, based on its stored cursor."""
+
+    cursor = cursor_store.get(api_url)
+    if cursor:
+        return cursor
+
+    logger.info(
+        "No ingest cursor yet for %s, bootstrapping from the last %d hours",
+        api_url,
+        RC_BOOTSTRAP_HOURS
+    )
+    return None, datetime.utcnow() - timedelta(hours=RC_BOOTSTRAP_HOURS)
+
+
+def _run_pipeline(
+    db: DuckDBClient,
+    http: Optional["requests.Session"] = None,
+    poller: Optional["WikiPoller"] = None
+) -> Optional[Tuple[list, list]]:
+    """
+    Ingest and detect on one shared DuckDB session (arguments as for ingest()).
+
+    Returns:
+        (three_rr_cases, mutual_cases), or None if nothing new was fetched
+    """
+
+    if not ingest(db, http, poller):
+        logger.warning("No recent changes fetched, exiting")
+        return None
+
+    return detect(db)
+
+
+def ingest(
+    db: DuckDBClient,
+    http: Optional["requests.Session"] = None,
+    poller: Optional["WikiPoller"] = None
+) -> int:
+    """
+    Fetch recent changes since the stored cursor(s) and persist their reverts.
+
+    Args:
+        db (DuckDBClient): Shared session
+        http (requests.Session | None): Keep-alive session for single-wiki
+                                        polling (one per call if omitted)
+        poller (WikiPoller | None): Long-lived multi-wiki poller
+                                    (iter_all_wikis() if omitted)
+
+    Returns:
+        int: Number of recent changes fetched
+    """
+
+    # 1️⃣ Fetch recent changes since the stored cursor(s)
+    api_urls = WIKI_API_URLS or [WIKI_API_URL]
+    cursor_store = CursorStore(db)
+
+    if len(api_urls) > 1:
+        # Pages of all wikis, fetched concurrently, as they arrive
+        cursors = {url: _resume_point(cursor_store, url) for url in api_urls}
+        if poller:
+            pages = poller.iter_pages(api_urls, cursors=cursors, limit=RC_PAGE_LIMIT)
+        else:
+            from src.api.async_fetcher import iter_all_wikis
+            pages = iter_all_wikis(api_urls, cursors=cursors, limit=RC_PAGE_LIMIT)
+    else:
+        after_rcid, start = _resume_point(cursor_store, api_urls[0])
+        pages = (
+            (api_urls[0], page)
+            for page in iter_recent_changes(
+                limit=RC_PAGE_LIMIT,
+                start=start,
+                after_rcid=after_rcid,
+                api_url=api_urls[0],
+                session=http
+            )
+        )
+    pages = METRICS.timed_iter("fetch", pages, rows=lambda item: len(item[1]))
+
+    writer = RevertWriter(db)
+    fetched_count = 0
+    revert_count = 0
+
+    for api_url, page in pages:
+        if not page:
+            continue
+
+        # 2️⃣ Classify changes (columnar, one page at a time)
+        with METRICS.stage("classify") as stage:
+            classified = classify_table(pa.Table.from_pylist(page, schema=RECENT_CHANGE_SCHEMA))
+            stage.rows_in += len(page)
+            stage.rows_out += classified.num_rows
+
+        # ... and catch reverts without a telling summary by content hash
+        with METRICS.stage("identity_index") as stage:
+            restored = IDENTITY_INDEX.observe_page(page, db)
+            classified = mark_identity_reverts(classified, restored)
+            stage.rows_in += len(page)
+            stage.rows_out += sum(r is not None for r in restored)
+
+        # 3️⃣ Persist reverts, then advance the cursor past this page
+        with METRICS.stage("write") as stage:
+            written = writer.write_revert_table(classified)
+            cursor_store.set(api_url, page[-1]["rcid"], page[-1]["timestamp"])
+            stage.rows_in += classified.num_rows
+            stage.rows_out += written
+
+        revert_count += written
+        fetched_count += len(page)
+        newest = datetime.strptime(page[-1]["timestamp"], MW_TIMESTAMP_FORMAT)
+        METRICS.set_gauge(
+            "ingest_lag_seconds",
+            (datetime.utcnow() - newest).total_seconds(),
+            wiki=wiki_id(api_url)
+        )
+
+    if fetched_count:
+        logger.info("Persisted %d revert events from %d changes", revert_count, fetched_count)
+    return fetched_count
+
+
+def detect(db: DuckDBClient) -> Tuple[list, list]:
+    """
+    Run detection over the look-back window of the stored reverts.
+
+    Returns:
+        (three_rr_cases, mutual_cases)
+    """
+
+    since = datetime.utcnow() - timedelta(hours=DETECTION_LOOKBACK_HOURS)
+
+    # 4️⃣ Fold the new reverts into the persisted consolidated actions
+    with METRICS.stage("consolidate") as stage:
+        stage.rows_out += update_consolidated_reverts(db)
+
+    # 5️⃣ 3RR over those actions, recounted for the touched pairs only
+    with METRICS.stage("three_rr") as stage:
+        three_rr_cases = detect_three_rr(
+            incremental=True, consolidated=True, db=db, since=since, config=DETECTION_CONFIG
+        )
+        stage.rows_out += len(three_rr_cases)
+
+    # 6️⃣ Mutual revert detection in one sweep over the look-back window
+    if DETECTION_SHARDS > 1:
+        global _sharded_detector
+        if _sharded_detector is None:
+            from src.detection.sharded_detector import ShardedDetector
+            _sharded_detector = ShardedDetector()
+        detected = _sharded_detector.detect(db=db, since=since, config=DETECTION_CONFIG, three_rr=False)
+        METRICS.record_stage("shard_export", detected["timings"]["export"])
+    else:
+        detected = detect_edit_wars(
+            db=db, since=since, consolidated=False, config=DETECTION_CONFIG, three_rr=False
+        )
+
+    timings = detected["timings"]
+    scanned = detected["event_count"]
+    METRICS.record_stage("detect_scan", timings["scan"], rows_out=scanned)
+    METRICS.record_stage("mutual", timings["mutual"], rows_in=scanned, rows_out=len(detected["mutual"]))
+    METRICS.record_stage("detect_names", timings["names"])
+
+    return three_rr_cases, detected["mutual"]
+
 
 def run():
+    # One DuckDB session for the whole run, shared by every stage
+    db = DuckDBClient(DUCKDB_PATH)
+    try:
+        run_cycle(db)
+    finally:
+        shutdown()
+        db.close()
+
+
+def shutdown():
+    """Release what is kept across cycles: the shard worker pool and the edit session."""
+
+    global _sharded_detector, _wiki_editor
+    if _sharded_detector is not None:
+        _sharded_detector.close()
+        _sharded_detector = None
+    if _wiki_editor is not None:
+        _wiki_editor.close()
+        _wiki_editor = None
+
+
+def run_cycle(
+    db: DuckDBClient,
+    http: Optional["requests.Session"] = None,
+    poller: Optional["WikiPoller"] = None
+):
+    """One ingest-detect-report pass on an open session (see _run_pipeline)."""
+
     logger.info("Starting EditWarCatcherBot run")
+    METRICS.reset()
 
-    # 1️⃣ Fetch recent changes
-    changes = fetch_recent_changes(limit=200)
+    try:
+        _run_and_report(db, http, poller)
+    finally:
+        METRICS.export()
 
-    if not changes:
-        logger.warning("No recent changes fetched, exiting")
+
+def _run_and_report(db, http, poller):
+    cases = _run_pipeline(db, http, poller)
+
+    if cases is None:
         return
 
-    # 2️⃣ Classify changes
-    classified = [classify_change(c) for c in changes]
+    publish_report(*cases, db=db)
+    logger.info("EditWarCatcherBot run completed")
 
-    # 3️⃣ Persist reverts
-    writer = RevertWriter()
-    revert_count = writer.write_reverts(classified)
-    writer.close()
 
-    logger.info("Persisted %d revert events", revert_count)
+def publish_report(three_rr_cases: list, mutual_cases: list, db: Optional[DuckDBClient] = None):
+    """
+    Format and publish a report of the detected cases.
 
-    # 4️⃣ Consolidation (policy correctness)
-    consolidated = consolidate_reverts()
-    logger.info("Consolidated into %d revert actions", len(consolidated))
+    Args:
+        three_rr_cases (list): 3RR incidents
+        mutual_cases (list): Mutual revert incidents
+        db (DuckDBClient | None): Session holding the publish queue; a
+                                  connection to DUCKDB_PATH is opened if
+                                  omitted (only used with PUBLISH_TARGET)
+    """
 
-    # 5️⃣ Detect 3RR violations
-    three_rr_cases = detect_three_rr()
+    # 7️⃣ Format report, streamed page by page to the wiki (via the publish
+    # queue), REPORT_PATH or stdout
+    if PUBLISH_TARGET:
+        sink = PageListSink()
+    elif REPORT_PATH:
+        sink = FileSink(REPORT_PATH)
+    else:
+        sink = StdoutSink()
 
-    # 6️⃣ Detect mutual revert edit wars
-    mutual_cases = detect_mutual_reverts()
+    with METRICS.stage("format") as stage:
+        pages, size = render_report(three_rr_cases, mutual_cases, sink)
+        stage.rows_in += len(three_rr_cases) + len(mutual_cases)
+        stage.rows_out += pages
+    METRICS.set_gauge("report_bytes", size)
+    METRICS.set_gauge("report_pages", pages)
 
-    # 7️⃣ Format report
-    report = format_full_report(three_rr_cases, mutual_cases)
+    if PUBLISH_TARGET:
+        from src.api.wiki_editor import WikiEditor
+        from src.reporter.publisher import Publisher, default_bucket
 
-    # For now, just print the report
-    # (later: post using Pywikibot or save to file)
-    print("\n" + "=" * 80 + "\n")
-    print(report)
-    print("\n" + "=" * 80 + "\n")
+        global _publish_bucket, _wiki_editor
+        if _publish_bucket is None:
+            _publish_bucket = default_bucket()
+        if _wiki_editor is None:
+            _wiki_editor = WikiEditor()
 
-    logger.info("EditWarCatcherBot run completed")
+        with borrow_client(db, DUCKDB_PATH) as db, METRICS.stage("publish") as stage:
+            publisher = Publisher(db, editor=_wiki_editor, bucket=_publish_bucket)
+            stage.rows_in += publisher.submit(sink.pages)
+            stage.rows_out += publisher.drain()
+
+
+def run_stream(
+    url: str = EVENTSTREAM_URL,
+    max_reconnects: Optional[int] = None,
+    db: Optional[DuckDBClient] = None,
+    on_flush: Optional[Callable[[DuckDBClient, int], None]] = None,
+    on_incident: Optional[Callable[[Dict], None]] = None,
+    stop: Optional[threading.Event] = None
+):
+    """
+    Continuously ingest reverts from an SSE recentchange feed.
+
+    Reverts are written in small batches (STREAM_BATCH_SIZE events or
+    STREAM_FLUSH_SECONDS, whichever comes first) and the stream position
+    is persisted after each batch, so a restart resumes via Last-Event-ID.
+    Possible 3RR and mutual revert incidents are logged (and passed to
+    on_incident) as soon as the revert that crosses the threshold arrives.
+
+    Args:
+        url (str): SSE endpoint
+        max_reconnects (int | None): Give up after this many reconnects
+        db (DuckDBClient | None): Shared session, left open; a connection to
+                                  DUCKDB_PATH is opened and closed if omitted.
+        on_flush (callable | None): Called with (db, new revert rows) after
+                                    each batch is persisted.
+        on_incident (callable | None): Called with each incident the
+                                       streaming engine raises.
+        stop (threading.Event | None): Flush and return once set.
+    """
+
+    from src.api.event_stream import stream_recent_changes
+    from src.detection.streaming_engine import SlidingWindowEngine
+
+    logger.info("Starting EditWarCatcherBot stream ingestion")
+
+    owns_db = db is None
+    db = db or DuckDBClient(DUCKDB_PATH)
+    cursor_store = CursorStore(db)
+    writer = RevertWriter(db)
+
+    # Alerts are raised in-process, without waiting for a flush; 3RR counts
+    # consolidated actions, as detect() does
+    engine = SlidingWindowEngine(count_consolidated=True, config=DETECTION_CONFIG)
+
+    # Reverts awaiting the next flush, collected as Arrow columns
+    pending = RevertBatchBuilder()
+    pending_event_id = None
+    last_flush = time.monotonic()
+    revert_count = 0
+
+    def flush():
+        nonlocal pending, pending_event_id, last_flush, revert_count
+        written = writer.write_batch(pending.build())
+        revert_count += written
+        if pending_event_id is not None:
+            cursor_store.set_event_id(url, pending_event_id)
+        pending.clear()
+        pending_event_id = None
+        last_flush = time.monotonic()
+        if on_flush is not None:
+            on_flush(db, written)
+
+    events = stream_recent_changes(
+        url=url,
+        last_event_id=cursor_store.get_event_id(url),
+        max_reconnects=max_reconnects,
+        stop=stop
+    )
+
+    try:
+        for event_id, change in events:
+            classified = classify_record(change)
+            if classified.is_revert:
+                for incident in engine.process(classified):
+                    logger.warning("Possible %s incident: %s", incident["type"], incident)
+                    METRICS.inc("stream_incidents", type=incident["type"])
+                    if on_incident is not None:
+                        on_incident(incident)
+                pending.append(classified)
+            pending_event_id = event_id
+
+            if (
+                len(pending) >= STREAM_BATCH_SIZE
+                or time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS
+            ):
+                flush()
+
+    except KeyboardInterrupt:
+        logger.info("Stream ingestion interrupted")
+
+    finally:
+        flush()
+        if owns_db:
+            db.close()
+
+    logger.info("Stream ingestion stopped after persisting %d revert events", revert_count)
 
 
 if __name__ == "__main__":
-    run()
+    parser = argparse.ArgumentParser(description="EditWarCatcherBot")
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="ingest continuously from the EventStreams feed instead of polling"
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running: poll every --interval seconds (or, with --stream, "
+             "detect after every ingested batch) until SIGTERM"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=DAEMON_INTERVAL_SECONDS,
+        help="seconds between polling cycles in daemon mode"
+    )
+    args = parser.parse_args()
+
+    if args.daemon:
+        from src.daemon import run_daemon
+        run_daemon(interval=args.interval, stream=args.stream)
+    elif args.stream:
+        run_stream()
+    else:
+        run()
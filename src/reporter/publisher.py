@@ -0,0 +1,195 @@
+"""
+publisher.py
+
+Publishes report pages on-wiki through the durable publish queue.
+
+submit() queues each page of a report for its target (page 1 goes to
+PUBLISH_TARGET, page N to PUBLISH_TARGET/N), coalescing with updates that
+are still pending. When a report shrinks, the pages past its end are
+overwritten with STALE_PAGE_TEXT (or dropped from the queue if they were
+never published). The target is global: one report holds the cases of
+every watched wiki and is saved on the WIKI_API_URL wiki, each case
+linking to its article on its own wiki. drain() then saves due entries
+one by one:
+
+- saves are throttled by a token bucket (PUBLISH_EDITS_PER_MINUTE, bursts
+  of PUBLISH_BURST)
+- maxlag / ratelimited / HTTP 429 and 503 responses defer the entry by the
+  server's Retry-After and hold back every other save for as long, without
+  counting as a failed attempt
+- other failures are retried with exponential backoff, up to
+  PUBLISH_MAX_ATTEMPTS attempts
+
+Whatever is not saved before the drain deadline stays queued for the next
+run.
+"""
+
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import requests
+
+from src.api.wiki_editor import EditError, Throttled, WikiEditor
+from src.config import (
+    PUBLISH_BURST,
+    PUBLISH_DRAIN_SECONDS,
+    PUBLISH_EDITS_PER_MINUTE,
+    PUBLISH_MAX_ATTEMPTS,
+    PUBLISH_SUMMARY,
+    PUBLISH_TARGET,
+)
+from src.db.duckdb_client import DuckDBClient
+from src.db.publish_queue import PublishQueue
+from src.utils.logger import get_logger
+from src.utils.metrics import METRICS
+from src.utils.rate_limiter import TokenBucket
+
+logger = get_logger("publisher")
+
+# Retry backoff for failed saves: BASE * 2 ** attempts, capped
+RETRY_BASE_SECONDS = 10.0
+RETRY_MAX_SECONDS = 600.0
+
+# Replaces report pages past the end of a report that shrank
+STALE_PAGE_TEXT = "No further entries; this report currently has fewer pages."
+
+
+def page_title(target: str, number: int) -> str:
+    """Title of page `number` (1-based) of a report published to `target`."""
+    return target if number == 1 else f"{target}/{number}"
+
+
+def page_number(target: str, title: str) -> Optional[int]:
+    """Page number of `title` in a report published to `target`, or None."""
+    if title == target:
+        return 1
+    suffix = title[len(target) + 1:]
+    if title.startswith(target + "/") and suffix.isdigit():
+        return int(suffix)
+    return None
+
+
+def default_bucket() -> TokenBucket:
+    return TokenBucket(PUBLISH_EDITS_PER_MINUTE / 60, PUBLISH_BURST)
+
+
+class Publisher:
+    """
+    Args:
+        db (DuckDBClient | None): Holds the publish queue
+        editor (WikiEditor | None): Edit client; one for WIKI_API_URL if omitted
+        bucket (TokenBucket | None): Save throttle; kept across calls, so
+                                     share one between publishers
+        max_attempts (int): Failed saves before an entry is given up
+    """
+
+    def __init__(
+        self,
+        db: Optional[DuckDBClient] = None,
+        editor: Optional[WikiEditor] = None,
+        bucket: Optional[TokenBucket] = None,
+        max_attempts: int = PUBLISH_MAX_ATTEMPTS
+    ):
+        self.queue = PublishQueue(db)
+        self.editor = editor or WikiEditor()
+        self.bucket = bucket or default_bucket()
+        self.max_attempts = max_attempts
+
+    def submit(
+        self,
+        pages: List[str],
+        target: str = PUBLISH_TARGET,
+        summary: str = PUBLISH_SUMMARY
+    ) -> int:
+        """
+        Queue the pages of a report, and blank the pages of an earlier,
+        longer report past its end.
+
+        Returns:
+            int: Pages queued (pages identical to the published ones are skipped)
+        """
+
+        queued = sum(
+            self.queue.enqueue(page_title(target, number), text, summary)
+            for number, text in enumerate(pages, start=1)
+        )
+        logger.info("Queued %d of %d report page(s) for %s", queued, len(pages), target)
+
+        for page in self.queue.subpages(target):
+            number = page_number(target, page["target"])
+            if number is None or number <= len(pages):
+                continue
+            if page["published"]:
+                if self.queue.enqueue(page["target"], STALE_PAGE_TEXT, summary):
+                    logger.info("Queued blanking of stale report page %s", page["target"])
+                    queued += 1
+            else:
+                self.queue.discard(page["target"])
+
+        return queued
+
+    def drain(self, max_seconds: float = PUBLISH_DRAIN_SECONDS) -> int:
+        """
+        Save due entries until the queue is empty or `max_seconds` have passed.
+
+        Returns:
+            int: Pages saved
+        """
+
+        deadline = time.monotonic() + max_seconds
+        saved = 0
+
+        while True:
+            entry = self.queue.next_due(max_attempts=self.max_attempts)
+
+            if entry is None:
+                retry_at = self.queue.next_retry_time(max_attempts=self.max_attempts)
+                if retry_at is None:
+                    break
+                wait = max((retry_at - datetime.utcnow()).total_seconds(), 0.0)
+                if time.monotonic() + wait > deadline:
+                    break
+                time.sleep(wait)
+                continue
+
+            if time.monotonic() + self.bucket.delay() > deadline:
+                break
+            self.bucket.acquire()
+
+            try:
+                result = self.editor.edit(entry["target"], entry["text"], entry["summary"])
+
+            except Throttled as e:
+                logger.warning("%s throttled (%s), retrying in %.0fs", entry["target"], e.code, e.retry_after)
+                METRICS.inc("publish_throttled", code=e.code)
+                self.queue.defer(entry, e.retry_after, str(e), count_attempt=False)
+                self.bucket.pause(e.retry_after)
+                continue
+
+            except (EditError, requests.RequestException) as e:
+                attempts = entry["attempts"] + 1
+                backoff = min(RETRY_BASE_SECONDS * 2 ** entry["attempts"], RETRY_MAX_SECONDS)
+                self.queue.defer(entry, backoff, str(e))
+                if attempts >= self.max_attempts:
+                    logger.error("Giving up on %s after %d attempts: %s", entry["target"], attempts, e)
+                else:
+                    logger.warning("Saving %s failed (%s), retrying in %.0fs", entry["target"], e, backoff)
+                continue
+
+            self.queue.complete(entry, result.get("newrevid"))
+            saved += 1
+            METRICS.inc("publish_saves")
+            logger.info(
+                "Published %s (%s)",
+                entry["target"],
+                "no change" if "nochange" in result else f"revision {result.get('newrevid')}"
+            )
+
+        remaining = self.queue.pending()
+        if remaining:
+            logger.info("%d report page(s) still queued for publishing", remaining)
+        return saved
+
+    def close(self):
+        self.queue.close()
@@ -4,23 +4,119 @@ report_formatter.py
 Formats detected edit-war incidents into WikiText suitable
 for posting on Wikipedia admin noticeboards (e.g., WP:AN3).
 
+Reports can also be rendered as a stream: cases are consumed one at a
+time (so they can come straight from a detector cursor), split into pages
+under a byte budget, since on-wiki pages have a size limit, and handed to
+a sink (stdout, files, or an in-memory page list).
+
+Cases from several wikis share one report, so each article is linked by
+URL on its own wiki, which is named next to it. Cases without a wiki
+keep a plain [[wikilink]].
+
 No API calls.
 No DB access.
 Pure formatting logic.
 """
 
-from typing import List, Dict
+import os
+import re
+from urllib.parse import quote
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
+from src.config import REPORT_PAGE_MAX_BYTES
 from src.utils.logger import get_logger
 
 logger = get_logger("report_formatter")
 
+REPORT_HEADER = (
+    "This is an automated report generated by '''EditWarCatcherBot'''.\n"
+    "The report highlights possible edit-warring behavior for human review.\n"
+    "Please verify before taking administrative action.\n\n"
+)
+
+THREE_RR_HEADING = "Three-Revert Rule violations"
+MUTUAL_HEADING = "Mutual revert edit wars"
+
 
 def _format_timestamp(ts: datetime) -> str:
     """Format timestamp for WikiText."""
     return ts.strftime("%Y-%m-%d %H:%M:%S (UTC)")
 
 
+def _article_link(c: Dict) -> str:
+    """Link to the case's article on the wiki it was detected on."""
+    wiki = c.get("wiki")
+    if not wiki:
+        return f"[[{c['article']}]]"
+    title = quote(c["article"].replace(" ", "_"), safe="/:")
+    return f"[https://{wiki}/wiki/{title} {c['article']}] ({wiki})"
+
+
+def _three_rr_entry(c: Dict) -> str:
+    return (
+        f"* '''Article''': {_article_link(c)}\n"
+        f"  * '''User''': [[User:{c['user']}]]\n"
+        f"  * '''Reverts (24h)''': {c['revert_count']}\n"
+        f"  * '''Last revert''': {_format_timestamp(c['last_revert_time'])}\n"
+    )
+
+
+def _mutual_entry(c: Dict) -> str:
+    return (
+        f"* '''Article''': {_article_link(c)}\n"
+        f"  * '''User A''': [[User:{c['user_a']}]] "
+        f"({c['reverts_user_a']} reverts)\n"
+        f"  * '''User B''': [[User:{c['user_b']}]] "
+        f"({c['reverts_user_b']} reverts)\n"
+        f"  * '''Last interaction''': {_format_timestamp(c['last_interaction'])}\n"
+    )
+
+
+def _iter_section(
+    heading: str,
+    cases: Iterable[Dict],
+    entry: Callable[[Dict], str],
+    empty: str,
+    kind: str
+) -> Iterator[Tuple[str, str]]:
+    """(heading, text) pieces of one report section, one per case."""
+
+    # The title goes out with the first case, so a page never ends on it
+    title = f"== {heading} ==\n"
+
+    count = 0
+    for c in cases:
+        yield heading, ("" if count else title) + "\n" + entry(c)
+        count += 1
+
+    if not count:
+        yield heading, f"{title}\n{empty}\n"
+
+    logger.info("Formatted %d %s cases", count, kind)
+
+
+def _iter_three_rr_section(cases: Iterable[Dict]) -> Iterator[Tuple[str, str]]:
+    return _iter_section(
+        THREE_RR_HEADING, cases, _three_rr_entry, "No potential 3RR violations detected.", "3RR"
+    )
+
+
+def _iter_mutual_section(cases: Iterable[Dict]) -> Iterator[Tuple[str, str]]:
+    return _iter_section(
+        MUTUAL_HEADING, cases, _mutual_entry, "No mutual revert edit wars detected.", "mutual revert"
+    )
+
+
+def _iter_report_chunks(
+    three_rr_cases: Iterable[Dict],
+    mutual_cases: Iterable[Dict]
+) -> Iterator[Tuple[Optional[str], str]]:
+    yield None, REPORT_HEADER
+    yield from _iter_three_rr_section(three_rr_cases)
+    yield None, "\n\n"
+    yield from _iter_mutual_section(mutual_cases)
+
+
 def format_three_rr_reports(cases: List[Dict]) -> str:
     """
     Format 3RR violation cases into WikiText.
@@ -32,21 +128,7 @@ def format_three_rr_reports(cases: List[Dict]) -> str:
         str: WikiText report
     """
 
-    if not cases:
-        return "== Three-Revert Rule violations ==\n\nNo potential 3RR violations detected.\n"
-
-    lines = ["== Three-Revert Rule violations ==\n"]
-
-    for c in cases:
-        lines.append(
-            f"* '''Article''': [[{c['article']}]]\n"
-            f"  * '''User''': [[User:{c['user']}]]\n"
-            f"  * '''Reverts (24h)''': {c['revert_count']}\n"
-            f"  * '''Last revert''': {_format_timestamp(c['last_revert_time'])}\n"
-        )
-
-    logger.info("Formatted %d 3RR cases", len(cases))
-    return "\n".join(lines)
+    return "".join(text for _, text in _iter_three_rr_section(cases))
 
 
 def format_mutual_revert_reports(cases: List[Dict]) -> str:
@@ -60,23 +142,26 @@ def format_mutual_revert_reports(cases: List[Dict]) -> str:
         str: WikiText report
     """
 
-    if not cases:
-        return "== Mutual revert edit wars ==\n\nNo mutual revert edit wars detected.\n"
+    return "".join(text for _, text in _iter_mutual_section(cases))
 
-    lines = ["== Mutual revert edit wars ==\n"]
 
-    for c in cases:
-        lines.append(
-            f"* '''Article''': [[{c['article']}]]\n"
-            f"  * '''User A''': [[User:{c['user_a']}]] "
-            f"({c['reverts_user_a']} reverts)\n"
-            f"  * '''User B''': [[User:{c['user_b']}]] "
-            f"({c['reverts_user_b']} reverts)\n"
-            f"  * '''Last interaction''': {_format_timestamp(c['last_interaction'])}\n"
-        )
+def iter_report(
+    three_rr_cases: Iterable[Dict],
+    mutual_cases: Iterable[Dict]
+) -> Iterator[str]:
+    """
+    Stream the full report, one case at a time.
+
+    Args:
+        three_rr_cases (Iterable[Dict]): 3RR incidents, consumed lazily
+        mutual_cases (Iterable[Dict]): Mutual revert incidents, consumed lazily
+
+    Yields:
+        str: WikiText fragments; joined, they equal format_full_report()
+    """
 
-    logger.info("Formatted %d mutual revert cases", len(cases))
-    return "\n".join(lines)
+    for _, text in _iter_report_chunks(three_rr_cases, mutual_cases):
+        yield text
 
 
 def format_full_report(
@@ -90,18 +175,165 @@ def format_full_report(
         str: Complete WikiText report
     """
 
-    header = (
-        "This is an automated report generated by '''EditWarCatcherBot'''.\n"
-        "The report highlights possible edit-warring behavior for human review.\n"
-        "Please verify before taking administrative action.\n\n"
-    )
-
-    report = (
-        header +
-        format_three_rr_reports(three_rr_cases) +
-        "\n\n" +
-        format_mutual_revert_reports(mutual_cases)
-    )
+    report = "".join(iter_report(three_rr_cases, mutual_cases))
 
     logger.info("Formatted full report")
     return report
+
+
+def iter_report_pages(
+    three_rr_cases: Iterable[Dict],
+    mutual_cases: Iterable[Dict],
+    max_bytes: int = REPORT_PAGE_MAX_BYTES
+) -> Iterator[str]:
+    """
+    Stream the full report in pages of at most `max_bytes` (UTF-8).
+
+    Pages break between cases, never inside one (a single case larger
+    than the budget gets a page of its own). A page that starts in the
+    middle of a section repeats the section title, marked as continued,
+    when it fits in the budget along with the page's first case.
+    Only the page being filled is held in memory.
+
+    Args:
+        three_rr_cases (Iterable[Dict]): 3RR incidents, consumed lazily
+        mutual_cases (Iterable[Dict]): Mutual revert incidents, consumed lazily
+        max_bytes (int): Page size budget
+
+    Yields:
+        str: WikiText pages
+    """
+
+    page: List[str] = []
+    size = 0
+    in_section = None
+
+    for heading, text in _iter_report_chunks(three_rr_cases, mutual_cases):
+        length = len(text.encode("utf-8"))
+
+        if page and size + length > max_bytes:
+            yield "".join(page)
+            page, size = [], 0
+            if heading is not None and heading == in_section:
+                # The heading counts against the budget too: a case that
+                # only fits on a page of its own goes without it
+                continued = f"== {heading} (continued) ==\n" + text
+                continued_length = len(continued.encode("utf-8"))
+                if continued_length <= max_bytes:
+                    text, length = continued, continued_length
+
+        if length > max_bytes:
+            logger.warning("Report entry of %d bytes exceeds the %d byte page budget", length, max_bytes)
+
+        page.append(text)
+        size += length
+        in_section = heading
+
+    if page:
+        yield "".join(page)
+
+
+class StdoutSink:
+    """Prints each report page between separator lines."""
+
+    def write_page(self, number: int, text: str):
+        print("\n" + "=" * 80 + "\n")
+        print(text)
+        print("\n" + "=" * 80 + "\n")
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """
+    Writes page 1 to `path` and page N to <stem>-N<ext> (report.wiki,
+    report-2.wiki, ...). On close, page files left over from an earlier,
+    longer report are removed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.paths: List[str] = []
+
+    def page_path(self, number: int) -> str:
+        if number == 1:
+            return self.path
+        stem, ext = os.path.splitext(self.path)
+        return f"{stem}-{number}{ext}"
+
+    def _stale_paths(self) -> List[str]:
+        """Page files numbered past the pages written."""
+        stem, ext = os.path.splitext(self.path)
+        pattern = re.compile(re.escape(os.path.basename(stem)) + r"-(\d+)" + re.escape(ext) + "$")
+        directory = os.path.dirname(self.path) or "."
+
+        stale = []
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match and int(match.group(1)) > len(self.paths):
+                stale.append(os.path.join(directory, name))
+        return stale
+
+    def write_page(self, number: int, text: str):
+        path = self.page_path(number)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.paths.append(path)
+
+    def close(self):
+        stale = self._stale_paths()
+        for path in stale:
+            os.remove(path)
+        if stale:
+            logger.info("Removed %d report page(s) past the end of the report", len(stale))
+        logger.info("Wrote %d report page(s) to %s", len(self.paths), self.path)
+
+
+class PageListSink:
+    """Keeps the report pages in memory, e.g. to post them one by one."""
+
+    def __init__(self):
+        self.pages: List[str] = []
+
+    def write_page(self, number: int, text: str):
+        self.pages.append(text)
+
+    def close(self):
+        pass
+
+
+def render_report(
+    three_rr_cases: Iterable[Dict],
+    mutual_cases: Iterable[Dict],
+    sink,
+    max_bytes: int = REPORT_PAGE_MAX_BYTES
+) -> Tuple[int, int]:
+    """
+    Stream the paginated report into a sink.
+
+    Args:
+        three_rr_cases (Iterable[Dict]): 3RR incidents, consumed lazily
+        mutual_cases (Iterable[Dict]): Mutual revert incidents, consumed lazily
+        sink: Object with write_page(number, text) and close(), e.g.
+              StdoutSink, FileSink or PageListSink
+        max_bytes (int): Page size budget
+
+    Returns:
+        Tuple[int, int]: (pages, bytes) written
+    """
+
+    pages = 0
+    total = 0
+
+    try:
+        for pages, text in enumerate(
+            iter_report_pages(three_rr_cases, mutual_cases, max_bytes), start=1
+        ):
+            sink.write_page(pages, text)
+            total += len(text.encode("utf-8"))
+    finally:
+        sink.close()
+
+    logger.info("Rendered report: %d page(s), %d bytes", pages, total)
+    return pages, total
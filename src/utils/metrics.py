@@ -0,0 +1,253 @@
+"""
+metrics.py
+
+Lightweight run instrumentation.
+
+Stages record wall time, calls and rows in/out; the API clients count
+requests and response bytes; the pipeline sets the ingest lag per wiki.
+At the end of a run the values are written as a Prometheus textfile (for
+node_exporter's textfile collector) and/or a JSON run summary.
+
+Disabled unless METRICS_ENABLED is set: every entry point then returns
+immediately (stage() hands back a shared no-op), so instrumented code
+pays one attribute check per call.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+from src.config import METRICS_ENABLED, METRICS_SUMMARY_PATH, METRICS_TEXTFILE
+from src.utils.logger import get_logger
+
+logger = get_logger("metrics")
+
+PREFIX = "editwar"
+
+HELP = {
+    "api_requests": "MediaWiki API requests made during the last run",
+    "api_response_bytes": "MediaWiki API response bytes received during the last run",
+    "ingest_lag_seconds": "Age of the newest ingested change when the run caught up",
+    "report_bytes": "Size of the last generated report",
+    "report_pages": "Pages the last generated report was split into",
+    "publish_saves": "Report pages saved on-wiki during the last run",
+    "publish_throttled": "Report saves deferred by maxlag or rate limits during the last run",
+}
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+class StageStats:
+    """Accumulated timings and row counts of one pipeline stage."""
+
+    __slots__ = ("seconds", "calls", "rows_in", "rows_out")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows_in = 0
+        self.rows_out = 0
+
+
+class _NoopStage:
+    """Stands in for StageStats when metrics are disabled."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __getattr__(self, name):
+        return 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_STAGE = _NoopStage()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        """Start a new run."""
+        self.started_at = time.time()
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Dict[Tuple[str, _Labels], float] = {}
+        self.gauges: Dict[Tuple[str, _Labels], float] = {}
+
+    def _stage_stats(self, name: str) -> StageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    @contextmanager
+    def _timed_stage(self, name: str) -> Iterator[StageStats]:
+        stats = self._stage_stats(name)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+
+    def stage(self, name: str):
+        """
+        Time a block as (one call of) stage `name`.
+
+        Usage:
+            with METRICS.stage("classify") as stage:
+                stage.rows_in += len(page)
+        """
+        if not self.enabled:
+            return _NOOP_STAGE
+        return self._timed_stage(name)
+
+    def record_stage(self, name: str, seconds: float, rows_in: int = 0, rows_out: int = 0):
+        """Add a stage call that was timed elsewhere."""
+        if not self.enabled:
+            return
+        stats = self._stage_stats(name)
+        stats.seconds += seconds
+        stats.calls += 1
+        stats.rows_in += rows_in
+        stats.rows_out += rows_out
+
+    def timed_iter(self, name: str, iterable: Iterable, rows=len) -> Iterable:
+        """Charge the time spent producing each item of `iterable` to stage `name`."""
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable, rows)
+
+    def _timed_iter(self, name: str, iterable: Iterable, rows) -> Iterator:
+        stats = self._stage_stats(name)
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                stats.seconds += time.perf_counter() - start
+                return
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+            stats.rows_out += rows(item)
+            yield item
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def summary(self) -> Dict:
+        """JSON-serializable summary of the run so far."""
+
+        def grouped(values):
+            out = {}
+            for (name, labels), value in sorted(values.items()):
+                out.setdefault(name, []).append({"labels": dict(labels), "value": value})
+            return out
+
+        return {
+            "started_at": self.started_at,
+            "duration_seconds": round(time.time() - self.started_at, 6),
+            "stages": {
+                name: {
+                    "seconds": round(s.seconds, 6),
+                    "calls": s.calls,
+                    "rows_in": s.rows_in,
+                    "rows_out": s.rows_out,
+                }
+                for name, s in self.stages.items()
+            },
+            "counters": grouped(self.counters),
+            "gauges": grouped(self.gauges),
+        }
+
+    def prometheus_text(self) -> str:
+        """The run's metrics in the Prometheus text exposition format."""
+
+        lines = []
+
+        def family(name, help_text, samples):
+            metric = f"{PREFIX}_{name}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for labels, value in samples:
+                lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        stage_fields = (
+            ("stage_duration_seconds", "Wall time spent in the stage during the last run", "seconds"),
+            ("stage_calls", "Stage invocations during the last run", "calls"),
+            ("stage_rows_in", "Rows consumed by the stage during the last run", "rows_in"),
+            ("stage_rows_out", "Rows produced by the stage during the last run", "rows_out"),
+        )
+        for name, help_text, field in stage_fields:
+            family(name, help_text, [
+                ((("stage", stage),), getattr(stats, field))
+                for stage, stats in self.stages.items()
+            ])
+
+        for values in (self.counters, self.gauges):
+            names = sorted({name for name, _ in values})
+            for name in names:
+                family(name, HELP.get(name, name), [
+                    (labels, value) for (n, labels), value in sorted(values.items()) if n == name
+                ])
+
+        now = time.time()
+        family("run_duration_seconds", "Duration of the last run", [((), round(now - self.started_at, 6))])
+        family("last_run_timestamp_seconds", "Unix time the last run finished", [((), round(now, 3))])
+
+        return "\n".join(lines) + "\n"
+
+    def export(
+        self,
+        textfile: Optional[str] = METRICS_TEXTFILE,
+        summary_path: Optional[str] = METRICS_SUMMARY_PATH
+    ):
+        """Write the Prometheus textfile and/or JSON summary, if configured."""
+
+        if not self.enabled:
+            return
+
+        for path, render in (
+            (textfile, self.prometheus_text),
+            (summary_path, lambda: json.dumps(self.summary(), indent=2, default=str)),
+        ):
+            if not path:
+                continue
+            # Write then rename, so collectors never read a partial file
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                f.write(render())
+            os.replace(tmp, path)
+            logger.info("Wrote run metrics to %s", path)
+
+
+METRICS = Metrics()
@@ -0,0 +1,51 @@
+"""
+rate_limiter.py
+
+Token bucket throttle: `rate` tokens per second refill a bucket of at
+most `capacity`, and each action takes one, so bursts of up to
+`capacity` actions are allowed and the long-run rate never exceeds
+`rate`.
+"""
+
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        capacity: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(capacity)
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available."""
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until one is available; returns the time slept."""
+        waited = self.delay()
+        if waited:
+            self.sleep(waited)
+            self._refill()
+        self.tokens -= 1
+        return waited
+
+    def pause(self, seconds: float):
+        """Hold back every caller for `seconds` (e.g. on Retry-After)."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
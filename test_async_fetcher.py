@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import duckdb
+import pytest
+
+import src.main as main
+from src.api.async_fetcher import fetch_all_wikis, iter_all_wikis
+from src.db.cursor_store import CursorStore
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+
+
+class FakeWikiServer(ThreadingHTTPServer):
+    """Serves two pages of recentchanges per Host header, with keep-alive."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeWikiHandler)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.max_in_flight = {}
+        self.client_ports = {}
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class FakeWikiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        host = self.headers["Host"].split(":")[0]
+        query = parse_qs(urlsplit(self.path).query)
+        srv = self.server
+
+        with srv.lock:
+            srv.client_ports.setdefault(host, set()).add(self.client_address[1])
+            srv.in_flight[host] = srv.in_flight.get(host, 0) + 1
+            srv.max_in_flight[host] = max(srv.max_in_flight.get(host, 0), srv.in_flight[host])
+
+        time.sleep(0.05)
+
+        if "rccontinue" in query:
+            payload = {"query": {"recentchanges": [
+                {"rcid": 3, "title": f"{host} B", "timestamp": "2025-01-01T00:00:03Z"},
+            ]}}
+        else:
+            payload = {
+                "continue": {"rccontinue": "next", "continue": "-||"},
+                "query": {"recentchanges": [
+                    {"rcid": 1, "title": f"{host} A", "timestamp": "2025-01-01T00:00:01Z"},
+                    {"rcid": 2, "title": f"{host} A", "timestamp": "2025-01-01T00:00:02Z"},
+                ]},
+            }
+
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+        with srv.lock:
+            srv.in_flight[host] -= 1
+
+
+@pytest.fixture
+def server():
+    srv = FakeWikiServer()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_polls_wikis_concurrently_and_tags_changes(server):
+    urls = [
+        f"http://127.0.0.1:{server.port}/w/api.php",
+        f"http://localhost:{server.port}/w/api.php",
+    ]
+
+    results = fetch_all_wikis(urls, cursors={urls[0]: (1, "2025-01-01T00:00:01Z")})
+
+    assert [c["rcid"] for c in results[urls[0]]] == [2, 3]
+    assert [c["rcid"] for c in results[urls[1]]] == [1, 2, 3]
+    assert {c["wiki"] for c in results[urls[0]]} == {f"127.0.0.1:{server.port}"}
+    assert {c["wiki"] for c in results[urls[1]]} == {f"localhost:{server.port}"}
+
+
+def test_reuses_pooled_connections_per_host(server):
+    url = f"http://127.0.0.1:{server.port}/w/api.php"
+
+    fetch_all_wikis([url] * 6)
+
+    assert server.max_in_flight["127.0.0.1"] <= 2
+    assert len(server.client_ports["127.0.0.1"]) <= 2
+
+
+def test_streams_each_wikis_pages_in_order(server):
+    urls = [
+        f"http://127.0.0.1:{server.port}/w/api.php",
+        f"http://localhost:{server.port}/w/api.php",
+    ]
+
+    pages = list(iter_all_wikis(urls))
+
+    for url in urls:
+        assert [[c["rcid"] for c in page] for u, page in pages if u == url] == [[1, 2], [3]]
+
+
+def test_multi_wiki_ingest_advances_each_cursor_per_page(server, monkeypatch):
+    urls = [
+        f"http://127.0.0.1:{server.port}/w/api.php",
+        f"http://localhost:{server.port}/w/api.php",
+    ]
+    monkeypatch.setattr(main, "WIKI_API_URLS", urls)
+    db = DuckDBClient(None, con=duckdb.connect())
+    db.execute(SCHEMA)
+
+    # The process dies while writing the second page
+    written = []
+
+    def write_revert_table(self, table):
+        if written:
+            raise RuntimeError("crash")
+        written.append(table)
+        return 0
+
+    monkeypatch.setattr(main.RevertWriter, "write_revert_table", write_revert_table)
+    with pytest.raises(RuntimeError):
+        main.ingest(db)
+
+    # The first page's wiki resumes after it; nothing else was consumed
+    cursors = [CursorStore(db).get(url) for url in urls]
+    assert cursors.count(None) == 1
+    assert [c[0] for c in cursors if c] == [2]
+    db.close()
@@ -0,0 +1,80 @@
+import duckdb
+import pyarrow as pa
+
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertBatchBuilder, RevertWriter
+from src.detection.revert_detector import classify_change, classify_record
+from src.detection.streaming_engine import SlidingWindowEngine
+
+
+def _change(revid, comment="rv", tags=(), user="Alice"):
+    return {
+        "wiki": "en.wikipedia.org",
+        "title": "Foo",
+        "user": user,
+        "revid": revid,
+        "old_revid": revid - 1,
+        "timestamp": f"2025-01-01T00:0{revid}:00Z",
+        "comment": comment,
+        "tags": list(tags),
+    }
+
+
+def test_record_matches_dict_classification():
+    changes = [
+        _change(1),
+        _change(2, comment="copyedit"),
+        _change(3, comment="rvv", tags=["mw-rollback"]),
+        _change(4, comment="", tags=["mw-undo"]),
+    ]
+    for change in changes:
+        record = classify_record(change)
+        assert record.to_dict() == classify_change(change)
+        assert record["article"] == record.article == "Foo"
+        assert record.get("missing", 0) == 0
+        assert not hasattr(record, "__dict__")
+
+
+def test_builder_keeps_reverts_only():
+    builder = RevertBatchBuilder()
+    assert builder.append(classify_record(_change(1)))
+    assert not builder.append(classify_record(_change(2, comment="copyedit")))
+    # Dicts from classify_change are accepted too
+    assert builder.append(classify_change(_change(3, comment="rvv")))
+
+    batch = builder.build()
+    assert isinstance(batch, pa.RecordBatch)
+    assert batch.column("revid").to_pylist() == [1, 3]
+    assert batch.column("is_vandalism").to_pylist() == [False, True]
+
+    builder.clear()
+    assert len(builder) == 0
+    assert builder.build().num_rows == 0
+
+
+def test_batch_is_written_and_deduplicated(tmp_path):
+    db_path = str(tmp_path / "records.duckdb")
+    duckdb.connect(db_path).execute(SCHEMA).close()
+    db = DuckDBClient(db_path)
+    writer = RevertWriter(db)
+
+    builder = RevertBatchBuilder()
+    builder.extend(classify_record(_change(i)) for i in (1, 2, 2, 3))
+    assert writer.write_batch(builder.build()) == 3
+    assert writer.write_batch(builder.build()) == 0
+
+    row = db.execute(
+        "SELECT article, timestamp FROM revert_events_named WHERE revid = 2"
+    ).fetchone()
+    db.close()
+    assert row[0] == "Foo"
+    assert str(row[1]) == "2025-01-01 00:02:00"
+
+
+def test_engine_accepts_records():
+    engine = SlidingWindowEngine()
+    raised = []
+    for i, user in enumerate(["Alice", "Bob"] * 3 + ["Alice"], start=1):
+        raised += engine.process(classify_record(_change(i, user=user)))
+    assert any(incident["type"] == "mutual" for incident in raised)
@@ -0,0 +1,99 @@
+import random
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+
+import src.db.revert_writer as revert_writer
+import src.detection.revert_detector as revert_detector
+from benchmarks.bench_revert_detector import make_changes
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertWriter
+from src.detection.revert_detector import (
+    KEYWORD_SETS,
+    RECENT_CHANGE_SCHEMA,
+    KeywordMatcher,
+    classify_changes,
+    classify_record,
+    classify_table,
+)
+
+EDGE_CASES = [
+    {"title": "A", "revid": 1, "comment": None, "tags": None},
+    {"title": "B", "revid": 2, "comment": "rvv", "tags": ["mw-rollback"]},
+    {"title": "C", "revid": 3, "comment": "survey", "tags": []},
+    {"title": "D", "revid": 4, "comment": "Reverted: vandal", "tags": ["mw-rollback"]},
+    {"title": "E", "revid": 5, "comment": "", "tags": ["mw-undo", "visualeditor"]},
+]
+
+
+def test_columnar_matches_per_item_classification():
+    changes = make_changes(2000, seed=1) + EDGE_CASES
+    expected = classify_changes(changes)
+
+    classified = classify_table(pa.Table.from_pylist(changes, schema=RECENT_CHANGE_SCHEMA))
+
+    assert classified["is_revert"].to_pylist() == [c["is_revert"] for c in expected]
+    assert classified["is_vandalism_revert"].to_pylist() == [c["is_vandalism_revert"] for c in expected]
+    assert classified["article"].to_pylist() == [c["article"] for c in expected]
+
+
+# Keywords glued to letters, digits and marks of other scripts, and
+# characters whose lower-casing differs between Python and Arrow
+MIXED_SCRIPT_PIECES = [
+    "rv", "rvv", "undid", "revert", "vandal", "restore", "test edit", " ", "-", "_", "7",
+    "é", "ß", "я", "Д", "λ", "Σ", "中", "ह", "ि", "ع", "٣", "²", "Ⅻ", "İ", "ǅ", "\u0301",
+]
+
+
+def test_columnar_matches_per_item_classification_on_mixed_scripts():
+    rng = random.Random(7)
+    changes = [
+        {
+            "title": "A",
+            "revid": i,
+            "comment": "".join(rng.choice(MIXED_SCRIPT_PIECES) for _ in range(rng.randint(1, 6))),
+            "tags": [rng.choice(["visualeditor", "mw-rollback", "ærollback", "mw-undo"])],
+        }
+        for i in range(5000)
+    ]
+    expected = [(c["is_revert"], c["is_vandalism_revert"]) for c in classify_changes(changes)]
+
+    classified = classify_table(pa.Table.from_pylist(changes, schema=RECENT_CHANGE_SCHEMA))
+    columnar = list(zip(classified["is_revert"].to_pylist(), classified["is_vandalism_revert"].to_pylist()))
+    records = [(r.is_revert, r.is_vandalism_revert) for r in map(classify_record, changes)]
+
+    assert columnar == expected
+    assert records == expected
+
+
+def test_accepts_dataframes_with_missing_columns():
+    classified = classify_table(pd.DataFrame({"title": ["A", "B"], "comment": ["rv", "copyedit"]}))
+
+    assert classified["is_revert"].to_pylist() == [True, False]
+    assert classified["revid"].to_pylist() == [None, None]
+
+
+def test_writer_persists_columnar_reverts(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "columnar.duckdb")
+    duckdb.connect(db_path).execute(SCHEMA).close()
+    monkeypatch.setattr(revert_writer, "DUCKDB_PATH", db_path)
+    # KEYWORD_WORD_BOUNDARY: "survey" is not an "rv"
+    monkeypatch.setattr(revert_detector, "MATCHER", KeywordMatcher(KEYWORD_SETS, word_boundary=True))
+
+    page = [dict(c, wiki="en.wikipedia.org", timestamp="2025-01-01T00:00:00Z") for c in EDGE_CASES]
+    classified = classify_table(pa.Table.from_pylist(page, schema=RECENT_CHANGE_SCHEMA))
+
+    writer = RevertWriter()
+    assert writer.write_revert_table(classified) == 3
+    assert writer.write_revert_table(classified) == 0
+    rows = writer.db.execute(
+        "SELECT wiki, article, is_vandalism FROM revert_events_named ORDER BY revid"
+    ).fetchall()
+    writer.close()
+
+    assert rows == [
+        ("en.wikipedia.org", "B", True),
+        ("en.wikipedia.org", "D", True),
+        ("en.wikipedia.org", "E", False),
+    ]
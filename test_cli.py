@@ -0,0 +1,100 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from typer.testing import CliRunner
+
+import src.config as config
+import src.main as main
+from conftest import insert_reverts
+from src.cli import app
+from src.db.duckdb_client import DuckDBClient
+
+HEAVY_MODULES = ("duckdb", "pandas", "pyarrow", "requests", "aiohttp", "src.config", "src.main")
+
+
+def _python(*args):
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    return subprocess.run(
+        [sys.executable, *args],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+
+
+def test_help_imports_nothing_heavy():
+    loaded = _python(
+        "-c",
+        "import sys\n"
+        "from src.cli import app\n"
+        "try:\n"
+        "    app(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    assert loaded.strip().splitlines()[-1] == "[]"
+
+
+def test_init_db_then_detect(tmp_path):
+    db_path = str(tmp_path / "cli.duckdb")
+
+    assert "Initialized" in _python("-m", "src.cli", "--db", db_path, "init-db")
+    assert _python("-m", "src.cli", "--db", db_path, "detect").strip() == (
+        "0 3RR incidents, 0 mutual revert edit wars"
+    )
+
+
+def test_fetch_persists_reverts_without_detecting(tmp_path, monkeypatch):
+    page = [
+        {
+            "rcid": i,
+            "title": "A",
+            "user": "u1",
+            "revid": i,
+            "old_revid": i - 1,
+            "timestamp": f"2025-01-01T0{i}:00:00Z",
+            "comment": "rv",
+            "tags": [],
+            "wiki": "en.wikipedia.org",
+        }
+        for i in (1, 2)
+    ]
+    db_path = str(tmp_path / "fetch.duckdb")
+    monkeypatch.setattr(config, "DUCKDB_PATH", db_path)
+    monkeypatch.setattr(main, "WIKI_API_URLS", ["https://en.wikipedia.org/w/api.php"])
+    monkeypatch.setattr(main, "iter_recent_changes", lambda **kwargs: iter([page]))
+    monkeypatch.setattr(main, "detect", lambda db: pytest.fail("fetch must not detect"))
+
+    runner = CliRunner()
+    assert runner.invoke(app, ["init-db"]).exit_code == 0
+    result = runner.invoke(app, ["fetch"])
+    assert result.exit_code == 0, result.output
+    assert "Fetched 2 recent changes" in result.output
+
+    db = DuckDBClient(db_path)
+    assert db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0] == 2
+    db.close()
+
+
+def test_what_if_prints_one_row_per_config(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "what_if.duckdb")
+    monkeypatch.setattr(config, "DUCKDB_PATH", db_path)
+    runner = CliRunner()
+    assert runner.invoke(app, ["init-db"]).exit_code == 0
+
+    db = DuckDBClient(db_path)
+    now = datetime.utcnow()
+    insert_reverts(db.con, [("A", "u1", i, now - timedelta(hours=10 * i), False) for i in range(4)])
+    db.close()
+
+    result = runner.invoke(app, ["what-if", "--window", "24", "--window", "48", "--limit", "3", "--limit", "4"])
+    assert result.exit_code == 0, result.output
+    rows = [line.split() for line in result.output.splitlines()[1:]]
+    assert [(r[0], r[1], r[-2]) for r in rows] == [
+        ("24h", "3", "1"), ("24h", "4", "0"), ("48h", "3", "1"), ("48h", "4", "1")
+    ]
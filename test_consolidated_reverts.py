@@ -0,0 +1,80 @@
+import random
+from datetime import datetime, timedelta
+
+import duckdb
+
+from conftest import insert_reverts
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.detection.consolidation import consolidate_reverts, update_consolidated_reverts
+from src.detection.edit_war_detector import detect_edit_wars
+from src.detection.three_rr_detector import detect_three_rr
+
+
+def _key(rows):
+    return sorted(tuple(sorted(r.items())) for r in rows)
+
+
+def test_incremental_groups_match_full_regrouping(tmp_path):
+    con = duckdb.connect(str(tmp_path / "c.duckdb"))
+    con.execute(SCHEMA)
+    db = DuckDBClient(None, con=con)
+
+    rng = random.Random(5)
+    base = datetime(2025, 4, 1)
+    revid = 0
+
+    for batch in range(10):
+        rows = []
+        for _ in range(30):
+            revid += 1
+            # Minutes apart, mostly in order, with late arrivals that can
+            # extend, bridge or precede existing groups
+            minutes = batch * 20 + rng.uniform(-40, 20)
+            rows.append((
+                rng.choice(["A", "B"]),
+                rng.choice(["u1", "u2", "u3"]),
+                revid,
+                base + timedelta(minutes=minutes),
+                rng.random() < 0.1,
+            ))
+        insert_reverts(con, rows)
+
+        incremental = consolidate_reverts(db=db, incremental=True)
+        assert _key(incremental) == _key(consolidate_reverts(db=db))
+
+    assert update_consolidated_reverts(db) == 0
+    assert con.execute(
+        "SELECT SUM(raw_revert_count) FROM consolidated_reverts"
+    ).fetchone()[0] == con.execute(
+        "SELECT COUNT(*) FROM revert_events WHERE NOT is_vandalism"
+    ).fetchone()[0]
+
+    con.close()
+
+
+def test_three_rr_over_consolidated_table_matches_fused_pass(tmp_path):
+    con = duckdb.connect(str(tmp_path / "c.duckdb"))
+    con.execute(SCHEMA)
+    db = DuckDBClient(None, con=con)
+
+    rng = random.Random(9)
+    base = datetime(2025, 4, 1)
+    insert_reverts(con, [
+        (
+            rng.choice(["A", "B", "C"]),
+            rng.choice(["u1", "u2", "u3", "u4"]),
+            i,
+            base + timedelta(minutes=rng.uniform(0, 2 * 24 * 60)),
+            False,
+        )
+        for i in range(300)
+    ])
+
+    from_table = detect_three_rr(db=db, consolidated=True)
+    fused = detect_edit_wars(db=db)["three_rr"]
+
+    assert from_table
+    assert _key(from_table) == _key(fused)
+
+    con.close()
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import duckdb
+
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA, init_db
+from src.db.revert_writer import RevertWriter
+from src.detection.edit_war_detector import detect_edit_wars
+from src.detection.mutual_revert_detector import detect_mutual_reverts
+from src.detection.revert_detector import classify_record
+from src.detection.sharded_detector import ShardedDetector
+from src.detection.streaming_engine import SlidingWindowEngine
+from src.detection.three_rr_detector import detect_three_rr
+
+BASE = datetime(2025, 1, 1)
+
+
+def _undo(wiki, user, revid, hours):
+    return classify_record({
+        "wiki": wiki,
+        "title": "Berlin",
+        "user": user,
+        "revid": revid,
+        "old_revid": revid - 1,
+        "timestamp": (BASE + timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "comment": f"Undid revision {revid - 1}",
+        "tags": [],
+    })
+
+
+# Alice and Bob take turns reverting on the English and the German
+# Berlin: two reverts each per wiki, short of 3RR there
+REVERTS = [
+    _undo(wiki, user, revid, hours)
+    for revid, (wiki, user, hours) in enumerate([
+        ("en.wikipedia.org", "Alice", 0),
+        ("en.wikipedia.org", "Bob", 0.5),
+        ("de.wikipedia.org", "Alice", 1),
+        ("de.wikipedia.org", "Bob", 1.5),
+        ("en.wikipedia.org", "Alice", 2),
+        ("en.wikipedia.org", "Bob", 2.5),
+        ("de.wikipedia.org", "Alice", 3),
+        ("de.wikipedia.org", "Bob", 3.5),
+    ], start=100)
+]
+
+
+def test_same_named_articles_on_two_wikis_are_counted_apart():
+    db = DuckDBClient(None, con=duckdb.connect())
+    db.execute(SCHEMA)
+    assert RevertWriter(db).write_reverts(REVERTS) == 8
+
+    assert detect_three_rr(db=db) == []
+    assert detect_three_rr(db=db, consolidated=True) == []
+    assert detect_three_rr(incremental=True, db=db) == []
+    assert detect_three_rr(incremental=True, consolidated=True, db=db) == []
+
+    # One mutual revert case per wiki, not one with both wikis' reverts
+    mutual = detect_mutual_reverts(db=db)
+    assert [(m["wiki"], m["reverts_user_a"], m["reverts_user_b"]) for m in mutual] == [
+        ("de.wikipedia.org", 2, 2),
+        ("en.wikipedia.org", 2, 2),
+    ]
+    assert [m["last_interaction"] for m in mutual] == [BASE + timedelta(hours=3.5), BASE + timedelta(hours=2.5)]
+
+    fused = detect_edit_wars(db=db)
+    assert (fused["three_rr"], fused["mutual"]) == ([], mutual)
+    assert fused["consolidated_count"] == 8
+
+    detector = ShardedDetector(shards=4, workers=1)
+    try:
+        sharded = detector.detect(db)
+    finally:
+        detector.close()
+    assert (sharded["three_rr"], sharded["mutual"]) == ([], mutual)
+
+    engine = SlidingWindowEngine()
+    raised = [incident for revert in REVERTS for incident in engine.process(revert)]
+    assert [(i["type"], i["wiki"], i["reverts_user_a"], i["reverts_user_b"]) for i in raised] == [
+        ("mutual", "en.wikipedia.org", 2, 2),
+        ("mutual", "de.wikipedia.org", 2, 2),
+    ]
+    assert engine.mutual_cases() == mutual
+
+    db.close()
+
+
+def test_a_third_revert_on_one_wiki_is_a_3rr_case():
+    db = DuckDBClient(None, con=duckdb.connect())
+    db.execute(SCHEMA)
+    RevertWriter(db).write_reverts(REVERTS)
+    detect_three_rr(incremental=True, consolidated=True, db=db)
+
+    RevertWriter(db).write_reverts([_undo("de.wikipedia.org", "Alice", 200, 5)])
+
+    expected = [{
+        "wiki": "de.wikipedia.org",
+        "article": "Berlin",
+        "user": "Alice",
+        "last_revert_time": BASE + timedelta(hours=5),
+        "revert_count": 3,
+    }]
+    assert detect_three_rr(db=db) == expected
+    assert detect_three_rr(incremental=True, consolidated=True, db=db) == expected
+    assert detect_edit_wars(db=db)["three_rr"] == expected
+    db.close()
+
+
+def test_init_db_rebuilds_detector_state_keyed_without_wiki(tmp_path):
+    path = str(tmp_path / "old.duckdb")
+    con = duckdb.connect(path)
+    con.execute(SCHEMA)
+    con.execute(
+        "CREATE TABLE three_rr_incidents (article_id INTEGER, user_id INTEGER, "
+        "last_revert_time TIMESTAMP, revert_count BIGINT, PRIMARY KEY (article_id, user_id))"
+    )
+    con.execute("INSERT INTO three_rr_incidents VALUES (1, 1, '2025-01-01', 4)")
+    con.execute("CREATE TABLE detector_state (detector VARCHAR PRIMARY KEY, high_water BIGINT, updated_at TIMESTAMP)")
+    con.execute("INSERT INTO detector_state VALUES ('three_rr', 8, now())")
+    con.close()
+
+    init_db(path)
+
+    con = duckdb.connect(path)
+    assert con.execute("SELECT COUNT(*) FROM three_rr_incidents").fetchone()[0] == 0
+    assert "wiki" in [r[0] for r in con.execute("DESCRIBE three_rr_incidents").fetchall()]
+    assert con.execute("SELECT COUNT(*) FROM detector_state").fetchone()[0] == 0
+    con.close()
@@ -0,0 +1,217 @@
+import json
+import os
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import duckdb
+import pytest
+
+import src.api.event_stream as event_stream
+import src.daemon as daemon
+import src.main as main
+from src.daemon import Daemon
+from src.db.duckdb_init import SCHEMA
+from test_event_stream import RECORDED_EVENTS, server  # noqa: F401  (fixture)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "daemon.duckdb")
+    con = duckdb.connect(path)
+    con.execute(SCHEMA)
+    con.close()
+
+    monkeypatch.setattr(daemon, "DUCKDB_PATH", path)
+    monkeypatch.setattr(main, "DUCKDB_PATH", path)
+    monkeypatch.setattr(main, "WIKI_API_URLS", ["https://en.wikipedia.org/w/api.php"])
+    monkeypatch.setattr(daemon, "WIKI_API_URLS", ["https://en.wikipedia.org/w/api.php"])
+    monkeypatch.setattr(main, "DETECTION_LOOKBACK_HOURS", 24 * 365 * 100)
+    monkeypatch.setattr(daemon, "HOT_RETENTION_DAYS", 365 * 100)
+    monkeypatch.setattr(daemon, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    return path
+
+
+@pytest.fixture
+def restore_signals():
+    handlers = {s: signal.getsignal(s) for s in (signal.SIGTERM, signal.SIGINT)}
+    yield
+    for s, handler in handlers.items():
+        signal.signal(s, handler)
+
+
+def _page(start):
+    return [
+        {
+            "rcid": i,
+            "title": "A",
+            "user": "u1" if i % 2 else "u2",
+            "revid": i,
+            "old_revid": i - 1,
+            "timestamp": f"2025-01-01T{i:02d}:00:00Z",
+            "comment": "rv",
+            "tags": [],
+        }
+        for i in range(start, start + 3)
+    ]
+
+
+def test_cycles_share_warm_connections(db_path, monkeypatch):
+    sessions = []
+    opened = []
+
+    def fake_iter(session=None, **kwargs):
+        sessions.append(session)
+        yield _page(1 + 3 * (len(sessions) - 1))
+
+    real_client = daemon.DuckDBClient
+
+    def counting_client(path):
+        opened.append(path)
+        return real_client(path)
+
+    monkeypatch.setattr(main, "iter_recent_changes", fake_iter)
+    monkeypatch.setattr(daemon, "DuckDBClient", counting_client)
+
+    runner = Daemon(interval=0)
+    runner.run(max_cycles=3)
+
+    assert runner.cycles == 3
+    assert opened == [db_path]
+    assert len(sessions) == 3 and len({id(s) for s in sessions}) == 1
+    assert sessions[0] is not None
+
+    con = duckdb.connect(db_path)
+    assert con.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0] == 9
+    con.close()
+
+
+def test_sigterm_stops_between_cycles(db_path, monkeypatch, restore_signals):
+    monkeypatch.setattr(main, "iter_recent_changes", lambda **kwargs: iter([]))
+
+    runner = Daemon(interval=60)
+    runner.install_signal_handlers()
+    threading.Timer(0.3, os.kill, [os.getpid(), signal.SIGTERM]).start()
+
+    start = time.monotonic()
+    runner.run()
+
+    assert runner.cycles == 1
+    assert time.monotonic() - start < 10
+
+
+def test_failed_cycle_does_not_stop_the_daemon(db_path, monkeypatch):
+    calls = []
+
+    def flaky_iter(**kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return iter([])
+
+    monkeypatch.setattr(main, "iter_recent_changes", flaky_iter)
+
+    runner = Daemon(interval=0)
+    runner.run(max_cycles=2)
+    assert len(calls) == 2
+
+
+def test_archives_old_reverts_once_per_retention_interval(db_path, monkeypatch, tmp_path):
+    pages = [[_page(1)]]
+    monkeypatch.setattr(main, "iter_recent_changes", lambda **kwargs: iter(pages.pop() if pages else []))
+    monkeypatch.setattr(daemon, "HOT_RETENTION_DAYS", 7)
+
+    runs = []
+    real_archive = daemon.archive_old_reverts
+
+    def counting_archive(db, **kwargs):
+        runs.append(kwargs)
+        return real_archive(db, **kwargs)
+
+    monkeypatch.setattr(daemon, "archive_old_reverts", counting_archive)
+
+    runner = Daemon(interval=0, retention_interval=3600)
+    runner.run(max_cycles=3)
+
+    assert runs == [{"retention_days": 7, "archive_dir": str(tmp_path / "archive")}]
+    assert (tmp_path / "archive" / "day=2025-01-01" / "data.parquet").exists()
+    con = duckdb.connect(db_path)
+    assert con.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0] == 0
+    con.close()
+
+    # 0 leaves retention to an external schedule
+    runs.clear()
+    Daemon(interval=0, retention_interval=0).run(max_cycles=2)
+    assert runs == []
+
+
+def test_detects_after_each_ingested_batch(server, db_path, monkeypatch):  # noqa: F811
+    monkeypatch.setattr(main, "STREAM_BATCH_SIZE", 1)
+    detected = []
+    monkeypatch.setattr(daemon, "publish_report", lambda *cases: detected.append(cases))
+
+    runner = Daemon()
+    runner.run_on_ingest(url=server.url, max_reconnects=1)
+
+    # Two reverts in the recording, each flushed as its own batch
+    assert runner.cycles == 2
+    assert len(detected) == 2
+
+
+class QuietServer(ThreadingHTTPServer):
+    """Sends one revert, then holds the connection open without data."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), QuietHandler)
+        self.closing = threading.Event()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v2/stream/recentchange"
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    # Chunked, as EventStreams sends it, so the client sees the event at once
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        event = RECORDED_EVENTS[0]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        body = f"id: {event['id']}\ndata: {json.dumps(event)}\n\n".encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+        self.wfile.flush()
+        self.server.closing.wait(30)
+        self.close_connection = True
+
+
+def test_sigterm_flushes_a_quiet_stream_and_returns(db_path, monkeypatch, restore_signals):
+    srv = QuietServer()
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    monkeypatch.setattr(event_stream, "EVENTSTREAM_READ_TIMEOUT", 0.5)
+
+    runner = Daemon()
+    runner.install_signal_handlers()
+    threading.Timer(0.5, os.kill, [os.getpid(), signal.SIGTERM]).start()
+
+    start = time.monotonic()
+    try:
+        runner.run_on_ingest(url=srv.url)
+    finally:
+        srv.closing.set()
+        srv.shutdown()
+        srv.server_close()
+
+    assert time.monotonic() - start < 10
+    # The pending revert is flushed on the way out, without a detect cycle
+    assert runner.cycles == 0
+    con = duckdb.connect(db_path)
+    assert con.execute("SELECT revid FROM revert_events").fetchall() == [(2,)]
+    assert con.execute("SELECT last_event_id FROM stream_cursor").fetchone()[0] == "101"
+    con.close()
@@ -0,0 +1,102 @@
+import pickle
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import insert_reverts
+from src.detection.consolidation import consolidate_reverts
+from src.detection.detector_config import DEFAULT_CONFIG, DetectorConfig, threshold_grid
+from src.detection.edit_war_detector import detect_edit_wars, evaluate_grid
+from src.detection.streaming_engine import SlidingWindowEngine
+from src.detection.three_rr_detector import detect_three_rr
+from test_edit_war_detector import _client, _three_rr_over_actions
+
+
+def _without_timings(result):
+    return {k: v for k, v in result.items() if k != "timings"}
+
+
+def test_configs_are_values():
+    grid = threshold_grid(three_rr_window_hours=(12, 24, 48), three_rr_limit=(3, 4))
+
+    assert len(grid) == 6 and len(set(grid)) == 6
+    assert DetectorConfig() == DEFAULT_CONFIG
+    assert DEFAULT_CONFIG.replace(three_rr_limit=4) in grid
+    assert pickle.loads(pickle.dumps(grid[0])) == grid[0]
+    assert grid[0].three_rr_window == timedelta(hours=12)
+    with pytest.raises(TypeError):
+        threshold_grid(three_rr_windows=(12,))
+
+
+def test_grid_matches_one_pass_per_config(tmp_path):
+    con, db = _client(tmp_path)
+    rng = random.Random(5)
+    base = datetime(2025, 3, 1)
+    insert_reverts(con, [
+        (
+            f"A{rng.randrange(12)}",
+            f"u{rng.randrange(6)}",
+            i,
+            base + timedelta(minutes=rng.uniform(0, 4 * 24 * 60)),
+            rng.random() < 0.1,
+        )
+        for i in range(300)
+    ])
+
+    configs = threshold_grid(three_rr_window_hours=(12, 24, 48), three_rr_limit=(3, 4)) + [
+        DEFAULT_CONFIG.replace(min_reverts_each=3),
+        DEFAULT_CONFIG.replace(consolidation_window_minutes=60, mutual_window_hours=2, min_reverts_each=3),
+    ]
+    grid = evaluate_grid(configs, db=db, consolidated=True)
+
+    assert list(grid) == configs
+    for config in configs:
+        assert _without_timings(grid[config]) == _without_timings(
+            detect_edit_wars(db=db, config=config)
+        )
+        actions = consolidate_reverts(db=db, config=config)
+        assert {
+            (c["article"], c["user"], c["revert_count"]) for c in grid[config]["three_rr"]
+        } == _three_rr_over_actions(actions, config.three_rr_window_hours, config.three_rr_limit)
+
+    # The thresholds actually change the outcome
+    assert len({len(r["three_rr"]) for r in grid.values()}) > 1
+    assert len({len(r["mutual"]) for r in grid.values()}) > 1
+
+    con.close()
+
+
+def test_sql_detectors_bind_config(tmp_path):
+    con, db = _client(tmp_path)
+    base = datetime(2025, 3, 1)
+    # Four reverts ten hours apart
+    insert_reverts(con, [("A", "u1", i, base + timedelta(hours=10 * i), False) for i in range(4)])
+
+    def counts(**changes):
+        return [c["revert_count"] for c in detect_three_rr(db=db, config=DEFAULT_CONFIG.replace(**changes))]
+
+    assert counts() == [3]
+    assert counts(three_rr_limit=4) == []
+    assert counts(three_rr_limit=4, three_rr_window_hours=48) == [4]
+    assert len(consolidate_reverts(db=db, config=DEFAULT_CONFIG.replace(consolidation_window_minutes=600))) == 1
+
+    with pytest.raises(ValueError):
+        detect_three_rr(incremental=True, db=db, config=DEFAULT_CONFIG.replace(three_rr_window_hours=48))
+    with pytest.raises(ValueError):
+        consolidate_reverts(db=db, incremental=True, config=DEFAULT_CONFIG.replace(consolidation_window_minutes=1))
+
+    con.close()
+
+
+def test_streaming_engine_takes_config():
+    base = datetime(2025, 3, 1)
+    reverts = [
+        {"article": "A", "user": "u1", "timestamp": base + timedelta(hours=i), "is_vandalism_revert": False}
+        for i in range(3)
+    ]
+
+    default = SlidingWindowEngine()
+    strict = SlidingWindowEngine(config=DEFAULT_CONFIG.replace(three_rr_limit=4))
+    assert [i["type"] for r in reverts for i in default.process(r)] == ["three_rr"]
+    assert [i for r in reverts for i in strict.process(r)] == []
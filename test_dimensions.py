@@ -0,0 +1,155 @@
+import duckdb
+import pyarrow as pa
+
+from src.db.compact import articles_keyed_by_name, compact_revert_events, needs_compaction
+from src.db.dimensions import NameInterner, dimensions_for, encoded_select, intern_from_sql, lookup_names
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA, init_db
+from src.db.revert_writer import RevertWriter
+
+
+def _db():
+    con = duckdb.connect(":memory:")
+    con.execute(SCHEMA)
+    return DuckDBClient(None, con=con)
+
+
+def test_interner_caches_and_evicts():
+    db = _db()
+    interner = NameInterner("articles", max_names=2)
+
+    first = interner.intern(db, ["Foo", "Bar", None, "Foo"])
+    assert first[0] == first[3]
+    assert first[2] is None
+    assert interner.misses == 2
+
+    assert interner.intern(db, ["Bar"]) == [first[1]]
+    assert interner.hits == 1
+
+    interner.intern(db, ["Baz"])
+    assert len(interner) == 2
+    # Evicted names come back from the table with the same id
+    assert interner.intern(db, ["Foo"]) == [first[0]]
+    assert db.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 3
+
+
+def test_writer_stores_ids_and_view_joins_names():
+    db = _db()
+    writer = RevertWriter(db)
+    for revid in (1, 2):
+        writer.write_batch(pa.table({
+            "article": ["Foo"],
+            "user": ["Alice"],
+            "revid": [revid],
+            "timestamp": ["2025-01-01 00:00:00"],
+            "is_vandalism": [False],
+        }))
+
+    ids = db.execute("SELECT DISTINCT article_id, user_id FROM revert_events").fetchall()
+    assert len(ids) == 1
+    article_id, user_id = ids[0]
+    assert lookup_names(db, "articles", [article_id, None]) == {article_id: "Foo"}
+    assert lookup_names(db, "users", [user_id]) == {user_id: "Alice"}
+    assert db.execute('SELECT article, "user" FROM revert_events_named').fetchall() == [("Foo", "Alice")] * 2
+    assert dimensions_for(db).users.hits == 1
+
+
+def test_legacy_table_is_migrated_to_ids():
+    con = duckdb.connect(":memory:")
+    con.execute(
+        """
+        CREATE TABLE revert_events (
+          article VARCHAR, user VARCHAR, revid BIGINT, old_revid BIGINT,
+          timestamp TIMESTAMP, is_vandalism BOOLEAN, comment TEXT, wiki VARCHAR
+        );
+        INSERT INTO revert_events VALUES
+          ('Foo', 'Alice', 1, 0, '2025-01-01 00:00:00', FALSE, 'rv', 'en.wikipedia.org'),
+          ('Foo', 'Bob',   2, 1, '2025-01-01 00:01:00', FALSE, 'rv', 'en.wikipedia.org');
+        """
+    )
+    db = DuckDBClient(None, con=con)
+    assert needs_compaction(db)
+
+    compact_revert_events(db)
+    con.execute(SCHEMA)
+
+    assert not needs_compaction(db)
+    assert con.execute(
+        'SELECT article, "user" FROM revert_events_named ORDER BY revid'
+    ).fetchall() == [("Foo", "Alice"), ("Foo", "Bob")]
+    assert con.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 2
+
+
+def test_articles_are_keyed_by_wiki():
+    db = _db()
+    interner = NameInterner("articles")
+
+    wikis = ["en.wikipedia.org", "de.wikipedia.org", "en.wikipedia.org"]
+    en, de, en_again = interner.intern(db, ["Berlin"] * 3, wikis)
+    assert en != de and en == en_again
+
+    # Writers and bulk loads agree on the ids; users stay global
+    RevertWriter(db).write_batch(pa.table({
+        "wiki": ["de.wikipedia.org", "en.wikipedia.org", "fr.wikipedia.org"],
+        "article": ["Berlin"] * 3,
+        "user": ["Alice"] * 3,
+        "revid": [1, 1, 1],
+        "timestamp": ["2025-01-01 00:00:00"] * 3,
+        "is_vandalism": [False] * 3,
+    }))
+    source = "SELECT 'fr.wikipedia.org' AS wiki, 'Berlin' AS article, 'Alice' AS \"user\""
+    intern_from_sql(db, source)
+    bulk = db.execute(encoded_select(source, ["wiki"])).fetchone()
+
+    rows = db.execute("SELECT wiki, article_id, user_id FROM revert_events ORDER BY wiki").fetchall()
+    assert [r[1] for r in rows[:2]] == [de, en]
+    assert rows[2][1:] == bulk[:2]
+    assert len({r[2] for r in rows}) == 1
+    assert db.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 3
+
+
+def test_articles_keyed_by_name_are_split_per_wiki(tmp_path):
+    path = str(tmp_path / "old.duckdb")
+    con = duckdb.connect(path)
+    # The articles table as it was before it was keyed by wiki
+    old_articles = "wiki VARCHAR NOT NULL DEFAULT '',\n  name VARCHAR NOT NULL,\n  UNIQUE (wiki, name)"
+    assert old_articles in SCHEMA
+    con.execute(SCHEMA.replace(old_articles, "name VARCHAR NOT NULL UNIQUE"))
+    con.execute("INSERT INTO articles (name) VALUES ('Berlin'), ('Paris'), ('Unused')")
+    con.execute("INSERT INTO users (name) VALUES ('Alice')")
+    con.execute(
+        """
+        INSERT INTO revert_events (article_id, user_id, revid, timestamp, is_vandalism, wiki) VALUES
+          (1, 1, 1, '2025-01-01', FALSE, 'en.wikipedia.org'),
+          (1, 1, 2, '2025-01-01', FALSE, 'de.wikipedia.org'),
+          (1, 1, 3, '2025-01-01', FALSE, 'de.wikipedia.org'),
+          (2, 1, 4, '2025-01-01', FALSE, 'de.wikipedia.org')
+        """
+    )
+    con.close()
+
+    init_db(path)
+
+    db = DuckDBClient(path)
+    assert not articles_keyed_by_name(db)
+    assert db.execute(
+        'SELECT wiki, article, article_id FROM revert_events_named ORDER BY revid'
+    ).fetchall() == [
+        ("en.wikipedia.org", "Berlin", 4),
+        ("de.wikipedia.org", "Berlin", 1),
+        ("de.wikipedia.org", "Berlin", 1),
+        ("de.wikipedia.org", "Paris", 2),
+    ]
+    assert db.execute("SELECT wiki, name FROM articles WHERE article_id = 3").fetchall() == [("", "Unused")]
+
+    # New writes find the split articles
+    RevertWriter(db).write_batch(pa.table({
+        "wiki": ["en.wikipedia.org"],
+        "article": ["Berlin"],
+        "user": ["Alice"],
+        "revid": [5],
+        "timestamp": ["2025-01-02 00:00:00"],
+        "is_vandalism": [False],
+    }))
+    assert db.execute("SELECT article_id FROM revert_events WHERE revid = 5").fetchone()[0] == 4
+    db.close()
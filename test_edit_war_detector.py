@@ -0,0 +1,127 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import duckdb
+
+import src.main as main
+from conftest import insert_reverts
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.detection.consolidation import consolidate_reverts
+from src.detection.edit_war_detector import detect_edit_wars
+from src.detection.mutual_revert_detector import detect_mutual_reverts
+from src.detection.three_rr_detector import detect_three_rr
+
+
+def _client(tmp_path):
+    con = duckdb.connect(str(tmp_path / "fused.duckdb"))
+    con.execute(SCHEMA)
+    return con, DuckDBClient(None, con=con)
+
+
+def _three_rr_over_actions(actions, window_hours=24, limit=3):
+    """Reference: rolling count of consolidated actions per (article, user)."""
+    by_pair = defaultdict(list)
+    for a in actions:
+        by_pair[(a["article"], a["user"])].append(a["timestamp"])
+
+    found = set()
+    for (article, user), starts in by_pair.items():
+        starts.sort()
+        best = max(
+            sum(1 for s in starts if t - timedelta(hours=window_hours) <= s <= t)
+            for t in starts
+        )
+        if best >= limit:
+            found.add((article, user, best))
+    return found
+
+
+def test_fused_pass_matches_separate_detectors(tmp_path):
+    con, db = _client(tmp_path)
+    rng = random.Random(11)
+    base = datetime(2025, 2, 1)
+
+    insert_reverts(con, [
+        (
+            rng.choice(["A", "B", "C", "D"]),
+            # Mostly regulars, plus one-off users who can't form a mutual pair
+            rng.choice(["u1", "u2", "u3"]) if rng.random() < 0.8 else f"once{i}",
+            i,
+            base + timedelta(minutes=rng.uniform(0, 3 * 24 * 60)),
+            rng.random() < 0.1,
+        )
+        for i in range(600)
+    ])
+
+    fused = detect_edit_wars(db=db)
+    consolidated = consolidate_reverts(db=db)
+
+    def key(rows):
+        return sorted(tuple(sorted(r.items())) for r in rows)
+
+    assert key(fused["consolidated"]) == key(consolidated)
+    assert key(fused["mutual"]) == key(detect_mutual_reverts(db=db))
+    assert {
+        (c["article"], c["user"], c["revert_count"]) for c in fused["three_rr"]
+    } == _three_rr_over_actions(consolidated)
+    assert set(fused["timings"]) == {"scan", "consolidate", "three_rr", "mutual", "names"}
+
+    con.close()
+
+
+def test_rapid_reverts_count_once_for_3rr(tmp_path):
+    con, db = _client(tmp_path)
+    base = datetime(2025, 2, 1)
+
+    # Three reverts a minute apart: one consolidated action, not a 3RR case
+    insert_reverts(con, [
+        ("A", "u1", i, base + timedelta(minutes=i), False) for i in range(3)
+    ])
+
+    assert len(detect_three_rr(db=db)) == 1
+    assert detect_edit_wars(db=db)["three_rr"] == []
+
+    # Two more spread-out reverts make three separate actions
+    insert_reverts(con, [
+        ("A", "u1", 10, base + timedelta(hours=2), False),
+        ("A", "u1", 11, base + timedelta(hours=4), False),
+    ])
+    cases = detect_edit_wars(db=db)["three_rr"]
+    assert [(c["user"], c["revert_count"], c["last_revert_time"]) for c in cases] == [
+        ("u1", 3, base + timedelta(hours=4))
+    ]
+
+    con.close()
+
+
+def test_pipeline_detect_matches_the_fused_pass(tmp_path, monkeypatch):
+    con, db = _client(tmp_path)
+    rng = random.Random(3)
+    base = datetime(2025, 2, 1)
+    monkeypatch.setattr(main, "DETECTION_LOOKBACK_HOURS", 24 * 365 * 100)
+
+    def batch(start, n):
+        return [
+            (
+                rng.choice(["A", "B", "C"]),
+                rng.choice(["u1", "u2", "u3"]),
+                start + i,
+                base + timedelta(minutes=rng.uniform(0, 2 * 24 * 60)),
+                rng.random() < 0.1,
+            )
+            for i in range(n)
+        ]
+
+    # 3RR is maintained incrementally across cycles, mutual reverts swept
+    for cycle in range(3):
+        insert_reverts(con, batch(cycle * 100, 100))
+        three_rr, mutual = main.detect(db)
+        fused = detect_edit_wars(db=db, consolidated=False)
+
+        assert three_rr == fused["three_rr"]
+        assert mutual == fused["mutual"]
+
+    con.close()
+    assert three_rr and mutual
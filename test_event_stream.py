@@ -0,0 +1,200 @@
+import importlib
+import json
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import islice
+
+import duckdb
+import pytest
+
+import src.api.event_stream as event_stream
+import src.config as config
+import src.main as main
+from src.api.event_stream import stream_recent_changes, to_recent_change
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertWriter
+from src.detection.detector_config import DEFAULT_CONFIG
+from src.detection.revert_detector import classify_record
+from src.main import run_stream
+
+# Recorded recentchange events (trimmed to the fields we consume)
+RECORDED_EVENTS = [
+    {"id": 101, "type": "edit", "namespace": 0, "wiki": "enwiki", "server_name": "en.wikipedia.org", "bot": False, "title": "Foo",
+     "user": "Alice", "comment": "Reverted edits by Bob", "timestamp": 1735689600,
+     "revision": {"old": 1, "new": 2}},
+    {"id": 102, "type": "edit", "namespace": 0, "wiki": "enwiki", "server_name": "en.wikipedia.org", "bot": True, "title": "Foo",
+     "user": "SomeBot", "comment": "rv", "timestamp": 1735689601,
+     "revision": {"old": 2, "new": 3}},
+    {"id": 103, "type": "log", "namespace": 0, "wiki": "enwiki", "server_name": "en.wikipedia.org", "bot": False, "title": "Foo",
+     "user": "Carol", "comment": "", "timestamp": 1735689602},
+    {"id": 104, "type": "edit", "namespace": 1, "wiki": "enwiki", "server_name": "en.wikipedia.org", "bot": False, "title": "Talk:Foo",
+     "user": "Dave", "comment": "undo", "timestamp": 1735689603,
+     "revision": {"old": 4, "new": 5}},
+    {"id": 105, "type": "edit", "namespace": 0, "wiki": "enwiki", "server_name": "en.wikipedia.org", "bot": False, "title": "Bar",
+     "user": "Bob", "comment": "copyedit", "timestamp": 1735689604,
+     "revision": {"old": 6, "new": 7}},
+    {"id": 106, "type": "edit", "namespace": 0, "wiki": "enwiki", "server_name": "en.wikipedia.org", "bot": False, "title": "Foo",
+     "user": "Bob", "comment": "Undid revision 2 by Alice", "timestamp": 1735689605,
+     "revision": {"old": 2, "new": 8}},
+]
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Local EventStreams stand-in that replays RECORDED_EVENTS."""
+
+    def __init__(self, drop_after):
+        super().__init__(("127.0.0.1", 0), ReplayHandler)
+        self.drop_after = drop_after
+        self.last_event_ids = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v2/stream/recentchange"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        last_id = self.headers.get("Last-Event-ID")
+        self.server.last_event_ids.append(last_id)
+
+        start = 0
+        if last_id is not None:
+            start = next(i + 1 for i, e in enumerate(RECORDED_EVENTS) if str(e["id"]) == last_id)
+
+        # First connection drops midway to exercise reconnects
+        end = len(RECORDED_EVENTS)
+        if len(self.server.last_event_ids) == 1:
+            end = self.server.drop_after
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        self.wfile.write(b"retry: 0\n:ok\n\n")
+        for event in RECORDED_EVENTS[start:end]:
+            self.wfile.write(
+                f"event: message\nid: {event['id']}\ndata: {json.dumps(event)}\n\n".encode()
+            )
+        self.wfile.flush()
+
+
+@pytest.fixture
+def server():
+    srv = ReplayServer(drop_after=2)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_filters_and_resumes_with_last_event_id(server):
+    changes = list(islice(
+        stream_recent_changes(url=server.url, wikis=["enwiki"], retry_seconds=0),
+        3
+    ))
+
+    assert [event_id for event_id, _ in changes] == ["101", "105", "106"]
+    assert [c["revid"] for _, c in changes] == [2, 7, 8]
+    assert changes[0][1]["timestamp"] == "2025-01-01T00:00:00Z"
+    assert changes[0][1]["wiki"] == "en.wikipedia.org"
+    assert server.last_event_ids[:2] == [None, "102"]
+
+
+def test_run_stream_persists_reverts_and_position(server, tmp_path, monkeypatch):
+    db_path = str(tmp_path / "stream.duckdb")
+    con = duckdb.connect(db_path)
+    con.execute(SCHEMA)
+    con.close()
+
+    monkeypatch.setattr(main, "DUCKDB_PATH", db_path)
+
+    run_stream(url=server.url, max_reconnects=1)
+
+    con = duckdb.connect(db_path)
+    rows = con.execute("SELECT wiki, article, \"user\", revid FROM revert_events_named ORDER BY revid").fetchall()
+    position = con.execute("SELECT last_event_id FROM stream_cursor").fetchone()[0]
+    con.close()
+
+    assert rows == [("en.wikipedia.org", "Foo", "Alice", 2), ("en.wikipedia.org", "Foo", "Bob", 8)]
+    assert position == "106"
+
+
+def test_run_stream_dispatches_engine_incidents(server, tmp_path, monkeypatch):
+    db_path = str(tmp_path / "stream.duckdb")
+    con = duckdb.connect(db_path)
+    con.execute(SCHEMA)
+    con.close()
+
+    monkeypatch.setattr(main, "DUCKDB_PATH", db_path)
+    monkeypatch.setattr(main, "DETECTION_CONFIG", DEFAULT_CONFIG.replace(three_rr_limit=1))
+
+    incidents = []
+    run_stream(url=server.url, max_reconnects=1, on_incident=incidents.append)
+
+    assert [(i["type"], i["user"]) for i in incidents] == [("three_rr", "Alice"), ("three_rr", "Bob")]
+
+
+def test_stream_alerts_agree_with_batch_detection(monkeypatch):
+    # Three reverts a minute apart are one consolidated action, so neither
+    # --stream nor the polled detect() reports them as 3RR
+    base = datetime.utcnow() - timedelta(hours=1)
+    changes = [
+        (str(i), {
+            "wiki": "en.wikipedia.org",
+            "title": "Foo",
+            "user": "Alice",
+            "revid": 10 + i,
+            "old_revid": 9 + i,
+            "timestamp": (base + timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "comment": f"Undid revision {9 + i}",
+            "tags": [],
+        })
+        for i in range(3)
+    ]
+    monkeypatch.setattr(event_stream, "stream_recent_changes", lambda **kwargs: iter(changes))
+
+    db = DuckDBClient(None, con=duckdb.connect())
+    db.execute(SCHEMA)
+    incidents = []
+    run_stream(url="http://127.0.0.1/unused", db=db, on_incident=incidents.append)
+
+    assert db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0] == 3
+    assert incidents == []
+    assert main.detect(db)[0] == []
+    db.close()
+
+
+def test_stream_reverts_are_keyed_by_their_wiki():
+    # The same revid on two wikis is two reverts; other wikis are dropped
+    events = [
+        dict(RECORDED_EVENTS[0], wiki=dbname, server_name=host)
+        for dbname, host in (("enwiki", "en.wikipedia.org"), ("dewiki", "de.wikipedia.org"),
+                             ("frwiki", "fr.wikipedia.org"))
+    ]
+    changes = [to_recent_change(e, wikis=["en.wikipedia.org", "dewiki"]) for e in events]
+    assert changes[2] is None
+
+    db = DuckDBClient(None, con=duckdb.connect())
+    db.execute(SCHEMA)
+    assert RevertWriter(db).write_reverts([classify_record(c) for c in changes[:2]]) == 2
+    assert db.execute("SELECT wiki, revid FROM revert_events ORDER BY wiki").fetchall() == [
+        ("de.wikipedia.org", 2), ("en.wikipedia.org", 2)
+    ]
+    db.close()
+
+
+def test_stream_defaults_to_the_polled_wikis(monkeypatch):
+    monkeypatch.setenv("WIKI_API_URLS", "https://en.wikipedia.org/w/api.php,https://de.wikipedia.org/w/api.php")
+    monkeypatch.delenv("EVENTSTREAM_WIKIS", raising=False)
+    monkeypatch.delenv("EVENTSTREAM_WIKI", raising=False)
+    try:
+        assert importlib.reload(config).EVENTSTREAM_WIKIS == ["en.wikipedia.org", "de.wikipedia.org"]
+    finally:
+        monkeypatch.undo()
+        importlib.reload(config)
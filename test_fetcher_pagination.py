@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import src.db.cursor_store as cursor_store
+from src.api.fetcher import iter_recent_changes
+from src.db.cursor_store import CursorStore
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Serves canned recentchanges pages keyed by rccontinue."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls.append(dict(params))
+        return FakeResponse(self.pages[params.get("rccontinue")])
+
+
+def _rc(rcid, ts):
+    return {"rcid": rcid, "title": "A", "user": "U", "timestamp": ts}
+
+
+def test_follows_rccontinue_and_streams_pages():
+    session = FakeSession({
+        None: {
+            "continue": {"rccontinue": "20250101000002|3", "continue": "-||"},
+            "query": {"recentchanges": [_rc(1, "2025-01-01T00:00:01Z"), _rc(2, "2025-01-01T00:00:02Z")]},
+        },
+        "20250101000002|3": {
+            "query": {"recentchanges": [_rc(3, "2025-01-01T00:00:02Z")]},
+        },
+    })
+
+    pages = iter_recent_changes(
+        limit=2,
+        start=datetime(2025, 1, 1),
+        end="2025-01-02T00:00:00Z",
+        api_url="http://wiki.invalid/api.php",
+        session=session
+    )
+
+    assert [[c["rcid"] for c in p] for p in pages] == [[1, 2], [3]]
+    assert session.calls[0]["rcstart"] == "2025-01-01T00:00:00Z"
+    assert session.calls[0]["rcend"] == "2025-01-02T00:00:00Z"
+    assert session.calls[0]["rcdir"] == "newer"
+    assert session.calls[1]["rccontinue"] == "20250101000002|3"
+
+
+def test_skips_changes_already_consumed_at_cursor():
+    session = FakeSession({
+        None: {"query": {"recentchanges": [
+            _rc(7, "2025-01-01T00:00:05Z"),
+            _rc(8, "2025-01-01T00:00:05Z"),
+            _rc(9, "2025-01-01T00:00:06Z"),
+        ]}},
+    })
+
+    pages = list(iter_recent_changes(
+        start="2025-01-01T00:00:05Z",
+        after_rcid=7,
+        api_url="http://wiki.invalid/api.php",
+        session=session
+    ))
+
+    assert [c["rcid"] for c in pages[0]] == [8, 9]
+
+
+def test_cursor_store_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cursor_store, "DUCKDB_PATH", str(tmp_path / "cursor.duckdb"))
+
+    store = CursorStore()
+    assert store.get("enwiki") is None
+
+    store.set("enwiki", 10, "2025-01-01T00:00:05Z")
+    store.set("enwiki", 12, "2025-01-01T00:00:09Z")
+
+    assert store.get("enwiki") == (12, datetime(2025, 1, 1, 0, 0, 9))
+    store.close()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+import pyarrow as pa
+
+from benchmarks.workload import generate_changes
+from src.api.fetcher import DEFAULT_RC_PROPS
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.detection.identity_revert_index import IdentityRevertIndex, mark_identity_reverts
+from src.detection.revert_detector import RECENT_CHANGE_SCHEMA, classify_table
+
+A = "a" * 40
+B = "b" * 40
+C = "c" * 40
+
+
+def change(revid, old_revid, sha1, title="Page", comment=""):
+    return {
+        "type": "edit",
+        "ns": 0,
+        "title": title,
+        "user": f"User{revid}",
+        "revid": revid,
+        "old_revid": old_revid,
+        "timestamp": f"2025-01-01T00:00:{revid:02d}Z",
+        "comment": comment,
+        "tags": [],
+        "sha1": sha1,
+    }
+
+
+def test_restored_revision_is_an_identity_revert():
+    index = IdentityRevertIndex()
+    restored = index.observe_page([
+        change(1, 0, A),
+        change(2, 1, B),
+        change(3, 2, A),
+        # Null edit: same content as its parent
+        change(4, 3, A),
+        change(5, 4, C, title="Other"),
+    ])
+
+    assert restored == [None, None, 1, None, None]
+    assert "sha1" in DEFAULT_RC_PROPS.split("|")
+
+
+def test_depth_and_article_limits_with_reload_from_duckdb():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DuckDBClient(os.path.join(tmp, "test.duckdb"))
+        db.execute(SCHEMA)
+
+        shallow = IdentityRevertIndex(depth=2)
+        shallow.observe_page([change(1, 0, A), change(2, 1, B), change(3, 2, C)])
+        # A has fallen out of the last two revisions
+        assert shallow.observe_page([change(4, 3, A)]) == [None]
+
+        index = IdentityRevertIndex(max_articles=1)
+        index.observe_page([change(1, 0, A), change(2, 1, B)], db)
+        index.observe_page([change(3, 0, C, title="Other")], db)
+        assert len(index) == 1
+
+        # "Page" was evicted and comes back from revision_hashes
+        assert index.observe_page([change(4, 2, A)], db) == [1]
+
+        # ... as it does for a fresh process
+        assert IdentityRevertIndex().observe_page([change(5, 4, B)], db) == [2]
+
+        db.close()
+
+
+def test_mark_identity_reverts_flags_silent_reverts():
+    page = [change(1, 0, A), change(2, 1, B, comment="rewrote lead"), change(3, 2, A)]
+    classified = classify_table(pa.Table.from_pylist(page, schema=RECENT_CHANGE_SCHEMA))
+    assert not any(classified["is_revert"].to_pylist())
+
+    restored = IdentityRevertIndex().observe_page(page)
+    marked = mark_identity_reverts(classified, restored)
+
+    assert marked["is_revert"].to_pylist() == [False, False, True]
+
+
+def test_workload_silent_reverts_are_found_by_hash():
+    changes = generate_changes(5_000, seed=2, revert_ratio=0.2, silent_revert_share=1.0)
+    silent = {
+        c["revid"] for c in changes
+        if not c["comment"] and not c["tags"] and c["old_revid"]
+    }
+
+    restored = IdentityRevertIndex().observe_page(changes)
+    found = {c["revid"] for c, r in zip(changes, restored) if r is not None}
+
+    assert found
+    assert found <= {c["revid"] for c in changes if c["old_revid"]}
+    assert len(found & silent) > 0.5 * len(found)
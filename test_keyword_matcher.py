@@ -0,0 +1,60 @@
+from src.detection.revert_detector import (
+    REVERT_SUMMARY_KEYWORDS,
+    KeywordMatcher,
+    classify_change,
+    classify_changes,
+    is_revert,
+    is_vandalism_revert,
+)
+
+
+def _change(comment="", tags=None):
+    return {"title": "Foo", "user": "Alice", "revid": 1, "comment": comment, "tags": tags}
+
+
+def test_keywords_match_at_word_start_only():
+    matcher = KeywordMatcher({"revert": REVERT_SUMMARY_KEYWORDS}, word_boundary=True)
+    assert not matcher.match("added a survey of sources")
+    assert matcher.match("rv unsourced") == {"revert"}
+    assert matcher.match("Reverting per talk page") == {"revert"}
+
+
+def test_substring_semantics_are_the_default():
+    matcher = KeywordMatcher({"revert": ("rv",)})
+    assert matcher.match("Survey") == {"revert"}
+
+    # Classification is unchanged unless KEYWORD_WORD_BOUNDARY is set
+    assert is_revert(_change("added a survey of sources"))
+    assert is_revert(_change("rv unsourced"))
+    assert is_revert(_change("", tags=["mw-undo"]))
+    assert is_revert(_change("", tags=["visualeditor", "mw-rollback"]))
+
+
+def test_overlapping_keywords_from_different_sets_are_all_found():
+    matcher = KeywordMatcher({
+        "revert": ("revert", "reverted"),
+        "vandalism": ("vandal", "reverted vandalism"),
+    })
+    assert matcher.match("Reverted vandalism by X") == {"revert", "vandalism"}
+    assert matcher.match_many(["rv", "", "REVERTED", None]) == [
+        frozenset(), frozenset(), {"revert"}, frozenset()
+    ]
+
+
+def test_vandalism_reverts():
+    assert is_vandalism_revert(_change("rvv"))
+    assert is_vandalism_revert(_change("Reverted edits: vandalism", tags=["mw-rollback"]))
+    assert not is_vandalism_revert(_change("Undid revision 12 by Bob"))
+
+
+def test_batch_matches_per_item_classification():
+    changes = [
+        _change("Undid revision 12 by Bob"),
+        _change("copyedit"),
+        _change("rvv", tags=["mw-rollback"]),
+        _change(None, tags=None),
+        _change("restored"),
+        _change("test edit reverted", tags=["mw-reverted"]),
+    ]
+    assert classify_changes(changes) == [classify_change(c) for c in changes]
+    assert classify_changes([]) == []
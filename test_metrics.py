@@ -0,0 +1,100 @@
+import json
+from datetime import datetime
+
+import src.main as main
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.utils.metrics import METRICS, Metrics
+
+
+def test_disabled_metrics_are_noops(tmp_path):
+    metrics = Metrics(enabled=False)
+    pages = [[1, 2], [3]]
+
+    with metrics.stage("classify") as stage:
+        stage.rows_in += 10
+    metrics.inc("api_requests", wiki="en")
+    metrics.set_gauge("ingest_lag_seconds", 3, wiki="en")
+    assert metrics.timed_iter("fetch", pages) is pages
+
+    metrics.export(textfile=str(tmp_path / "m.prom"), summary_path=str(tmp_path / "m.json"))
+    assert metrics.stages == {} and metrics.counters == {} and metrics.gauges == {}
+    assert not list(tmp_path.iterdir())
+
+
+def test_stages_counters_and_exposition(tmp_path):
+    metrics = Metrics(enabled=True)
+
+    assert list(metrics.timed_iter("fetch", iter([[1, 2], [3]]))) == [[1, 2], [3]]
+    for _ in range(2):
+        with metrics.stage("classify") as stage:
+            stage.rows_in += 5
+            stage.rows_out += 1
+    metrics.record_stage("mutual", 0.5, rows_in=6, rows_out=2)
+    metrics.inc("api_requests", wiki="en.wikipedia.org")
+    metrics.inc("api_requests", wiki="en.wikipedia.org")
+    metrics.set_gauge("ingest_lag_seconds", 12.5, wiki='odd"wiki')
+
+    summary = metrics.summary()
+    assert summary["stages"]["fetch"]["calls"] == 2
+    assert summary["stages"]["fetch"]["rows_out"] == 3
+    assert summary["stages"]["classify"]["rows_in"] == 10
+    assert summary["stages"]["mutual"]["seconds"] == 0.5
+    assert summary["counters"]["api_requests"] == [{"labels": {"wiki": "en.wikipedia.org"}, "value": 2}]
+
+    text = metrics.prometheus_text()
+    assert 'editwar_stage_rows_in{stage="classify"} 10' in text
+    assert 'editwar_api_requests{wiki="en.wikipedia.org"} 2' in text
+    assert 'editwar_ingest_lag_seconds{wiki="odd\\"wiki"} 12.5' in text
+    assert "# TYPE editwar_stage_duration_seconds gauge" in text
+
+    metrics.export(textfile=str(tmp_path / "m.prom"), summary_path=str(tmp_path / "m.json"))
+    assert (tmp_path / "m.prom").read_text().startswith("# HELP")
+    assert json.loads((tmp_path / "m.json").read_text())["stages"]["classify"]["calls"] == 2
+
+
+def test_run_records_every_stage(tmp_path, monkeypatch):
+    page = [
+        {
+            "rcid": i,
+            "title": "A",
+            "user": user,
+            "revid": i,
+            "old_revid": i - 1,
+            "timestamp": f"2025-01-01T0{i}:00:00Z",
+            "comment": "rv",
+            "tags": [],
+            "wiki": "en.wikipedia.org",
+        }
+        for i, user in enumerate(["u1", "u2", "u1", "u2", "u1"], start=1)
+    ]
+
+    monkeypatch.setattr(main, "DUCKDB_PATH", str(tmp_path / "run.duckdb"))
+    monkeypatch.setattr(main, "WIKI_API_URLS", ["https://en.wikipedia.org/w/api.php"])
+    monkeypatch.setattr(main, "iter_recent_changes", lambda **kwargs: iter([page]))
+    monkeypatch.setattr(main, "DETECTION_LOOKBACK_HOURS", 24 * 365 * 100)
+    monkeypatch.setattr(METRICS, "enabled", True)
+
+    db = DuckDBClient(str(tmp_path / "run.duckdb"))
+    db.execute(SCHEMA)
+    db.close()
+
+    textfile, summary_path = tmp_path / "run.prom", tmp_path / "run.json"
+    monkeypatch.setattr(
+        METRICS, "export",
+        lambda: Metrics.export(METRICS, textfile=str(textfile), summary_path=str(summary_path))
+    )
+
+    main.run()
+
+    summary = json.loads(summary_path.read_text())
+    stages = summary["stages"]
+    for name in ("fetch", "classify", "write", "consolidate", "three_rr", "mutual", "format"):
+        assert name in stages
+    assert stages["fetch"]["rows_out"] == 5
+    assert stages["write"]["rows_out"] == 5
+    assert stages["mutual"]["rows_out"] == 1
+    assert summary["gauges"]["ingest_lag_seconds"][0]["value"] > (
+        datetime.utcnow() - datetime(2025, 1, 2)
+    ).total_seconds()
+    assert "editwar_stage_duration_seconds" in textfile.read_text()
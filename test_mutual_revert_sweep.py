@@ -0,0 +1,80 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import duckdb
+
+import src.detection.mutual_revert_detector as mutual_revert_detector
+from conftest import insert_reverts
+from src.db.duckdb_init import SCHEMA
+from src.detection.mutual_revert_detector import detect_mutual_reverts, find_mutual_reverts
+
+
+def _brute_force(rows, window_hours=24, min_each=2):
+    """Reference definition: compare every pair of reverts on an article."""
+    window = timedelta(hours=window_hours)
+    interacting = defaultdict(set)  # (article, a, b) -> {(user, index)}
+    last = {}
+
+    for i, (article, user_i, ts_i) in enumerate(rows):
+        for j, (other_article, user_j, ts_j) in enumerate(rows):
+            if article != other_article or user_i >= user_j or abs(ts_i - ts_j) > window:
+                continue
+            key = (article, user_i, user_j)
+            interacting[key] |= {("a", i), ("b", j)}
+            last[key] = max(last.get(key, ts_i), ts_i, ts_j)
+
+    result = []
+    for key, events in interacting.items():
+        reverts_a = sum(1 for side, _ in events if side == "a")
+        reverts_b = sum(1 for side, _ in events if side == "b")
+        if reverts_a >= min_each and reverts_b >= min_each:
+            result.append(key + (reverts_a, reverts_b, last[key]))
+    return sorted(result)
+
+
+def test_sweep_matches_pairwise_definition():
+    rng = random.Random(3)
+    base = datetime(2025, 1, 1)
+
+    rows = sorted(
+        (
+            rng.choice(["A", "B", "C"]),
+            rng.choice(["u1", "u2", "u3", "u4", "u5"]),
+            base + timedelta(hours=rng.uniform(0, 120)),
+        )
+        for _ in range(300)
+    )
+    rows.sort(key=lambda r: (r[0], r[2]))
+
+    # Rows without a wiki column are all one wiki's ("")
+    assert sorted(find_mutual_reverts(rows)) == [("",) + r for r in _brute_force(rows)]
+
+
+def test_counts_each_users_reverts_not_pair_rows(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "mutual.duckdb")
+    monkeypatch.setattr(mutual_revert_detector, "DUCKDB_PATH", db_path)
+
+    con = duckdb.connect(db_path)
+    con.execute(SCHEMA)
+    insert_reverts(con, [
+        ("Foo", "Alice", 1, datetime(2025, 1, 1, 0), False),
+        ("Foo", "Bob", 2, datetime(2025, 1, 1, 1), False),
+        ("Foo", "Alice", 3, datetime(2025, 1, 1, 2), False),
+        ("Foo", "Bob", 4, datetime(2025, 1, 1, 3), False),
+        ("Foo", "Alice", 5, datetime(2025, 1, 1, 4), False),
+        ("Foo", "Carol", 6, datetime(2025, 1, 1, 5), True),
+    ], wiki="en.wikipedia.org")
+    con.close()
+
+    cases = detect_mutual_reverts()
+
+    assert cases == [{
+        "wiki": "en.wikipedia.org",
+        "article": "Foo",
+        "user_a": "Alice",
+        "user_b": "Bob",
+        "reverts_user_a": 3,
+        "reverts_user_b": 2,
+        "last_interaction": datetime(2025, 1, 1, 4),
+    }]
@@ -0,0 +1,187 @@
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from src.api.wiki_editor import WikiEditor
+from src.db.duckdb_client import DuckDBClient
+from src.reporter.publisher import STALE_PAGE_TEXT, Publisher
+from src.utils.rate_limiter import TokenBucket
+
+
+class FakeWiki(ThreadingHTTPServer):
+    """Local stand-in for a MediaWiki api.php that accepts edits."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeWikiHandler)
+        self.pages = {}
+        self.edits = []
+        # Responses to force before accepting edits, e.g. ["maxlag"]
+        self.throttle = []
+        self.logged_in = False
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/w/api.php"
+
+
+class FakeWikiHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        if params.get("type") == "login":
+            self._reply({"query": {"tokens": {"logintoken": "login+\\"}}})
+        else:
+            self._reply({"query": {"tokens": {"csrftoken": "csrf+\\"}}})
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        server = self.server
+
+        if params["action"] == "login":
+            server.logged_in = params["lgpassword"] == "secret"
+            self._reply({"login": {"result": "Success" if server.logged_in else "Failed"}})
+            return
+
+        assert params["token"] == "csrf+\\"
+        assert params["maxlag"] == "5"
+
+        if server.throttle:
+            code = server.throttle.pop(0)
+            self._reply(
+                {"error": {"code": code, "info": "Waiting for a database server: 7 seconds lagged"}},
+                headers=[("Retry-After", "0")]
+            )
+            return
+
+        title, text = params["title"], params["text"]
+        server.edits.append((title, text, params["summary"]))
+        if server.pages.get(title) == text:
+            self._reply({"edit": {"result": "Success", "title": title, "nochange": ""}})
+            return
+        server.pages[title] = text
+        self._reply({"edit": {"result": "Success", "title": title, "newrevid": len(server.edits)}})
+
+
+@pytest.fixture
+def wiki():
+    srv = FakeWiki()
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture
+def db():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = DuckDBClient(os.path.join(tmp, "test.duckdb"))
+        yield client
+        client.close()
+
+
+def make_publisher(db, wiki, bucket=None):
+    editor = WikiEditor(api_url=wiki.url, username="Bot@test", password="secret")
+    return Publisher(db, editor=editor, bucket=bucket or TokenBucket(rate=1000, capacity=10))
+
+
+def test_pending_updates_to_a_page_are_coalesced(db, wiki):
+    publisher = make_publisher(db, wiki)
+
+    publisher.submit(["report v1"], target="User:Bot/Report")
+    publisher.submit(["report v2", "page two"], target="User:Bot/Report")
+    assert publisher.drain() == 2
+
+    assert wiki.logged_in
+    assert [e[:2] for e in wiki.edits] == [("User:Bot/Report", "report v2"), ("User:Bot/Report/2", "page two")]
+
+    # Unchanged content is not saved again
+    assert publisher.submit(["report v2", "page two"], target="User:Bot/Report") == 0
+    assert publisher.drain() == 0
+    assert len(wiki.edits) == 2
+
+
+def test_maxlag_is_retried_without_losing_the_edit(db, wiki):
+    wiki.throttle = ["maxlag", "ratelimited"]
+    publisher = make_publisher(db, wiki)
+
+    publisher.submit(["lagged report"], target="Report")
+    assert publisher.drain(max_seconds=10) == 1
+    assert wiki.pages == {"Report": "lagged report"}
+    assert publisher.queue.pending() == 0
+
+
+def test_queue_survives_a_restart(db, wiki):
+    first = make_publisher(db, wiki)
+    first.submit(["queued before restart"], target="Report")
+    # Nothing is saved: the deadline passes before the first token
+    slow = TokenBucket(rate=0.001, capacity=1)
+    slow.tokens = 0
+    assert make_publisher(db, wiki, bucket=slow).drain(max_seconds=0.1) == 0
+
+    restarted = make_publisher(db, wiki)
+    assert restarted.drain() == 1
+    assert wiki.pages == {"Report": "queued before restart"}
+    assert restarted.drain() == 0
+    assert len(wiki.edits) == 1
+
+
+def test_token_bucket_limits_the_rate():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=0.5, capacity=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(4):
+        bucket.acquire()
+
+    # Two immediate (burst), then one every 2 seconds
+    assert slept == [2.0, 2.0]
+
+    bucket.pause(5)
+    assert bucket.delay() == pytest.approx(7.0)
+
+
+def test_pages_past_a_shrunk_report_are_blanked(db, wiki):
+    publisher = make_publisher(db, wiki)
+
+    publisher.submit(["page one", "page two", "page three"], target="Report")
+    assert publisher.drain() == 3
+
+    # Page 4 was queued but never saved: it is dropped, not blanked
+    slow = TokenBucket(rate=0.001, capacity=1)
+    slow.tokens = 0
+    publisher.submit(["page one", "page two", "page three", "page four"], target="Report")
+    assert make_publisher(db, wiki, bucket=slow).drain(max_seconds=0.1) == 0
+
+    assert publisher.submit(["new page one"], target="Report") == 3
+    assert publisher.drain() == 3
+    assert wiki.pages == {
+        "Report": "new page one",
+        "Report/2": STALE_PAGE_TEXT,
+        "Report/3": STALE_PAGE_TEXT,
+    }
+
+    # Already blanked pages are not saved again
+    assert publisher.submit(["new page one"], target="Report") == 0
@@ -0,0 +1,153 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import duckdb
+import pyarrow as pa
+import pytest
+
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertWriter
+from src.detection.three_rr_detector import detect_three_rr, iter_three_rr
+from src.reporter.report_formatter import (
+    FileSink,
+    PageListSink,
+    format_full_report,
+    format_three_rr_reports,
+    iter_report,
+    iter_report_pages,
+    render_report,
+)
+
+BASE = datetime(2025, 1, 1)
+
+
+def three_rr_cases(n):
+    for i in range(n):
+        yield {
+            "article": f"Article {i} – ünïcode",
+            "user": f"User{i}",
+            "revert_count": 4,
+            "last_revert_time": BASE + timedelta(minutes=i),
+        }
+
+
+def mutual_cases(n):
+    for i in range(n):
+        yield {
+            "article": f"War {i}",
+            "user_a": "A",
+            "user_b": "B",
+            "reverts_user_a": 2,
+            "reverts_user_b": 3,
+            "last_interaction": BASE,
+        }
+
+
+def test_stream_matches_full_report():
+    assert "".join(iter_report(three_rr_cases(5), mutual_cases(3))) == format_full_report(
+        list(three_rr_cases(5)), list(mutual_cases(3))
+    )
+    assert "".join(iter_report_pages([], [], max_bytes=10_000)) == format_full_report([], [])
+
+
+def test_pages_respect_the_byte_budget_and_break_between_cases():
+    sink = PageListSink()
+    pages, size = render_report(three_rr_cases(200), mutual_cases(100), sink, max_bytes=4_000)
+
+    assert pages == len(sink.pages) > 5
+    assert size == sum(len(p.encode("utf-8")) for p in sink.pages)
+    assert all(len(p.encode("utf-8")) <= 4_000 for p in sink.pages)
+
+    text = "".join(sink.pages)
+    for i in range(200):
+        assert text.count(f"[[Article {i} – ünïcode]]") == 1
+    for i in range(100):
+        assert text.count(f"[[War {i}]]") == 1
+
+    # Continuation pages say where they are; no page ends on a bare title
+    assert sink.pages[1].startswith("== Three-Revert Rule violations (continued) ==\n")
+    assert sink.pages[-1].startswith("== Mutual revert edit wars (continued) ==\n")
+    assert not any(p.rstrip().endswith("==") for p in sink.pages)
+
+
+def test_same_named_articles_on_two_wikis_are_told_apart():
+    cases = [
+        dict(case, wiki=wiki)
+        for wiki in ("en.wikipedia.org", "de.wikipedia.org")
+        for case in mutual_cases(1)
+    ]
+    text = format_full_report([], cases)
+
+    assert "[https://en.wikipedia.org/wiki/War_0 War 0] (en.wikipedia.org)" in text
+    assert "[https://de.wikipedia.org/wiki/War_0 War 0] (de.wikipedia.org)" in text
+    assert "[[War 0]]" not in text
+
+
+def test_file_sink_numbers_pages():
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = FileSink(os.path.join(tmp, "report.wiki"))
+        pages, _ = render_report(three_rr_cases(50), [], sink, max_bytes=2_000)
+
+        assert sink.paths[0] == os.path.join(tmp, "report.wiki")
+        assert sink.paths[-1] == os.path.join(tmp, f"report-{pages}.wiki")
+        assert sorted(os.listdir(tmp)) == sorted(os.path.basename(p) for p in sink.paths)
+
+
+def test_file_sink_removes_pages_of_a_longer_report():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "report.wiki")
+        render_report(three_rr_cases(50), [], FileSink(path), max_bytes=2_000)
+        with open(os.path.join(tmp, "notes-3.wiki"), "w") as f:
+            f.write("not a report page")
+
+        sink = FileSink(path)
+        pages, _ = render_report(three_rr_cases(5), [], sink, max_bytes=2_000)
+
+        # Page 3 onwards of the first report is gone; other files are left alone
+        assert pages == len(sink.paths) < 3
+        assert sorted(os.listdir(tmp)) == sorted(
+            ["notes-3.wiki"] + [os.path.basename(p) for p in sink.paths]
+        )
+
+
+def test_continued_heading_counts_against_the_budget():
+    cases = [dict(c, article="X" * 500) for c in three_rr_cases(3)]
+    # Exactly one case with its section title: the longer continued title
+    # does not fit with a case, so it is left out rather than overflowing
+    max_bytes = len(format_three_rr_reports(cases[:1]).encode("utf-8"))
+
+    pages = list(iter_report_pages(cases, [], max_bytes=max_bytes))
+
+    assert len(pages) == 5
+    assert all(len(p.encode("utf-8")) <= max_bytes for p in pages)
+    assert not any("(continued)" in p for p in pages)
+
+
+def test_iter_three_rr_streams_from_the_cursor():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DuckDBClient(os.path.join(tmp, "test.duckdb"))
+        db.execute(SCHEMA)
+        RevertWriter(db).write_batch(pa.table({
+            "article": ["Page"] * 4,
+            "user": ["Warrior"] * 4,
+            "revid": list(range(4)),
+            "timestamp": [BASE + timedelta(hours=i) for i in range(4)],
+            "is_vandalism": [False] * 4,
+        }))
+
+        streamed = list(iter_three_rr(db))
+        assert streamed == detect_three_rr(db=db, consolidated=True)
+        assert streamed[0]["revert_count"] == 4
+
+        # The cursor is closed when the iterator is, even half-consumed
+        cursors = []
+        open_cursor = db.cursor
+        db.cursor = lambda: cursors.append(open_cursor()) or cursors[-1]
+        incidents = iter_three_rr(db)
+        next(incidents)
+        incidents.close()
+        with pytest.raises(duckdb.ConnectionException):
+            cursors[0].execute("SELECT 1")
+        db.close()
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import duckdb
+
+from conftest import insert_reverts
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.retention import archive_old_reverts
+from src.detection.mutual_revert_detector import detect_mutual_reverts
+from src.detection.three_rr_detector import detect_three_rr
+
+NOW = datetime(2025, 3, 20, 12, 0)
+WIKI = "en.wikipedia.org"
+
+
+def _seed(con, days_ago, revid_start, count=4):
+    base = NOW - timedelta(days=days_ago)
+    insert_reverts(
+        con,
+        [("A", "u1", revid_start + i, base + timedelta(minutes=10 * i), False) for i in range(count)],
+        wiki=WIKI,
+    )
+
+
+def test_archive_moves_old_days_and_is_idempotent(tmp_path):
+    con = duckdb.connect(str(tmp_path / "r.duckdb"))
+    con.execute(SCHEMA)
+    db = DuckDBClient(None, con=con)
+    archive_dir = str(tmp_path / "archive")
+
+    _seed(con, days_ago=10, revid_start=100)
+    _seed(con, days_ago=9, revid_start=200)
+    _seed(con, days_ago=1, revid_start=300)
+
+    assert archive_old_reverts(db, retention_days=7, archive_dir=archive_dir, now=NOW) == 8
+    assert con.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0] == 4
+    assert (tmp_path / "archive" / "day=2025-03-10" / "data.parquet").exists()
+    assert (tmp_path / "archive" / "day=2025-03-11" / "data.parquet").exists()
+
+    # Nothing left to move; history is still complete through the view
+    assert archive_old_reverts(db, retention_days=7, archive_dir=archive_dir, now=NOW) == 0
+    assert con.execute("SELECT COUNT(*) FROM revert_events_all").fetchone()[0] == 12
+
+    # A late event (and a re-delivered duplicate) for an archived day is merged in
+    insert_reverts(con, [("B", "u2", 999, NOW - timedelta(days=10), False)], wiki=WIKI)
+    insert_reverts(con, [("A", "u1", 100, NOW - timedelta(days=10), False)], wiki=WIKI)
+    assert archive_old_reverts(db, retention_days=7, archive_dir=archive_dir, now=NOW) == 2
+
+    day_file = str(tmp_path / "archive" / "day=2025-03-10" / "data.parquet")
+    assert con.execute(f"SELECT COUNT(*) FROM read_parquet('{day_file}')").fetchone()[0] == 5
+    assert con.execute("SELECT COUNT(*) FROM revert_events_all").fetchone()[0] == 13
+    assert con.execute(
+        "SELECT COUNT(*) FROM revert_events_all WHERE day = DATE '2025-03-10'"
+    ).fetchone()[0] == 5
+
+    con.close()
+
+
+def test_detectors_ignore_reverts_before_since(tmp_path):
+    con = duckdb.connect(str(tmp_path / "r.duckdb"))
+    con.execute(SCHEMA)
+    db = DuckDBClient(None, con=con)
+
+    # An old 3RR case and an old mutual war, both outside the look-back
+    old = NOW - timedelta(days=5)
+    insert_reverts(con, [
+        ("A", "u1" if i % 2 else "u2", 10 + i, old + timedelta(minutes=5 * i), False)
+        for i in range(8)
+    ], wiki=WIKI)
+
+    since = NOW - timedelta(hours=48)
+    assert detect_three_rr(db=db, since=since) == []
+    assert detect_mutual_reverts(db=db, since=since) == []
+    assert detect_three_rr(incremental=True, db=db, since=since) == []
+
+    assert len(detect_three_rr(db=db)) == 2
+    assert len(detect_mutual_reverts(db=db)) == 1
+
+    con.close()
@@ -0,0 +1,77 @@
+import duckdb
+
+import src.db.revert_writer as revert_writer
+from src.db.compact import compact_revert_events, needs_compaction
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertWriter
+
+
+def _revert(revid, wiki="en.wikipedia.org"):
+    return {
+        "wiki": wiki,
+        "article": "Foo",
+        "user": "Alice",
+        "revid": revid,
+        "old_revid": revid - 1,
+        "timestamp": "2025-01-01T00:00:00Z",
+        "comment": "rv",
+        "is_revert": True,
+        "is_vandalism_revert": False,
+    }
+
+
+def test_overlapping_batches_are_written_once(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "dedup.duckdb")
+    duckdb.connect(db_path).execute(SCHEMA).close()
+    monkeypatch.setattr(revert_writer, "DUCKDB_PATH", db_path)
+
+    writer = RevertWriter()
+    assert writer.write_reverts([_revert(1), _revert(2), _revert(2)]) == 2
+    assert writer.write_reverts([_revert(2), _revert(3)]) == 1
+    # Same revid on another wiki is a different event
+    assert writer.write_reverts([_revert(3, wiki="de.wikipedia.org")]) == 1
+
+    batch = [_revert(i) for i in range(1, 100_001)]
+    assert writer.write_reverts(batch) == 100_000 - 3
+
+    count = writer.db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0]
+    writer.close()
+    assert count == 100_001
+
+
+def test_compaction_dedups_legacy_table(tmp_path):
+    db = DuckDBClient(str(tmp_path / "legacy.duckdb"))
+    db.execute(
+        """
+        CREATE TABLE revert_events (
+          article VARCHAR, user VARCHAR, revid BIGINT, old_revid BIGINT,
+          timestamp TIMESTAMP, is_vandalism BOOLEAN, comment TEXT
+        )
+        """
+    )
+    for _ in range(3):
+        db.execute(
+            "INSERT INTO revert_events VALUES "
+            "('Foo', 'Alice', 1, 0, '2025-01-01', FALSE, 'rv'), "
+            "('Foo', 'Bob', 2, 1, '2025-01-01', FALSE, 'rv')"
+        )
+
+    assert needs_compaction(db)
+    assert compact_revert_events(db) == 4
+    assert not needs_compaction(db)
+    assert db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0] == 2
+
+    # Names now live in the dimension tables
+    assert db.execute(
+        "SELECT article, \"user\" FROM revert_events_named ORDER BY revid"
+    ).fetchall() == [("Foo", "Alice"), ("Foo", "Bob")]
+    assert db.execute("SELECT COUNT(*) FROM articles").fetchone()[0] == 1
+
+    # The rebuilt table enforces the key
+    inserted = db.execute(
+        "INSERT INTO revert_events (article_id, user_id, revid, wiki) "
+        "VALUES (1, 1, 1, '') ON CONFLICT DO NOTHING"
+    ).fetchone()[0]
+    db.close()
+    assert inserted == 0
@@ -0,0 +1,55 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+import pytest
+
+from benchmarks.workload import generate_changes
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertWriter
+from src.detection.edit_war_detector import detect_edit_wars
+from src.detection.revert_detector import classify_changes
+from src.detection.sharded_detector import ShardedDetector
+
+
+@pytest.fixture(scope="module")
+def db():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = DuckDBClient(os.path.join(tmp, "test.duckdb"))
+        client.execute(SCHEMA)
+        changes = generate_changes(20_000, seed=7, revert_ratio=0.3, n_articles=300, n_users=40)
+        RevertWriter(client).write_reverts(classify_changes(changes))
+        yield client
+        client.close()
+
+
+def test_sharded_pass_matches_single_pass(db):
+    expected = detect_edit_wars(db=db)
+    assert expected["three_rr"] and expected["mutual"]
+
+    detector = ShardedDetector(shards=4, workers=2)
+    try:
+        sharded = detector.detect(db=db, consolidated=True)
+        # Shard export is redone every cycle
+        since = datetime(2025, 1, 1) + timedelta(hours=1)
+        recent = detector.detect(db=db, since=since)
+    finally:
+        detector.close()
+
+    for key in ("consolidated", "three_rr", "mutual", "event_count", "consolidated_count"):
+        assert sharded[key] == expected[key]
+    for key in ("three_rr", "mutual", "event_count"):
+        assert recent[key] == detect_edit_wars(db=db, since=since)[key]
+    assert recent["consolidated"] == []
+
+    assert set(sharded["timings"]) == {"export", "scan", "consolidate", "three_rr", "mutual", "names"}
+    assert not os.path.exists(detector.shard_dir)
+
+
+def test_more_shards_than_articles(db):
+    detector = ShardedDetector(shards=2000, workers=1)
+    try:
+        assert detector.detect(db=db)["three_rr"] == detect_edit_wars(db=db)["three_rr"]
+    finally:
+        detector.close()
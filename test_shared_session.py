@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from src.db.cursor_store import CursorStore
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.db.revert_writer import RevertWriter
+from src.detection.consolidation import consolidate_reverts
+from src.detection.mutual_revert_detector import detect_mutual_reverts
+from src.detection.three_rr_detector import detect_three_rr
+
+
+def _reverts():
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "article": "Foo",
+            "user": user,
+            "revid": i,
+            "old_revid": i - 1,
+            "timestamp": base + timedelta(hours=i),
+            "comment": "rv",
+            "is_revert": True,
+            "is_vandalism_revert": False,
+        }
+        for i, user in enumerate(["Alice", "Bob", "Alice", "Bob", "Alice"], start=1)
+    ]
+
+
+def test_stages_share_one_injected_session(tmp_path):
+    db = DuckDBClient(str(tmp_path / "shared.duckdb"))
+    db.execute(SCHEMA)
+
+    writer = RevertWriter(db)
+    assert writer.write_reverts(_reverts()) == 5
+    writer.close()
+
+    store = CursorStore(db)
+    store.set("en", 1, "2025-01-01T00:00:00Z")
+    store.close()
+
+    serial = (
+        consolidate_reverts(db=db),
+        detect_three_rr(incremental=True, db=db),
+        detect_mutual_reverts(db=db),
+    )
+
+    # Injected sessions are left open for the caller
+    assert db.execute("SELECT COUNT(*) FROM revert_events").fetchone()[0] == 5
+    assert serial[1][0]["revert_count"] == 3
+    assert serial[2][0]["reverts_user_a"] == 3
+
+    def on_cursor(stage, **kwargs):
+        cursor = db.cursor()
+        try:
+            return stage(db=cursor, **kwargs)
+        finally:
+            cursor.close()
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = (
+            pool.submit(on_cursor, consolidate_reverts),
+            pool.submit(on_cursor, detect_three_rr, incremental=True),
+            pool.submit(on_cursor, detect_mutual_reverts),
+        )
+        parallel = tuple(f.result() for f in futures)
+
+    db.close()
+    assert parallel == serial
@@ -0,0 +1,164 @@
+import random
+from datetime import datetime, timedelta
+
+import duckdb
+
+from conftest import insert_reverts
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.detection.detector_config import DEFAULT_CONFIG
+from src.detection.mutual_revert_detector import detect_mutual_reverts
+from src.detection.streaming_engine import SlidingWindowEngine
+from src.detection.three_rr_detector import detect_three_rr
+
+
+def _reverts(seed, n=500):
+    rng = random.Random(seed)
+    base = datetime(2025, 5, 1)
+    reverts = [
+        {
+            "article": rng.choice(["A", "B", "C"]),
+            "user": rng.choice(["u1", "u2", "u3", "u4", "u5"]),
+            "revid": i,
+            "timestamp": base + timedelta(minutes=rng.uniform(0, 4 * 24 * 60)),
+            "is_vandalism_revert": rng.random() < 0.1,
+        }
+        for i in range(n)
+    ]
+    return sorted(reverts, key=lambda r: r["timestamp"])
+
+
+def _key(rows):
+    return sorted(tuple(sorted(r.items())) for r in rows)
+
+
+def test_engine_matches_sql_detectors(tmp_path):
+    reverts = _reverts(seed=21)
+
+    con = duckdb.connect(str(tmp_path / "s.duckdb"))
+    con.execute(SCHEMA)
+    insert_reverts(con, [
+            (r["article"], r["user"], r["revid"], r["timestamp"], r["is_vandalism_revert"])
+            for r in reverts
+        ])
+    db = DuckDBClient(None, con=con)
+
+    # Mutual counts decay with the window; one spanning every revert keeps
+    # them equal to the SQL detector's counts over the whole history
+    wide = DEFAULT_CONFIG.replace(mutual_window_hours=5 * 24)
+
+    raw = SlidingWindowEngine()
+    consolidated = SlidingWindowEngine(count_consolidated=True)
+    mutual = SlidingWindowEngine(config=wide)
+    for r in reverts:
+        raw.process(r)
+        consolidated.process(r)
+        mutual.process(r)
+
+    assert raw.three_rr_cases()
+    assert _key(raw.three_rr_cases()) == _key(detect_three_rr(db=db))
+    assert _key(consolidated.three_rr_cases()) == _key(detect_three_rr(db=db, consolidated=True))
+    assert mutual.mutual_cases()
+    assert _key(mutual.mutual_cases()) == _key(detect_mutual_reverts(db=db, config=wide))
+
+    con.close()
+
+
+def test_incidents_are_raised_when_the_threshold_is_crossed():
+    engine = SlidingWindowEngine()
+    base = datetime(2025, 5, 1)
+
+    def revert(user, hours):
+        return engine.process({
+            "article": "A",
+            "user": user,
+            "timestamp": (base + timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        })
+
+    assert revert("u1", 0) == []
+    assert revert("u2", 1) == []
+    assert revert("u1", 2) == []
+
+    raised = revert("u2", 3)
+    assert [i["type"] for i in raised] == ["mutual"]
+    assert (raised[0]["reverts_user_a"], raised[0]["reverts_user_b"]) == (2, 2)
+
+    raised = revert("u1", 4)
+    assert [i["type"] for i in raised] == ["three_rr"]
+    assert raised[0]["revert_count"] == 3
+
+    # Already raised: later reverts only update the incident
+    assert revert("u1", 5) == []
+    assert engine.three_rr_cases()[0]["revert_count"] == 4
+
+
+def test_cold_keys_are_evicted():
+    engine = SlidingWindowEngine(max_keys=10)
+    base = datetime(2025, 5, 1)
+
+    for i in range(100):
+        engine.process({"article": f"A{i}", "user": f"u{i}", "timestamp": base + timedelta(minutes=i)})
+
+    assert len(engine._pairs) == 10
+    assert len(engine._articles) == 10
+    assert len(engine._mutual_stats) <= 10
+
+
+def test_incidents_under_the_key_cap():
+    engine = SlidingWindowEngine(max_keys=10)
+    base = datetime(2025, 5, 1)
+
+    for i in range(100):
+        for j in range(3):
+            engine.process({"article": f"A{i}", "user": "u1", "timestamp": base + timedelta(hours=i, minutes=j)})
+
+    assert len(engine.three_rr_incidents) == 10
+    assert {c["article"] for c in engine.three_rr_cases()} == {f"A{i}" for i in range(90, 100)}
+
+
+def _alerts(engine, reverts):
+    base = datetime(2025, 5, 1)
+    return [
+        (incident["type"], hours)
+        for user, hours in reverts
+        for incident in engine.process({"article": "A", "user": user, "timestamp": base + timedelta(hours=hours)})
+    ]
+
+
+def test_three_rr_incidents_expire_and_realert():
+    engine = SlidingWindowEngine()
+
+    # A violation, a quiet window, then a new violation
+    alerts = _alerts(engine, [("u1", h) for h in (0, 1, 2, 3, 240, 241, 242)])
+
+    assert alerts == [("three_rr", 2), ("three_rr", 242)]
+    case, = engine.three_rr_cases()
+    assert (case["revert_count"], case["last_revert_time"]) == (4, datetime(2025, 5, 11, 2))
+
+
+def test_three_rr_incident_stays_open_while_the_pair_keeps_reverting():
+    engine = SlidingWindowEngine()
+
+    # Never 24h without a revert: one incident, however long it runs
+    alerts = _alerts(engine, [("u1", h) for h in range(0, 100, 10)])
+
+    assert alerts == [("three_rr", 20)]
+
+
+def test_mutual_counts_decay_with_the_window():
+    engine = SlidingWindowEngine()
+
+    alerts = _alerts(engine, [("u1", 0), ("u2", 1), ("u1", 2), ("u2", 3)])
+    assert alerts == [("mutual", 3)]
+
+    # Ten days later the old reverts no longer count towards the pair
+    alerts = _alerts(engine, [("u1", 240), ("u2", 241)])
+    assert alerts == []
+    case, = engine.mutual_cases()
+    assert case["last_interaction"] == datetime(2025, 5, 1, 3)
+
+    alerts = _alerts(engine, [("u1", 242), ("u2", 243)])
+    assert alerts == [("mutual", 243)]
+    case, = engine.mutual_cases()
+    assert (case["reverts_user_a"], case["reverts_user_b"]) == (2, 2)
+    assert case["last_interaction"] == datetime(2025, 5, 11, 3)
@@ -0,0 +1,117 @@
+import random
+from datetime import datetime, timedelta
+
+import duckdb
+
+import src.detection.three_rr_detector as three_rr_detector
+from conftest import insert_reverts
+from src.db.duckdb_client import DuckDBClient
+from src.db.duckdb_init import SCHEMA
+from src.detection.three_rr_detector import detect_three_rr
+
+
+def _key(cases):
+    return sorted((c["article"], c["user"], c["last_revert_time"], c["revert_count"]) for c in cases)
+
+
+def test_incremental_matches_full_scan(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "3rr.duckdb")
+    monkeypatch.setattr(three_rr_detector, "DUCKDB_PATH", db_path)
+
+    con = duckdb.connect(db_path)
+    con.execute(SCHEMA)
+
+    rng = random.Random(7)
+    base = datetime(2025, 1, 1)
+    revid = 0
+
+    for batch in range(8):
+        rows = []
+        for _ in range(40):
+            revid += 1
+            # Mostly moving forward in time, with some late arrivals
+            hours = batch * 6 + rng.uniform(-20, 6)
+            rows.append((
+                rng.choice(["A", "B", "C"]),
+                rng.choice(["u1", "u2", "u3", "u4"]),
+                revid,
+                base + timedelta(hours=hours),
+                rng.random() < 0.1,
+            ))
+        insert_reverts(con, rows)
+
+        incremental = detect_three_rr(incremental=True)
+        full = detect_three_rr()
+
+        assert _key(incremental) == _key(full)
+
+    con.close()
+    assert full
+
+
+def test_incremental_run_without_new_events_is_a_noop(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "3rr.duckdb")
+    monkeypatch.setattr(three_rr_detector, "DUCKDB_PATH", db_path)
+
+    con = duckdb.connect(db_path)
+    con.execute(SCHEMA)
+    insert_reverts(con, [("A", "u1", i, datetime(2025, 1, 1, i), False) for i in range(3)])
+
+    first = detect_three_rr(incremental=True)
+    high_water = con.execute("SELECT high_water FROM detector_state").fetchone()[0]
+    second = detect_three_rr(incremental=True)
+    con.close()
+
+    assert first == second
+    assert first[0]["revert_count"] == 3
+    assert high_water == 3
+
+
+def test_incremental_consolidated_matches_full_count(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "3rr.duckdb")
+    monkeypatch.setattr(three_rr_detector, "DUCKDB_PATH", db_path)
+
+    con = duckdb.connect(db_path)
+    con.execute(SCHEMA)
+
+    rng = random.Random(11)
+    base = datetime(2025, 1, 1)
+    revid = 0
+
+    for batch in range(8):
+        rows = []
+        for _ in range(40):
+            revid += 1
+            # Minutes apart, with late arrivals that extend or bridge actions
+            minutes = batch * 90 + rng.uniform(-120, 90)
+            rows.append((
+                rng.choice(["A", "B"]),
+                rng.choice(["u1", "u2", "u3"]),
+                revid,
+                base + timedelta(minutes=minutes),
+                rng.random() < 0.1,
+            ))
+        insert_reverts(con, rows)
+
+        incremental = detect_three_rr(incremental=True, consolidated=True)
+        assert _key(incremental) == _key(detect_three_rr(consolidated=True))
+
+    con.close()
+    assert incremental
+
+
+def test_incremental_consolidated_drops_pairs_whose_actions_merge(tmp_path):
+    con = duckdb.connect(str(tmp_path / "3rr.duckdb"))
+    con.execute(SCHEMA)
+    db = DuckDBClient(None, con=con)
+    base = datetime(2025, 1, 1)
+
+    # Three actions 6 minutes apart ...
+    insert_reverts(con, [("A", "u1", i, base + timedelta(minutes=6 * i), False) for i in range(3)])
+    assert [c["revert_count"] for c in detect_three_rr(incremental=True, consolidated=True, db=db)] == [3]
+
+    # ... become one once late reverts fill the gaps
+    insert_reverts(con, [("A", "u1", 10 + i, base + timedelta(minutes=3 + 6 * i), False) for i in range(2)])
+    assert detect_three_rr(incremental=True, consolidated=True, db=db) == []
+
+    con.close()
@@ -0,0 +1,60 @@
+import src.detection.revert_detector as revert_detector
+from benchmarks import bench_startup
+from benchmarks.run_suite import compare
+from benchmarks.workload import generate_changes
+from src.detection.revert_detector import KEYWORD_SETS, KeywordMatcher, classify_changes
+
+
+def test_workload_is_seeded_and_honours_ratios(monkeypatch):
+    changes = generate_changes(20_000, seed=4, revert_ratio=0.2, vandalism_share=0.5)
+
+    assert changes == generate_changes(20_000, seed=4, revert_ratio=0.2, vandalism_share=0.5)
+    assert changes != generate_changes(20_000, seed=5, revert_ratio=0.2, vandalism_share=0.5)
+    assert [c["timestamp"] for c in changes] == sorted(c["timestamp"] for c in changes)
+
+    # The "peer-reviewed survey" summary only stays a non-revert with
+    # KEYWORD_WORD_BOUNDARY
+    monkeypatch.setattr(revert_detector, "MATCHER", KeywordMatcher(KEYWORD_SETS, word_boundary=True))
+    classified = classify_changes(changes)
+    reverts = [c for c in classified if c["is_revert"]]
+    vandalism = [c for c in reverts if c["is_vandalism_revert"]]
+
+    # Only an article's first edit can't be a revert
+    assert 0.15 < len(reverts) / len(changes) <= 0.21
+    assert 0.4 < len(vandalism) / len(reverts) < 0.6
+
+
+def test_hot_article_skew():
+    def top_share(skew):
+        changes = generate_changes(10_000, seed=1, hot_article_skew=skew)
+        return sum(c["title"] == "Article 0" for c in changes) / len(changes)
+
+    assert top_share(1.2) > 10 * top_share(0.0)
+
+
+def test_compare_flags_slower_stages():
+    baseline = {"results": [
+        {"events": 1000, "stage": "a", "seconds": 1.0},
+        {"events": 1000, "stage": "b", "seconds": 1.0},
+    ]}
+    report = {"results": [
+        {"events": 1000, "stage": "a", "seconds": 1.1},
+        {"events": 1000, "stage": "b", "seconds": 2.0},
+        {"events": 10, "stage": "b", "seconds": 9.0},
+    ]}
+
+    regressions = compare(report, baseline)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("b @ 1000 events")
+
+
+def test_startup_cost_is_recorded_as_comparable_stages(monkeypatch):
+    monkeypatch.setattr(bench_startup, "CASES", bench_startup.CASES[2:3])
+    records = bench_startup.measure(runs=1)
+
+    assert [r["stage"] for r in records] == ["startup: after: cli --help"]
+    assert records[0]["events"] == 0
+    assert 0 < records[0]["import_seconds"] < records[0]["seconds"]
+
+    slower = [dict(r, seconds=r["seconds"] * 2) for r in records]
+    assert len(compare({"results": slower}, {"results": records})) == 1